@@ -0,0 +1,108 @@
+"""Benchmark of the forecast projection on 100k subscriptions, against a
+loop stepping through the occurrences of each subscription.
+
+    FC_DATABASE_URI=... python benchmarks/bench_forecast.py [--subscriptions N]
+
+Importing the package starts the app, so it needs a reachable database
+like the server does; the benchmark itself does not query it.
+"""
+
+import argparse
+import random
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+
+from finance_control_be.forecast import ForecastBucket, ForecastEntry, Schedule, project
+from finance_control_be.models.recurrence import (
+    add_months,
+    nth_occurrence,
+    occurrence_index_after,
+)
+from finance_control_be.models.subscription import PeriodUnit
+
+PERIODS = [
+    (1, PeriodUnit.day),
+    (7, PeriodUnit.day),
+    (1, PeriodUnit.week),
+    (2, PeriodUnit.week),
+    (1, PeriodUnit.month),
+    (3, PeriodUnit.month),
+    (6, PeriodUnit.month),
+    (1, PeriodUnit.year),
+]
+CURRENCIES = ["USD", "EUR", "TWD"]
+
+
+def random_schedules(count: int, today: date) -> list[Schedule]:
+    rng = random.Random(0)
+    schedules = []
+    for _ in range(count):
+        period, period_unit = rng.choice(PERIODS)
+        schedules.append(
+            Schedule(
+                anchor=today - timedelta(days=rng.randrange(3 * 365)),
+                period=period,
+                period_unit=period_unit,
+                currency=rng.choice(CURRENCIES),
+                amount=Decimal(rng.randrange(100, 10_000)) / 100,
+                count=1,
+            )
+        )
+    return schedules
+
+
+def project_by_stepping(
+    schedules: list[Schedule], after: date, until: date, bucket: ForecastBucket
+) -> list[ForecastEntry]:
+    """One occurrence at a time, per subscription."""
+    buckets: defaultdict[tuple[date, str], list] = defaultdict(lambda: [Decimal(0), 0])
+    for schedule in schedules:
+        n = occurrence_index_after(
+            schedule.anchor, schedule.period, schedule.period_unit, after
+        )
+        while True:
+            day = nth_occurrence(
+                schedule.anchor, schedule.period, schedule.period_unit, n
+            )
+            if day > until:
+                break
+            start = day.replace(day=1) if bucket == ForecastBucket.month else day
+            totals = buckets[(start, schedule.currency)]
+            totals[0] += schedule.amount
+            totals[1] += schedule.count
+            n += 1
+
+    return [
+        ForecastEntry(
+            start=start, currency=currency, amount=amount, payment_count=count
+        )
+        for (start, currency), (amount, count) in sorted(buckets.items())
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--subscriptions", type=int, default=100_000)
+    parser.add_argument("--months", type=int, default=12)
+    arguments = parser.parse_args()
+
+    today = date.today()
+    until = add_months(today, arguments.months)
+    schedules = random_schedules(arguments.subscriptions, today)
+    print(f"{arguments.subscriptions} subscriptions, {arguments.months} months")
+
+    for bucket in ForecastBucket:
+        results = []
+        for name, function in (("project", project), ("stepping", project_by_stepping)):
+            started_at = time.perf_counter()
+            results.append(function(schedules, today, until, bucket))
+            seconds = time.perf_counter() - started_at
+            print(f"{bucket.value:>5} buckets, {name:>8}: {seconds:6.3f} s")
+
+        assert results[0] == results[1], "the projections differ"
+
+
+if __name__ == "__main__":
+    main()
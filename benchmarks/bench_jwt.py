@@ -0,0 +1,36 @@
+"""Micro-benchmark of token verification, with and without the cache.
+
+    FC_DATABASE_URI=... python benchmarks/bench_jwt.py [--calls N]
+
+Importing the package starts the app, so it needs a reachable database
+like the server does.
+"""
+
+import argparse
+import timeit
+
+from finance_control_be.auth.jwt import AccessTokenManager
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=100_000)
+    arguments = parser.parse_args()
+
+    manager = AccessTokenManager(secret_key="benchmark")
+    token = manager._create_access_token(data={"sub": "benchmark"})
+
+    # a cache holding nothing verifies every call.
+    uncached = AccessTokenManager(secret_key="benchmark")
+    uncached.verified_tokens.max_size = 0
+
+    for name, candidate in (("uncached", uncached), ("cached", manager)):
+        candidate.retrieve_info_from_token(token)
+        seconds = timeit.timeit(
+            lambda: candidate.retrieve_info_from_token(token), number=arguments.calls
+        )
+        print(f"{name:>8}: {seconds / arguments.calls * 1e6:8.2f} µs per request")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""Benchmark of the filtered, sorted and searched list pages as the tables
+grow, to check that the indexes keep them from scanning the whole table.
+
+    FC_DATABASE_URI=... FC_RESPONSE_CACHE=off \\
+        python benchmarks/bench_list_queries.py [--sizes 10000,100000,1000000]
+
+The subscriptions all belong to one method of a benchmark user, the worst
+case for the (method_id, ...) indexes, and the user has a method per 100
+subscriptions. A fixed 50 of them match the search, whatever the size. The
+rows are inserted into the database in FC_DATABASE_URI and deleted at the
+end; use a disposable one.
+"""
+
+import argparse
+import statistics
+import time
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+from sqlalchemy import delete, select, text
+
+from finance_control_be.app import app
+from finance_control_be.auth.jwt import create_access_token_manager
+from finance_control_be.auth.password import PasswordManager
+from finance_control_be.database import SessionLocal
+from finance_control_be.models.method import Kind, Method
+from finance_control_be.models.subscription import Subscription
+from finance_control_be.models.user import User
+
+SEARCH_MATCHES = 50
+
+INSERT_SUBSCRIPTIONS = text(
+    """
+    INSERT INTO subscriptions (
+        id, name, description, price, currency, period, period_unit,
+        purchased_at, is_active, method_id
+    )
+    SELECT
+        gen_random_uuid(),
+        CASE WHEN i <= :matches THEN 'netflix ' ELSE 'service ' END || i,
+        'plan ' || i % 97,
+        (i::bigint * 7919 % 100000) / 100.0,
+        (ARRAY['USD', 'EUR', 'TWD'])[i % 3 + 1],
+        1,
+        (ARRAY['day', 'week', 'month', 'year'])[i % 4 + 1]::periodunit,
+        DATE '2020-01-01' + (i::bigint * 7919 % 1500)::integer,
+        i % 4 <> 0,
+        :method_id
+    FROM generate_series(:start, :stop) AS i
+    """
+)
+INSERT_METHODS = text(
+    """
+    INSERT INTO methods (id, name, description, kind, username)
+    SELECT
+        gen_random_uuid(),
+        CASE WHEN i <= :matches THEN 'travel card ' ELSE 'method ' END || i,
+        NULL,
+        (ARRAY['bank_account', 'credit_card', 'debit_card', 'cash', 'other'])[
+            i % 5 + 1
+        ]::kind,
+        :username
+    FROM generate_series(:start, :stop) AS i
+    """
+)
+
+SUBSCRIPTION_QUERIES = {
+    "page": {},
+    "active, currency": {"is_active": "true", "currency": "USD"},
+    "price range, by price": {
+        "min_price": "100",
+        "max_price": "200",
+        "sort": "price",
+    },
+    "purchased since, by -date": {
+        "purchased_from": "2023-01-01",
+        "sort": "-purchased_at",
+    },
+    "by name": {"sort": "name"},
+    "search": {"q": "netflix"},
+    "search, common word": {"q": "plan"},
+}
+METHOD_QUERIES = {
+    "page": {},
+    "kind": {"kind": "credit_card"},
+    "by name": {"sort": "name"},
+    "search": {"q": "travel"},
+}
+
+
+def median_milliseconds(client: TestClient, url: str, params, headers, runs: int):
+    timings = []
+    for _ in range(runs):
+        started_at = time.perf_counter()
+        response = client.get(url, params={"limit": 20, **params}, headers=headers)
+        timings.append(time.perf_counter() - started_at)
+        assert response.status_code == 200, response.text
+    return statistics.median(timings) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--runs", type=int, default=20)
+    arguments = parser.parse_args()
+    sizes = sorted(int(size) for size in arguments.sizes.split(","))
+
+    username = f"benchmark-{uuid4()}"
+    method_id = uuid4()
+    with SessionLocal() as session:
+        user = User.new_hashed(password=username, password_manager=PasswordManager())
+        user.username = username
+        session.add(user)
+        session.flush()
+        session.add(
+            Method(id=method_id, name="benchmark", kind=Kind.cash, username=username)
+        )
+        session.commit()
+
+    token = create_access_token_manager()._create_access_token({"sub": username})
+    headers = {"Authorization": f"Bearer {token}"}
+    queries = [
+        (f"subscriptions: {name}", f"/methods/{method_id}/subscriptions/", params)
+        for name, params in SUBSCRIPTION_QUERIES.items()
+    ] + [
+        (f"methods: {name}", "/methods/", params)
+        for name, params in METHOD_QUERIES.items()
+    ]
+
+    results: dict[str, list[float]] = {name: [] for name, _, _ in queries}
+    try:
+        with TestClient(app) as client:
+            inserted = 0
+            for size in sizes:
+                with SessionLocal() as session:
+                    session.execute(
+                        INSERT_SUBSCRIPTIONS,
+                        {
+                            "matches": SEARCH_MATCHES,
+                            "method_id": method_id,
+                            "start": inserted + 1,
+                            "stop": size,
+                        },
+                    )
+                    session.execute(
+                        INSERT_METHODS,
+                        {
+                            "matches": SEARCH_MATCHES,
+                            "username": username,
+                            "start": inserted // 100 + 1,
+                            "stop": size // 100,
+                        },
+                    )
+                    session.commit()
+                    session.execute(text("ANALYZE subscriptions, methods"))
+                    session.commit()
+                inserted = size
+
+                for name, url, params in queries:
+                    results[name].append(
+                        median_milliseconds(
+                            client, url, params, headers, arguments.runs
+                        )
+                    )
+    finally:
+        with SessionLocal() as session:
+            session.execute(
+                delete(Subscription).where(
+                    Subscription.method_id.in_(
+                        select(Method.id).where(Method.username == username)
+                    )
+                )
+            )
+            session.execute(delete(Method).where(Method.username == username))
+            session.execute(delete(User).where(User.username == username))
+            session.commit()
+
+    print(f"median ms per request, {arguments.runs} runs, pages of 20")
+    print(f"{'subscriptions':<40}" + "".join(f"{size:>10}" for size in sizes))
+    for name, timings in results.items():
+        print(f"{name:<40}" + "".join(f"{timing:>10.2f}" for timing in timings))
+    growth = sizes[-1] / sizes[0]
+    worst = max(timings[-1] / timings[0] for timings in results.values())
+    print(f"table grew {growth:.0f}x, the slowest query grew {worst:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
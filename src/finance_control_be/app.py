@@ -1,19 +1,69 @@
+import asyncio
 import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 
-from finance_control_be.controllers import auth, internal, method, user, subscription
-from finance_control_be.database import SessionLocal
+from finance_control_be.controllers import (
+    auth,
+    export,
+    internal,
+    method,
+    report,
+    user,
+    subscription,
+    subscription_import,
+)
+from finance_control_be.const import (
+    DEBUG,
+    METRICS,
+    REMINDER_INTERVAL,
+    REPLICA_HEALTH_INTERVAL,
+    ROLLOVER_INTERVAL,
+)
+from finance_control_be.database import SessionLocal, replica_set
+from finance_control_be.metrics import instrument
+from finance_control_be.query_budget import detect_repeated_queries
 from finance_control_be.models import Base
+from finance_control_be.reminders import schedule_reminders_periodically
+from finance_control_be.rollover import schedule_rollover
 
 # initialize the database
 with SessionLocal() as session:
     Base.metadata.create_all(bind=session.get_bind())
 
 
-app = FastAPI(debug=os.environ.get("FC_DEBUG") == "1")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    tasks = []
+    if ROLLOVER_INTERVAL > 0:
+        tasks.append(asyncio.create_task(schedule_rollover(ROLLOVER_INTERVAL)))
+    if REMINDER_INTERVAL > 0:
+        tasks.append(
+            asyncio.create_task(schedule_reminders_periodically(REMINDER_INTERVAL))
+        )
+    if replica_set is not None:
+        tasks.append(
+            asyncio.create_task(replica_set.check_periodically(REPLICA_HEALTH_INTERVAL))
+        )
+
+    yield
+
+    for task in tasks:
+        task.cancel()
+
+
+app = FastAPI(debug=os.environ.get("FC_DEBUG") == "1", lifespan=lifespan)
 
 app.include_router(auth.router)
 app.include_router(user.router)
 app.include_router(internal.router)
 app.include_router(method.router)
 app.include_router(subscription.router)
+app.include_router(subscription_import.router)
+app.include_router(report.router)
+app.include_router(export.router)
+
+if METRICS:
+    instrument(app)
+if DEBUG:
+    detect_repeated_queries(app)
@@ -1,5 +1,6 @@
 import os
 
+import argon2
 from loguru import logger
 
 
@@ -16,3 +17,27 @@ if not SECRET_KEY:
     SECRET_KEY = os.urandom(32).hex()
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+# how many verified tokens to keep, to skip verifying them again.
+TOKEN_CACHE_SIZE = int(os.environ.get("FC_TOKEN_CACHE_SIZE", 4096))
+
+# argon2 cost parameters. Hashes made with other parameters are upgraded
+# transparently on the next successful login.
+ARGON2_TIME_COST = int(os.environ.get("FC_ARGON2_TIME_COST", argon2.DEFAULT_TIME_COST))
+ARGON2_MEMORY_COST = int(
+    os.environ.get("FC_ARGON2_MEMORY_COST", argon2.DEFAULT_MEMORY_COST)
+)
+ARGON2_PARALLELISM = int(
+    os.environ.get("FC_ARGON2_PARALLELISM", argon2.DEFAULT_PARALLELISM)
+)
+
+# the number of threads hashing passwords, and how many more requests may
+# wait for one before the server answers 503.
+PASSWORD_HASH_WORKERS = int(
+    os.environ.get("FC_PASSWORD_HASH_WORKERS", max((os.cpu_count() or 2) // 2, 1))
+)
+PASSWORD_HASH_QUEUE_DEPTH = int(os.environ.get("FC_PASSWORD_HASH_QUEUE_DEPTH", 16))
+
+# authenticated users are cached per process to skip the lookup on every
+# request; changes made by other processes show up after the TTL (seconds).
+PRINCIPAL_CACHE_SIZE = int(os.environ.get("FC_PRINCIPAL_CACHE_SIZE", 1024))
+PRINCIPAL_CACHE_TTL = float(os.environ.get("FC_PRINCIPAL_CACHE_TTL", 60))
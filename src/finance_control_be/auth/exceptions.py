@@ -11,3 +11,8 @@ class InvalidTokenException(Exception):
 class InactiveUserException(Exception):
     def __init__(self):
         super().__init__("Inactive user.")
+
+
+class PasswordHasherBusyException(Exception):
+    def __init__(self):
+        super().__init__("Too many password hashing requests in progress.")
@@ -1,21 +1,31 @@
+import hashlib
+import time
 from datetime import datetime, timedelta
+from functools import cache
 from typing import cast
 
 from jose import jwt, JWTError
+from loguru import logger
 from finance_control_be.auth.const import (
     ACCESS_TOKEN_EXPIRE_MINUTES,
     ALGORITHM,
     SECRET_KEY,
+    TOKEN_CACHE_SIZE,
 )
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import SQLAlchemyError
 from finance_control_be.auth.exceptions import (
     InactiveUserException,
     InvalidCredentialsException,
     InvalidTokenException,
+    PasswordHasherBusyException,
 )
 
 from finance_control_be.auth.payload import UserAuthenticationPayload
 from finance_control_be.auth.password import PasswordManager
+from finance_control_be.cache import TTLCache
+from finance_control_be.metrics import observe_stage
 from finance_control_be.models.user import User
 
 
@@ -33,42 +43,81 @@ class AccessTokenManager:
         self.access_token_expire_minutes = (
             access_token_expire_minutes or ACCESS_TOKEN_EXPIRE_MINUTES
         )
+        # verified payloads keyed by the digest of their token, kept until
+        # the token expires.
+        self.verified_tokens: TTLCache[bytes, UserAuthenticationPayload] = TTLCache(
+            max_size=TOKEN_CACHE_SIZE
+        )
 
     def get_password_manager(self) -> PasswordManager:
         return self.password_manager
 
-    def authenticate_and_create_access_token(
-        self, username: str, password: str, session: Session
+    async def authenticate_and_create_access_token(
+        self, username: str, password: str, session: AsyncSession
     ) -> str:
-        user = self._get_user_info(
+        user = await self._get_user_info(
             username=username, password=password, session=session
         )
         return self._create_access_token(data={"sub": user.username})
 
     def retrieve_info_from_token(self, token: str) -> UserAuthenticationPayload:
+        digest = hashlib.sha256(token.encode()).digest()
+
+        payload = self.verified_tokens.get(digest)
+        if payload is not None:
+            return payload
+
         try:
-            return cast(
-                UserAuthenticationPayload,
-                jwt.decode(token, self.secret_key, algorithms=[self.algorithm]),
-            )
+            with observe_stage("jwt_decode"):
+                payload = cast(
+                    UserAuthenticationPayload,
+                    jwt.decode(token, self.secret_key, algorithms=[self.algorithm]),
+                )
         except JWTError:
             raise InvalidTokenException()
 
-    def _get_user_info(self, username: str, password: str, session: Session) -> User:
-        user = session.query(User).filter(User.username == username).first()
+        expires_at = payload.get("exp")
+        if isinstance(expires_at, (int, float)):
+            self.verified_tokens.set(digest, payload, ttl=expires_at - time.time())
+
+        return payload
+
+    async def _get_user_info(
+        self, username: str, password: str, session: AsyncSession
+    ) -> User:
+        user = await session.scalar(select(User).where(User.username == username))
         if not user:
             raise InvalidCredentialsException()
 
         if user.disabled:
             raise InactiveUserException()
 
-        if not user.verify_password(
-            password=password, password_manager=PasswordManager()
+        if not await user.verify_password_async(
+            password=password, password_manager=self.password_manager
         ):
             raise InvalidCredentialsException()
 
+        if self.password_manager.needs_rehash(user.password):
+            await self._rehash_password(user=user, password=password, session=session)
+
         return user
 
+    async def _rehash_password(
+        self, user: User, password: str, session: AsyncSession
+    ) -> None:
+        # the argon2 parameters changed since this hash was made. The login
+        # has already succeeded, so an upgrade failing is not fatal.
+        try:
+            user.password = await self.password_manager.hash_password_async(
+                password=password
+            )
+            await session.commit()
+        except PasswordHasherBusyException:
+            pass
+        except SQLAlchemyError as e:
+            await session.rollback()
+            logger.warning("failed to rehash the password of {}: {}", user.username, e)
+
     def _create_access_token(
         self, data: UserAuthenticationPayload, expires_delta: timedelta | None = None
     ) -> str:
@@ -84,5 +133,7 @@ class AccessTokenManager:
         return encoded_jwt
 
 
+@cache
 def create_access_token_manager() -> AccessTokenManager:
+    # shared, so that verified tokens are reused across requests.
     return AccessTokenManager()
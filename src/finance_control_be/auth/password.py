@@ -1,9 +1,70 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
 import argon2
 
+from finance_control_be.auth.const import (
+    ARGON2_MEMORY_COST,
+    ARGON2_PARALLELISM,
+    ARGON2_TIME_COST,
+    PASSWORD_HASH_QUEUE_DEPTH,
+    PASSWORD_HASH_WORKERS,
+)
+from finance_control_be.auth.exceptions import PasswordHasherBusyException
+from finance_control_be.metrics import observe_stage
+
+T = TypeVar("T")
+
+
+class HashingExecutor:
+    """A dedicated thread pool for argon2 with admission control.
+
+    argon2-cffi releases the GIL while hashing, so threads run in parallel
+    while the pool size caps how many cores logins may take. Once
+    ``max_workers + max_queued`` calls are in flight, further calls are
+    rejected with ``PasswordHasherBusyException`` instead of queueing."""
+
+    def __init__(self, max_workers: int, max_queued: int):
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="argon2"
+        )
+        self.capacity = max_workers + max_queued
+        self.in_flight = 0
+        self.lock = threading.Lock()
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        with self.lock:
+            if self.in_flight >= self.capacity:
+                raise PasswordHasherBusyException()
+            self.in_flight += 1
+
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self.executor, functools.partial(fn, *args, **kwargs)
+            )
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+@functools.cache
+def get_hashing_executor() -> HashingExecutor:
+    return HashingExecutor(
+        max_workers=PASSWORD_HASH_WORKERS, max_queued=PASSWORD_HASH_QUEUE_DEPTH
+    )
+
 
 class PasswordManager:
-    def __init__(self):
-        self.hasher = argon2.PasswordHasher()
+    def __init__(self, executor: HashingExecutor | None = None):
+        self.hasher = argon2.PasswordHasher(
+            time_cost=ARGON2_TIME_COST,
+            memory_cost=ARGON2_MEMORY_COST,
+            parallelism=ARGON2_PARALLELISM,
+        )
+        self.executor = executor or get_hashing_executor()
 
     def hash_password(self, password: str) -> str:
         return self.hasher.hash(password=password)
@@ -15,6 +76,20 @@ class PasswordManager:
         except argon2.exceptions.VerifyMismatchError:
             return False
 
+    def needs_rehash(self, hash: str) -> bool:
+        return self.hasher.check_needs_rehash(hash)
+
+    async def hash_password_async(self, password: str) -> str:
+        # the stages include the wait for a hashing thread.
+        with observe_stage("argon2_hash"):
+            return await self.executor.run(self.hash_password, password=password)
+
+    async def verify_password_async(self, input_password: str, hash: str) -> bool:
+        with observe_stage("argon2_verify"):
+            return await self.executor.run(
+                self.verify_password, input_password=input_password, hash=hash
+            )
+
 
 def create_password_manager() -> PasswordManager:
     return PasswordManager()
@@ -1,5 +1,6 @@
-from typing import TypedDict
+from typing import NotRequired, TypedDict
 
 
 class UserAuthenticationPayload(TypedDict):
     sub: str  # subject, username.
+    exp: NotRequired[int]  # expiration time, seconds since the epoch.
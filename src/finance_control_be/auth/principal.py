@@ -0,0 +1,59 @@
+from dataclasses import dataclass
+from typing import Self
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from finance_control_be.auth.const import PRINCIPAL_CACHE_SIZE, PRINCIPAL_CACHE_TTL
+from finance_control_be.cache import TTLCache
+from finance_control_be.models.user import User
+
+
+@dataclass(frozen=True)
+class Principal:
+    """A snapshot of the authenticated user, detached from any session."""
+
+    username: str
+    full_name: str | None
+    email: str | None
+    disabled: bool
+
+    @classmethod
+    def from_entity(cls, user: User) -> Self:
+        return cls(
+            username=user.username,
+            full_name=user.full_name,
+            email=user.email,
+            disabled=user.disabled,
+        )
+
+
+# keyed by username. The cache is per process: other workers may serve a
+# changed user for up to PRINCIPAL_CACHE_TTL seconds.
+principal_cache: TTLCache[str, Principal] = TTLCache(
+    max_size=PRINCIPAL_CACHE_SIZE, ttl=PRINCIPAL_CACHE_TTL
+)
+
+_CHANGED_USERNAMES = "changed_usernames"
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_users(session: Session, flush_context) -> None:
+    changed = session.info.setdefault(_CHANGED_USERNAMES, set())
+    for instance in (*session.dirty, *session.deleted):
+        if isinstance(instance, User):
+            changed.add(instance.username)
+            principal_cache.invalidate(instance.username)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_users(session: Session) -> None:
+    # invalidate again: a concurrent request may have cached the old row
+    # between our flush and commit.
+    for username in session.info.pop(_CHANGED_USERNAMES, ()):
+        principal_cache.invalidate(username)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changed_users(session: Session) -> None:
+    session.info.pop(_CHANGED_USERNAMES, None)
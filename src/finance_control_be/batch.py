@@ -0,0 +1,25 @@
+from typing import Generic, Sequence, TypeVar
+
+from fastapi import HTTPException, status
+from pydantic import BaseModel
+
+from finance_control_be.const import MAX_BATCH_SIZE
+
+T = TypeVar("T")
+
+
+class BatchItemResult(BaseModel, Generic[T]):
+    """The outcome of one item of a batch request, in request order."""
+
+    index: int
+    status: int
+    item: T | None = None
+    detail: str | None = None
+
+
+def check_batch_size(items: Sequence) -> None:
+    if len(items) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"A batch may contain at most {MAX_BATCH_SIZE} items",
+        )
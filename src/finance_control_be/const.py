@@ -2,3 +2,50 @@ import os
 
 
 DEBUG = os.environ.get("FC_DEBUG") == "1"
+
+# the largest number of items accepted by a batch endpoint.
+MAX_BATCH_SIZE = int(os.environ.get("FC_MAX_BATCH_SIZE", 500))
+# the largest page a list endpoint returns.
+MAX_PAGE_SIZE = int(os.environ.get("FC_MAX_PAGE_SIZE", 100))
+
+# the currency reports convert into when the request names none.
+BASE_CURRENCY = os.environ.get("FC_BASE_CURRENCY", "USD")
+# how often, in seconds, each process reloads the exchange rates.
+EXCHANGE_RATE_REFRESH_INTERVAL = float(
+    os.environ.get("FC_EXCHANGE_RATE_REFRESH_INTERVAL", 300)
+)
+
+# subscriptions whose purchase date one rollover transaction advances.
+ROLLOVER_CHUNK_SIZE = int(os.environ.get("FC_ROLLOVER_CHUNK_SIZE", 1000))
+# the seconds between rollovers run by the server; 0 leaves it to the CLI.
+ROLLOVER_INTERVAL = float(os.environ.get("FC_ROLLOVER_INTERVAL", 0))
+
+# how many days before a payment its reminder is written to the outbox.
+REMINDER_LEAD_DAYS = int(os.environ.get("FC_REMINDER_LEAD_DAYS", 3))
+# due dates one reminder transaction claims.
+REMINDER_BATCH_SIZE = int(os.environ.get("FC_REMINDER_BATCH_SIZE", 500))
+# the seconds between reminder passes run by the server; 0 leaves it to the CLI.
+REMINDER_INTERVAL = float(os.environ.get("FC_REMINDER_INTERVAL", 0))
+
+# where GET responses are cached: "memory", "sqlite:<path>" or "off".
+RESPONSE_CACHE = os.environ.get("FC_RESPONSE_CACHE", "memory")
+# the bytes of responses the cache holds before evicting.
+RESPONSE_CACHE_SIZE = int(os.environ.get("FC_RESPONSE_CACHE_SIZE", 64 * 1024 * 1024))
+
+# the seconds after a write during which the user reads from the primary.
+READ_YOUR_WRITES_SECONDS = float(os.environ.get("FC_READ_YOUR_WRITES_SECONDS", 5))
+# the seconds between health checks of the read replicas.
+REPLICA_HEALTH_INTERVAL = float(os.environ.get("FC_REPLICA_HEALTH_INTERVAL", 10))
+
+# FC_METRICS=1 records request and query metrics and serves /metrics.
+METRICS = os.environ.get("FC_METRICS") == "1"
+# the bearer token scrapers send to /metrics; without one, /metrics is only
+# served with FC_DEBUG=1, like the internal routes.
+METRICS_TOKEN = os.environ.get("FC_METRICS_TOKEN") or None
+# queries slower than this many seconds are logged, without their values.
+SLOW_QUERY_SECONDS = float(os.environ.get("FC_SLOW_QUERY_SECONDS", 0.5))
+
+# with FC_DEBUG=1, what to do with a request running the same statement
+# FC_N_PLUS_ONE_THRESHOLD times or more: "log", "raise" or "off".
+N_PLUS_ONE = os.environ.get("FC_N_PLUS_ONE", "log")
+N_PLUS_ONE_THRESHOLD = int(os.environ.get("FC_N_PLUS_ONE_THRESHOLD", 5))
@@ -1,22 +1,32 @@
-from tkinter import E
-from turtle import st
 from typing import Annotated
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from loguru import logger
-import psycopg2
 from pydantic import BaseModel
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Session
-from finance_control_be.auth.exceptions import InvalidCredentialsException
+from sqlalchemy.ext.asyncio import AsyncSession
+from finance_control_be.auth.exceptions import (
+    InactiveUserException,
+    InvalidCredentialsException,
+    PasswordHasherBusyException,
+)
 from finance_control_be.auth.jwt import AccessTokenManager, create_access_token_manager
 
-from finance_control_be.dependencies.db_session import get_session
+from finance_control_be.database import is_unique_violation
+from finance_control_be.dependencies.db_session import get_async_session
 from finance_control_be.models.user import User
 
 router = APIRouter(tags=["user", "authentication"])
 
 
+def password_hasher_busy_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many login attempts in progress, try again later",
+        headers={"Retry-After": "1"},
+    )
+
+
 class Token(BaseModel):
     access_token: str
     token_type: str
@@ -39,10 +49,10 @@ class UserResponse(BaseModel):
 async def login_for_access_token(
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
     access_token_manager: Annotated[AccessTokenManager, Depends(create_access_token_manager)],
-    session: Annotated[Session, Depends(get_session)],
+    session: Annotated[AsyncSession, Depends(get_async_session)],
 ) -> Token:
     try:
-        token = access_token_manager.authenticate_and_create_access_token(
+        token = await access_token_manager.authenticate_and_create_access_token(
             form_data.username, form_data.password, session
         )
     except InvalidCredentialsException:
@@ -50,6 +60,12 @@ async def login_for_access_token(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
         )
+    except InactiveUserException:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Inactive user"
+        )
+    except PasswordHasherBusyException:
+        raise password_hasher_busy_exception()
 
     return Token(access_token=token, token_type="bearer")
 
@@ -57,23 +73,30 @@ async def login_for_access_token(
 @router.post("/register", response_model=UserResponse)
 async def register(
     user: UserRegisterRequest,
-    session: Annotated[Session, Depends(get_session)],
+    session: Annotated[AsyncSession, Depends(get_async_session)],
     access_token_manager: Annotated[AccessTokenManager, Depends(create_access_token_manager)],
 ) -> UserResponse:
-    new_user = User.new_hashed(password=user.password, password_manager=access_token_manager.get_password_manager())
+    try:
+        new_user = await User.new_hashed_async(
+            password=user.password,
+            password_manager=access_token_manager.get_password_manager(),
+        )
+    except PasswordHasherBusyException:
+        raise password_hasher_busy_exception()
+
     new_user.username = user.username
     new_user.full_name = user.full_name
     new_user.email = user.email
 
     try:
         session.add(new_user)
-        session.commit()
+        await session.commit()
     except Exception as e:
-        session.rollback()
+        await session.rollback()
 
         if isinstance(e, IntegrityError):
             logger.error("{} -> ({}) {}", type(e), type(e.orig), e.orig)
-            if isinstance(e.orig, psycopg2.errors.UniqueViolation):
+            if is_unique_violation(e):
                 raise HTTPException(
                     status_code=status.HTTP_409_CONFLICT,
                     detail="Username already exists",
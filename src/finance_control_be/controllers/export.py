@@ -0,0 +1,165 @@
+import csv
+import io
+from enum import Enum
+from typing import Annotated, AsyncIterator, Sequence
+from uuid import UUID
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Row, Select, select
+
+from finance_control_be.auth.principal import Principal
+from finance_control_be.controllers.method import MethodResponseDto
+from finance_control_be.controllers.subscription import SubscriptionResponseDto
+from finance_control_be.database import READ_ONLY, USERNAME, AsyncSessionLocal
+from finance_control_be.dependencies.user_information import get_user_information
+from finance_control_be.models.method import Method
+from finance_control_be.models.subscription import Subscription
+
+router = APIRouter(prefix="/export", tags=["export"])
+
+# rows fetched from the server-side cursor at a time.
+EXPORT_BATCH_SIZE = 500
+
+
+class ExportFormat(Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+
+class MethodExportDto(MethodResponseDto):
+    subscriptions: list[SubscriptionResponseDto]
+
+
+EXPORT_COLUMNS = (
+    Method.id.label("method_id"),
+    Method.name.label("method_name"),
+    Method.description.label("method_description"),
+    Method.kind.label("method_kind"),
+    Method.color.label("method_color"),
+    Subscription.id.label("subscription_id"),
+    Subscription.name,
+    Subscription.description,
+    Subscription.price,
+    Subscription.currency,
+    Subscription.period,
+    Subscription.period_unit,
+    Subscription.purchased_at,
+    Subscription.is_active,
+)
+
+
+def select_export_rows(username: str) -> Select:
+    # one row per subscription, grouped by method; methods without any
+    # subscription get a single row of nulls.
+    return (
+        select(*EXPORT_COLUMNS)
+        .outerjoin(Subscription, Subscription.method_id == Method.id)
+        .where(Method.username == username)
+        .order_by(Method.id, Subscription.id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+
+
+async def stream_export_rows(username: str) -> AsyncIterator[Sequence[Row]]:
+    # the request-scoped session is closed before the response body is
+    # sent, so the stream owns its own session.
+    async with AsyncSessionLocal() as session:
+        session.info.update({READ_ONLY: True, USERNAME: username})
+        result = await session.stream(select_export_rows(username))
+        async for rows in result.partitions():
+            yield rows
+
+
+def method_from_row(row: Row) -> MethodExportDto:
+    return MethodExportDto(
+        id=row.method_id,
+        name=row.method_name,
+        description=row.method_description,
+        kind=row.method_kind,
+        color=row.method_color,
+        subscriptions=[],
+    )
+
+
+def subscription_from_row(row: Row) -> SubscriptionResponseDto:
+    return SubscriptionResponseDto(
+        id=row.subscription_id,
+        name=row.name,
+        description=row.description,
+        price=row.price,
+        currency=row.currency,
+        period=row.period,
+        period_unit=row.period_unit,
+        purchased_at=row.purchased_at,
+        is_active=row.is_active,
+    )
+
+
+async def export_ndjson(username: str) -> AsyncIterator[str]:
+    """One JSON object per line for each method, with its subscriptions."""
+    method: MethodExportDto | None = None
+    method_id: UUID | None = None
+
+    async for rows in stream_export_rows(username):
+        lines = []
+        for row in rows:
+            if row.method_id != method_id:
+                if method is not None:
+                    lines.append(method.model_dump_json() + "\n")
+                method, method_id = method_from_row(row), row.method_id
+
+            if row.subscription_id is not None:
+                method.subscriptions.append(subscription_from_row(row))
+
+        if lines:
+            yield "".join(lines)
+
+    if method is not None:
+        yield method.model_dump_json() + "\n"
+
+
+def csv_value(value: object) -> object:
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return value
+
+
+async def export_csv(username: str) -> AsyncIterator[str]:
+    """One line per subscription, prefixed with the columns of its method."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(column.key for column in EXPORT_COLUMNS)
+    async for rows in stream_export_rows(username):
+        writer.writerows([csv_value(value) for value in row] for row in rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+@router.get(
+    "/",
+    description="Stream every method of the user with its subscriptions.",
+)
+async def export_methods(
+    user: Annotated[Principal, Depends(get_user_information)],
+    format: ExportFormat = ExportFormat.ndjson,
+) -> StreamingResponse:
+    match format:
+        case ExportFormat.ndjson:
+            content, media_type = export_ndjson(user.username), "application/x-ndjson"
+        case ExportFormat.csv:
+            content, media_type = export_csv(user.username), "text/csv"
+
+    return StreamingResponse(
+        content,
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="export.{format.value}"'
+        },
+    )
@@ -19,3 +19,34 @@ if DEBUG:
             user.email = "admin@email.tld"
             session.add(user)
             session.commit()
+
+    @router.get("/caches")
+    def cache_statistics() -> dict:
+        from dataclasses import asdict
+        from finance_control_be.auth.jwt import create_access_token_manager
+        from finance_control_be.auth.principal import principal_cache
+        from finance_control_be.exchange_rates import rate_cache
+        from finance_control_be.response_cache import response_cache
+
+        statistics = {
+            "principal": asdict(principal_cache.statistics()),
+            "token": asdict(create_access_token_manager().verified_tokens.statistics()),
+            "exchange_rate": asdict(rate_cache.statistics()),
+        }
+        if response_cache is not None:
+            statistics["response"] = asdict(response_cache.statistics())
+
+        for cache in statistics.values():
+            lookups = cache["hits"] + cache["misses"]
+            cache["hit_ratio"] = cache["hits"] / lookups if lookups else None
+        return statistics
+
+    @router.get("/pools")
+    def connection_pool_statistics() -> dict:
+        from dataclasses import asdict
+        from finance_control_be.pool import pool_statistics
+
+        return {
+            name: asdict(statistics)
+            for name, statistics in pool_statistics().items()
+        }
@@ -1,14 +1,21 @@
-from typing import Annotated
+from typing import Annotated, Any
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
-from finance_control_be.dependencies.db_session import get_session
+from sqlalchemy import Row, Select, delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from finance_control_be.batch import BatchItemResult, check_batch_size
+from finance_control_be.dependencies.db_session import get_async_session
+from finance_control_be.dependencies.fields import FieldsParameter, project_rows
 from finance_control_be.dependencies.pagination import PaginationParameter
+from finance_control_be.dependencies.response_cache import CachedResponse
 
+from finance_control_be.auth.principal import Principal
 from finance_control_be.dependencies.user_information import get_user_information
 from finance_control_be.models.method import Kind, Method
-from finance_control_be.models.user import User
+from finance_control_be.models.search import search_condition, search_document
+from finance_control_be.versioning import bump_version
 
 router = APIRouter(prefix="/methods", tags=["method"])
 
@@ -30,6 +37,20 @@ class MethodResponseDto(BaseModel):
             color=method.color,
         )
 
+    @classmethod
+    def from_row(cls, row: Row) -> "MethodResponseDto":
+        return cls.model_validate(row._mapping)
+
+
+# the columns MethodResponseDto.from_row expects.
+method_response_columns = (
+    Method.id,
+    Method.name,
+    Method.description,
+    Method.kind,
+    Method.color,
+)
+
 
 class MethodPostDto(BaseModel):
     name: str
@@ -46,6 +67,9 @@ class MethodPostDto(BaseModel):
             username=username,
         )
 
+    def to_values(self, username: str) -> dict[str, Any]:
+        return {**self.model_dump(), "username": username}
+
 
 class MethodPatchDto(BaseModel):
     name: str | None = None
@@ -53,82 +77,193 @@ class MethodPatchDto(BaseModel):
     kind: Kind | None = None
     color: str | None = None
 
+    def to_values(self) -> dict[str, Any]:
+        """The columns to update; fields left out or null keep their value."""
+        return self.model_dump(exclude_none=True)
+
+
+# the fields a list can be projected to.
+method_fields = {column.key: column for column in method_response_columns}
+
+# the columns list_methods can sort by, each backed by an index.
+method_sort_columns = {"name": Method.name, "kind": Method.kind}
 
-    def patch_entity(self, method: Method):
-        method.name = self.name or method.name
-        method.description = self.description or method.description
-        method.kind = self.kind or method.kind
-        method.color = self.color or method.color
 
+class MethodFilterParameter(BaseModel):
+    """Filters of the method list; ``q`` searches names and descriptions."""
+
+    kind: Kind | None = None
+    q: str | None = None
+
+    def apply(self, statement: Select) -> Select:
+        if self.kind is not None:
+            statement = statement.where(Method.kind == self.kind)
+        if self.q is not None:
+            condition = search_condition(
+                search_document(Method.name, Method.description), self.q
+            )
+            if condition is not None:
+                statement = statement.where(condition)
+
+        return statement
 
 
 @router.get("/")
-def list_methods(
-    user: Annotated[User, Depends(get_user_information)],
+async def list_methods(
+    user: Annotated[Principal, Depends(get_user_information)],
     pagination: Annotated[PaginationParameter, Depends()],
-    session: Annotated[Session, Depends(get_session)],
+    filters: Annotated[MethodFilterParameter, Depends()],
+    fields: Annotated[FieldsParameter, Depends()],
+    session: Annotated[AsyncSession, Depends(get_async_session)],
+    cache: Annotated[CachedResponse, Depends()],
+    response: Response,
 ) -> list[MethodResponseDto]:
-    methods = (session.query(Method).filter(Method.username == user.username)
-        .offset(pagination.offset)
-        .limit(pagination.limit)
-        .all())
+    cached = cache.lookup()
+    if cached is not None:
+        return cached
+
+    statement = filters.apply(select(Method).where(Method.username == user.username))
+    page = pagination.apply(statement, Method.id, method_sort_columns)
+
+    columns = fields.columns(method_fields)
+    if columns is not None:
+        rows = (
+            await session.execute(
+                page.with_only_columns(
+                    *dict.fromkeys([*columns, *pagination.cursor_columns()])
+                )
+            )
+        ).all()
+        pagination.write_headers(
+            response, rows, await pagination.count(session, statement)
+        )
+        return cache.store(project_rows(rows, columns))
+
+    methods = (await session.scalars(page)).all()
+    pagination.write_headers(
+        response, methods, await pagination.count(session, statement)
+    )
 
-    return [MethodResponseDto.from_entity(method) for method in methods]
+    return cache.store([MethodResponseDto.from_entity(method) for method in methods])
+
+
+@router.post("/batch")
+async def create_methods(
+    user: Annotated[Principal, Depends(get_user_information)],
+    methods: list[MethodPostDto],
+    session: Annotated[AsyncSession, Depends(get_async_session)],
+) -> list[BatchItemResult[MethodResponseDto]]:
+    check_batch_size(methods)
+    if not methods:
+        return []
+
+    created = (
+        await session.execute(
+            insert(Method).returning(
+                *method_response_columns, sort_by_parameter_order=True
+            ),
+            [method.to_values(user.username) for method in methods],
+        )
+    ).all()
+    await session.execute(bump_version(user.username))
+    await session.commit()
+
+    return [
+        BatchItemResult(
+            index=index,
+            status=status.HTTP_201_CREATED,
+            item=MethodResponseDto.from_row(row),
+        )
+        for index, row in enumerate(created)
+    ]
 
 
 @router.get("/{method_id}")
-def get_method(
-    user: Annotated[User, Depends(get_user_information)],
+async def get_method(
+    user: Annotated[Principal, Depends(get_user_information)],
     method_id: UUID,
-    session: Annotated[Session, Depends(get_session)],
+    session: Annotated[AsyncSession, Depends(get_async_session)],
+    cache: Annotated[CachedResponse, Depends()],
 ) -> MethodResponseDto:
-    method = session.query(Method).filter(Method.username == user.username, Method.id == method_id).first()
+    cached = cache.lookup()
+    if cached is not None:
+        return cached
+
+    method = await session.scalar(select(Method).where(Method.username == user.username, Method.id == method_id))
     if method is None:
         raise HTTPException(status_code=404)
 
-    return MethodResponseDto.from_entity(method)
+    return cache.store(MethodResponseDto.from_entity(method))
 
 
 @router.post("/", status_code=status.HTTP_201_CREATED)
-def create_method(
-    user: Annotated[User, Depends(get_user_information)],
+async def create_method(
+    user: Annotated[Principal, Depends(get_user_information)],
     method: MethodPostDto,
-    session: Annotated[Session, Depends(get_session)],
+    session: Annotated[AsyncSession, Depends(get_async_session)],
 ) -> MethodResponseDto:
     method_entity = method.to_entity(user.username)
     session.add(method_entity)
-    session.commit()
+    await session.execute(bump_version(user.username))
+    await session.commit()
 
     return MethodResponseDto.from_entity(method_entity)
 
 
 @router.patch("/{method_id}")
-def update_method(
-    user: Annotated[User, Depends(get_user_information)],
+async def update_method(
+    user: Annotated[Principal, Depends(get_user_information)],
     method_id: UUID,
     method: MethodPatchDto,
-    session: Annotated[Session, Depends(get_session)],
+    session: Annotated[AsyncSession, Depends(get_async_session)],
 ) -> MethodResponseDto:
-    current_method = session.query(Method).filter(Method.username == user.username, Method.id == method_id).first()
-    if current_method is None:
-        raise HTTPException(status_code=404)
+    criteria = (Method.username == user.username, Method.id == method_id)
 
-    method.patch_entity(current_method)
-    session.merge(current_method)
-    session.commit()
+    values = method.to_values()
+    if values:
+        statement = (
+            update(Method)
+            .where(*criteria)
+            .values(values)
+            .returning(*method_response_columns)
+            .execution_options(synchronize_session=False)
+        )
+    else:
+        statement = select(*method_response_columns).where(*criteria)
+
+    updated = (await session.execute(statement)).one_or_none()
+    if updated is None:
+        raise HTTPException(status_code=404)
+    if values:
+        await session.execute(bump_version(user.username))
+    await session.commit()
 
-    return MethodResponseDto.from_entity(current_method)
+    return MethodResponseDto.from_row(updated)
 
 
 @router.delete("/{method_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_method(
-    user: Annotated[User, Depends(get_user_information)],
+async def delete_method(
+    user: Annotated[Principal, Depends(get_user_information)],
     method_id: UUID,
-    session: Annotated[Session, Depends(get_session)],
+    session: Annotated[AsyncSession, Depends(get_async_session)],
 ) -> None:
-    method = session.query(Method).filter(Method.username == user.username, Method.id == method_id).first()
-    if method is None:
-        raise HTTPException(status_code=404)
+    try:
+        deleted = (
+            await session.execute(
+                delete(Method)
+                .where(Method.username == user.username, Method.id == method_id)
+                .returning(Method.id)
+                .execution_options(synchronize_session=False)
+            )
+        ).one_or_none()
+    except IntegrityError:
+        await session.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="The method still has subscriptions",
+        )
 
-    session.delete(method)
-    session.commit()
+    if deleted is None:
+        raise HTTPException(status_code=404)
+    await session.execute(bump_version(user.username))
+    await session.commit()
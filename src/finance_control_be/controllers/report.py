@@ -0,0 +1,325 @@
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Annotated
+from uuid import UUID
+from fastapi import APIRouter, Depends, Query
+from pydantic import BaseModel
+from sqlalchemy import distinct, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from finance_control_be.dependencies.currency import (
+    ConversionTarget,
+    get_conversion_target,
+)
+from finance_control_be.dependencies.db_session import get_async_session
+from finance_control_be.exchange_rates import rate_join_criteria
+from finance_control_be.forecast import ForecastBucket, Schedule, project
+
+from finance_control_be.auth.principal import Principal
+from finance_control_be.dependencies.user_information import get_user_information
+from finance_control_be.models.exchange_rate import ExchangeRate
+from finance_control_be.models.method import Kind, Method
+from finance_control_be.models.recurrence import add_months, next_occurrence
+from finance_control_be.models.spending import UserSpendingSummary
+from finance_control_be.models.subscription import Subscription
+
+router = APIRouter(prefix="/reports", tags=["report"])
+
+
+class UpcomingPaymentDto(BaseModel):
+    """The next payment of one of the user's active subscriptions."""
+
+    subscription_id: UUID
+    method_id: UUID
+    name: str
+
+    price: Decimal
+    currency: str
+
+    last_purchased_at: date
+    next_date_of_payment: date
+
+
+class SpendingSummaryDto(BaseModel):
+    """The spending of the subscriptions of a method sharing a currency and
+    active status, normalized to a month and a year."""
+
+    method_id: UUID
+    method_name: str
+    kind: Kind
+
+    currency: str
+    is_active: bool
+
+    subscription_count: int
+    monthly_cost: Decimal
+    yearly_cost: Decimal
+
+    # in the requested currency; null without exchange rates.
+    converted_monthly_cost: Decimal | None
+    converted_yearly_cost: Decimal | None
+
+
+class MethodSpendingDto(BaseModel):
+    """The spending of the subscriptions of a method sharing a currency, as
+    maintained in the spending summary; costs cover active subscriptions."""
+
+    method_id: UUID
+    method_name: str
+    kind: Kind
+
+    currency: str
+
+    subscription_count: int
+    active_count: int
+    monthly_cost: Decimal
+    yearly_cost: Decimal
+
+    # in the requested currency; null without exchange rates.
+    converted_monthly_cost: Decimal | None
+    converted_yearly_cost: Decimal | None
+
+
+class SpendingTotalDto(BaseModel):
+    """The spending of all active subscriptions of the user, converted into
+    a single currency."""
+
+    currency: str
+    monthly_cost: Decimal
+    yearly_cost: Decimal
+
+    # currencies without an exchange rate, left out of the totals.
+    unconverted_currencies: list[str]
+
+
+class ForecastEntryDto(BaseModel):
+    """The payments due in a day or a month, in one currency."""
+
+    start: date
+    currency: str
+
+    amount: Decimal
+    payment_count: int
+
+
+@router.get(
+    "/next-payment-dates",
+    description="Get the estimated date of the next payment of every active subscription, soonest first.",
+)
+async def list_next_payment_dates(
+    user: Annotated[Principal, Depends(get_user_information)],
+    session: Annotated[AsyncSession, Depends(get_async_session)],
+) -> list[UpcomingPaymentDto]:
+    rows = (
+        await session.execute(
+            select(
+                Subscription.id,
+                Subscription.method_id,
+                Subscription.name,
+                Subscription.price,
+                Subscription.currency,
+                Subscription.period,
+                Subscription.period_unit,
+                Subscription.purchased_at,
+            )
+            .join(Method, Subscription.method_id == Method.id)
+            .where(Method.username == user.username, Subscription.is_active.is_(True))
+        )
+    ).all()
+
+    today = datetime.now().date()
+    payments = [
+        UpcomingPaymentDto(
+            subscription_id=row.id,
+            method_id=row.method_id,
+            name=row.name,
+            price=row.price,
+            currency=row.currency,
+            last_purchased_at=row.purchased_at,
+            next_date_of_payment=next_occurrence(
+                row.purchased_at, row.period, row.period_unit, after=today
+            ),
+        )
+        for row in rows
+    ]
+    payments.sort(key=lambda payment: payment.next_date_of_payment)
+
+    return payments
+
+
+@router.get(
+    "/spending",
+    description="Get the monthly and yearly spending per method, currency and active status.",
+)
+async def get_spending_summary(
+    user: Annotated[Principal, Depends(get_user_information)],
+    session: Annotated[AsyncSession, Depends(get_async_session)],
+    target: Annotated[ConversionTarget, Depends(get_conversion_target)],
+) -> list[SpendingSummaryDto]:
+    yearly_cost = func.sum(Subscription.yearly_price)
+    rows = await session.execute(
+        select(
+            Method.id.label("method_id"),
+            Method.name.label("method_name"),
+            Method.kind,
+            Subscription.currency,
+            Subscription.is_active,
+            func.count().label("subscription_count"),
+            func.round(yearly_cost / 12, 2).label("monthly_cost"),
+            func.round(yearly_cost, 2).label("yearly_cost"),
+            target.convert(yearly_cost / 12, Subscription.currency).label(
+                "converted_monthly_cost"
+            ),
+            target.convert(yearly_cost, Subscription.currency).label(
+                "converted_yearly_cost"
+            ),
+        )
+        .join(Method, Subscription.method_id == Method.id)
+        .outerjoin(ExchangeRate, rate_join_criteria(Subscription.currency))
+        .where(Method.username == user.username)
+        .group_by(
+            Method.id,
+            Method.name,
+            Method.kind,
+            Subscription.currency,
+            Subscription.is_active,
+            ExchangeRate.rate,
+        )
+        .order_by(Method.name, Method.id, Subscription.currency, Subscription.is_active)
+    )
+
+    return [SpendingSummaryDto.model_validate(row._mapping) for row in rows]
+
+
+@router.get(
+    "/spending/summary",
+    description="Get the maintained monthly and yearly spending per method and currency.",
+)
+async def get_maintained_spending_summary(
+    user: Annotated[Principal, Depends(get_user_information)],
+    session: Annotated[AsyncSession, Depends(get_async_session)],
+    target: Annotated[ConversionTarget, Depends(get_conversion_target)],
+) -> list[MethodSpendingDto]:
+    # one row per method and currency of the user, read by the primary key
+    # of the summary instead of aggregating the subscriptions.
+    rows = await session.execute(
+        select(
+            Method.id.label("method_id"),
+            Method.name.label("method_name"),
+            Method.kind,
+            UserSpendingSummary.currency,
+            UserSpendingSummary.subscription_count,
+            UserSpendingSummary.active_count,
+            func.round(UserSpendingSummary.yearly_cost / 12, 2).label("monthly_cost"),
+            func.round(UserSpendingSummary.yearly_cost, 2).label("yearly_cost"),
+            target.convert(
+                UserSpendingSummary.yearly_cost / 12, UserSpendingSummary.currency
+            ).label("converted_monthly_cost"),
+            target.convert(
+                UserSpendingSummary.yearly_cost, UserSpendingSummary.currency
+            ).label("converted_yearly_cost"),
+        )
+        .join(Method, UserSpendingSummary.method_id == Method.id)
+        .outerjoin(ExchangeRate, rate_join_criteria(UserSpendingSummary.currency))
+        .where(
+            UserSpendingSummary.username == user.username,
+            UserSpendingSummary.subscription_count > 0,
+        )
+        .order_by(Method.name, Method.id, UserSpendingSummary.currency)
+    )
+
+    return [MethodSpendingDto.model_validate(row._mapping) for row in rows]
+
+
+@router.get(
+    "/spending/total",
+    description="Get the monthly and yearly spending of all active subscriptions in one currency.",
+)
+async def get_spending_total(
+    user: Annotated[Principal, Depends(get_user_information)],
+    session: Annotated[AsyncSession, Depends(get_async_session)],
+    target: Annotated[ConversionTarget, Depends(get_conversion_target)],
+) -> SpendingTotalDto:
+    # rows without a rate drop out of the sum.
+    converted_yearly_cost = target.converted(
+        UserSpendingSummary.yearly_cost, UserSpendingSummary.currency
+    )
+    yearly_cost = func.coalesce(func.sum(converted_yearly_cost), 0)
+    row = (
+        await session.execute(
+            select(
+                func.round(yearly_cost / 12, 2).label("monthly_cost"),
+                func.round(yearly_cost, 2).label("yearly_cost"),
+                func.array_agg(distinct(UserSpendingSummary.currency))
+                .filter(converted_yearly_cost.is_(None))
+                .label("unconverted_currencies"),
+            )
+            .select_from(UserSpendingSummary)
+            .outerjoin(ExchangeRate, rate_join_criteria(UserSpendingSummary.currency))
+            .where(
+                UserSpendingSummary.username == user.username,
+                UserSpendingSummary.active_count > 0,
+            )
+        )
+    ).one()
+
+    return SpendingTotalDto(
+        currency=target.currency,
+        monthly_cost=row.monthly_cost,
+        yearly_cost=row.yearly_cost,
+        unconverted_currencies=sorted(row.unconverted_currencies or []),
+    )
+
+
+@router.get(
+    "/forecast",
+    description="Get every payment of the active subscriptions over the next months, per day or month and currency.",
+)
+async def get_forecast(
+    user: Annotated[Principal, Depends(get_user_information)],
+    session: Annotated[AsyncSession, Depends(get_async_session)],
+    months: Annotated[int, Query(ge=1, le=60)] = 12,
+    bucket: ForecastBucket = ForecastBucket.month,
+) -> list[ForecastEntryDto]:
+    rows = await session.execute(
+        select(
+            Subscription.purchased_at,
+            Subscription.period,
+            Subscription.period_unit,
+            Subscription.currency,
+            func.sum(Subscription.price).label("amount"),
+            func.count().label("count"),
+        )
+        .join(Method, Subscription.method_id == Method.id)
+        .where(Method.username == user.username, Subscription.is_active.is_(True))
+        .group_by(
+            Subscription.purchased_at,
+            Subscription.period,
+            Subscription.period_unit,
+            Subscription.currency,
+        )
+    )
+    schedules = [
+        Schedule(
+            anchor=row.purchased_at,
+            period=row.period,
+            period_unit=row.period_unit,
+            currency=row.currency,
+            amount=row.amount,
+            count=row.count,
+        )
+        for row in rows
+    ]
+
+    # like the next payment date, payments due today are already made.
+    today = datetime.now().date()
+    entries = project(schedules, today, add_months(today, months), bucket)
+
+    return [
+        ForecastEntryDto(
+            start=entry.start,
+            currency=entry.currency,
+            amount=entry.amount,
+            payment_count=entry.payment_count,
+        )
+        for entry in entries
+    ]
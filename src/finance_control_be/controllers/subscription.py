@@ -1,38 +1,133 @@
 from datetime import date, datetime
 from decimal import Decimal
-from typing import Annotated
-from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status
-from pydantic import BaseModel, ConfigDict
-from sqlalchemy.orm import Session
-from finance_control_be.dependencies.db_session import get_session
+from typing import Annotated, Any, Iterable
+from uuid import UUID, uuid4
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from pydantic import BaseModel, ConfigDict, Field
+from sqlalchemy import (
+    Insert,
+    Row,
+    Select,
+    bindparam,
+    cast,
+    column,
+    delete,
+    func,
+    insert,
+    select,
+    update,
+    values,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+from finance_control_be.batch import BatchItemResult, check_batch_size
+from finance_control_be.dependencies.db_session import get_async_session
+from finance_control_be.dependencies.fields import FieldsParameter, project_rows
 from finance_control_be.dependencies.pagination import PaginationParameter
+from finance_control_be.dependencies.response_cache import CachedResponse
 
+from finance_control_be.auth.principal import Principal
 from finance_control_be.dependencies.user_information import get_user_information
 from finance_control_be.models.method import Method
+from finance_control_be.models.recurrence import next_occurrence
+from finance_control_be.models.search import search_condition, search_document
 from finance_control_be.models.subscription import PeriodUnit, Subscription
-from finance_control_be.models.user import User
+from finance_control_be.reminders import (
+    SCHEDULE_COLUMNS,
+    reschedule_statements,
+    schedule_columns,
+)
+from finance_control_be.spending import COST_COLUMNS, SpendingDelta, cost_columns
+from finance_control_be.versioning import bump_version
 
 
-def verify_method_access(
+async def verify_method_access(
     method_id: UUID,
-    user: Annotated[User, Depends(get_user_information)],
-    session: Annotated[Session, Depends(get_session)],
+    user: Annotated[Principal, Depends(get_user_information)],
+    session: Annotated[AsyncSession, Depends(get_async_session)],
 ):
     # verify if the user has access to the method
-    method = (
-        session.query(Method)
-        .filter(Method.username == user.username, Method.id == method_id)
-        .count()
+    method = await session.scalar(
+        select(func.count())
+        .select_from(Method)
+        .where(Method.username == user.username, Method.id == method_id)
     )
     if method == 0:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+
+
+def select_owned_subscriptions(method_id: UUID, user: Principal) -> Select:
+    """Select the subscriptions of the method, provided that the user owns it.
+
+    Joining back to the method scopes the lookup to its owner in the same
+    round trip as the lookup itself."""
+    return (
+        select(Subscription)
+        .join(Method, Subscription.method_id == Method.id)
+        .where(Subscription.method_id == method_id, Method.username == user.username)
+    )
+
+
+def owned_subscription_criteria(method_id: UUID, user: Principal) -> tuple:
+    """WHERE criteria limiting an UPDATE or DELETE to the subscriptions of
+    the method, provided that the user owns it."""
+    return (
+        Subscription.method_id == method_id,
+        Subscription.method_id.in_(
+            select(Method.id).where(
+                Method.id == method_id, Method.username == user.username
+            )
+        ),
+    )
+
+
+def insert_owned_subscriptions(
+    method_id: UUID, user: Principal, rows: list[dict[str, Any]]
+) -> Insert:
+    """INSERT the rows, which all have the same keys, into the method,
+    provided that the user owns it; for a method the user does not own,
+    nothing is inserted and nothing returned.
+
+    The rows are selected from a VALUES list guarded by the ownership
+    check, so that the check is part of the write rather than a round trip
+    of its own."""
+    table = Subscription.__table__
+    names = [name for name in rows[0] if name != "method_id"]
+    new = values(
+        *(column(name, table.c[name].type) for name in names), name="new"
+    ).data([tuple(row[name] for name in names) for row in rows])
+    owned = (
+        select(Method.id)
+        .where(Method.id == method_id, Method.username == user.username)
+        .exists()
+    )
+
+    return insert(Subscription).from_select(
+        [*names, "method_id"],
+        select(
+            *(cast(new.c[name], table.c[name].type) for name in names),
+            cast(method_id, table.c.method_id.type),
+        ).where(owned),
+    )
+
+
+async def apply_spending_delta(session: AsyncSession, delta: SpendingDelta) -> None:
+    """Update the spending summary in the transaction of the changes."""
+    statement = delta.statement()
+    if statement is not None:
+        await session.execute(statement)
+
+
+async def reschedule_reminders(session: AsyncSession, rows: Iterable[Row]) -> None:
+    """Update the reminder due dates of subscriptions, given rows with
+    their ``schedule_columns``."""
+    today = datetime.now().date()
+    for statement in reschedule_statements((row._mapping for row in rows), today):
+        await session.execute(statement)
 
 
 router = APIRouter(
     prefix="/methods/{method_id}/subscriptions",
     tags=["subscription"],
-    dependencies=[Depends(verify_method_access)],
 )
 
 
@@ -64,17 +159,41 @@ class SubscriptionResponseDto(BaseModel):
             is_active=subscription.is_active,
         )
 
+    @classmethod
+    def from_row(cls, row: Row) -> "SubscriptionResponseDto":
+        return cls.model_validate(row._mapping)
+
+
+# the columns SubscriptionResponseDto.from_row expects.
+subscription_response_columns = (
+    Subscription.id,
+    Subscription.name,
+    Subscription.description,
+    Subscription.price,
+    Subscription.currency,
+    Subscription.period,
+    Subscription.period_unit,
+    Subscription.purchased_at,
+    Subscription.is_active,
+)
+
+
+# the lengths of the string columns of subscriptions.
+NAME_MAX_LENGTH = 256
+DESCRIPTION_MAX_LENGTH = 256
+CURRENCY_MAX_LENGTH = 8
+
 
 class SubscriptionPostDto(BaseModel):
-    name: str
-    description: str | None = None
+    name: str = Field(max_length=NAME_MAX_LENGTH)
+    description: str | None = Field(default=None, max_length=DESCRIPTION_MAX_LENGTH)
 
     price: Decimal
-    currency: str
+    currency: str = Field(max_length=CURRENCY_MAX_LENGTH)
 
-    period: int
+    period: int = Field(gt=0)
     period_unit: PeriodUnit
-    purchased_at: date = datetime.now().date()
+    purchased_at: date = Field(default_factory=lambda: datetime.now().date())
 
     is_active: bool | None = None
 
@@ -91,29 +210,39 @@ class SubscriptionPostDto(BaseModel):
             method_id=method_id,
         )
 
+    def to_values(self, method_id: UUID) -> dict[str, Any]:
+        # every row gets the same keys, so that a batch is a single
+        # multi-row INSERT.
+        return {
+            **self.model_dump(),
+            "is_active": self.is_active if self.is_active is not None else True,
+            "method_id": method_id,
+        }
+
 
 class SubscriptionPatchDto(BaseModel):
-    name: str | None = None
-    description: str | None = None
+    name: str | None = Field(default=None, max_length=NAME_MAX_LENGTH)
+    description: str | None = Field(default=None, max_length=DESCRIPTION_MAX_LENGTH)
 
     price: Decimal | None = None
-    currency: str | None = None
+    currency: str | None = Field(default=None, max_length=CURRENCY_MAX_LENGTH)
 
-    period: int | None = None
+    period: int | None = Field(default=None, gt=0)
     period_unit: PeriodUnit | None = None
     purchased_at: date | None = None
 
     is_active: bool | None = None
 
-    def patch_entity(self, subscription: Subscription):
-        subscription.name = self.name or subscription.name
-        subscription.description = self.description or subscription.description
-        subscription.price = self.price or subscription.price
-        subscription.currency = self.currency or subscription.currency
-        subscription.period = self.period or subscription.period
-        subscription.period_unit = self.period_unit or subscription.period_unit
-        subscription.purchased_at = self.purchased_at or subscription.purchased_at
-        subscription.is_active = self.is_active or subscription.is_active
+    def to_values(self) -> dict[str, Any]:
+        """The columns to update; fields left out or null keep their value."""
+        return self.model_dump(exclude_none=True)
+
+
+class SubscriptionBatchPatchDto(SubscriptionPatchDto):
+    id: UUID
+
+    def to_values(self) -> dict[str, Any]:
+        return self.model_dump(exclude_none=True, exclude={"id"})
 
 
 class SubscriptionNextPaidDate(BaseModel):
@@ -125,114 +254,437 @@ class SubscriptionNextPaidDate(BaseModel):
     next_date_of_payment: date
 
 
+# the fields a list can be projected to.
+subscription_fields = {column.key: column for column in subscription_response_columns}
+
+# the columns list_subscriptions can sort by, each backed by an index.
+subscription_sort_columns = {
+    "name": Subscription.name,
+    "price": Subscription.price,
+    "purchased_at": Subscription.purchased_at,
+}
+
+
+class SubscriptionFilterParameter(BaseModel):
+    """Filters of the subscription list; bounds are inclusive, and ``q``
+    searches names and descriptions."""
+
+    is_active: bool | None = None
+    currency: str | None = None
+    min_price: Decimal | None = None
+    max_price: Decimal | None = None
+    purchased_from: date | None = None
+    purchased_to: date | None = None
+    q: str | None = None
+
+    def apply(self, statement: Select) -> Select:
+        if self.is_active is not None:
+            statement = statement.where(Subscription.is_active.is_(self.is_active))
+        if self.currency is not None:
+            statement = statement.where(Subscription.currency == self.currency)
+        if self.min_price is not None:
+            statement = statement.where(Subscription.price >= self.min_price)
+        if self.max_price is not None:
+            statement = statement.where(Subscription.price <= self.max_price)
+        if self.purchased_from is not None:
+            statement = statement.where(
+                Subscription.purchased_at >= self.purchased_from
+            )
+        if self.purchased_to is not None:
+            statement = statement.where(Subscription.purchased_at <= self.purchased_to)
+        if self.q is not None:
+            condition = search_condition(
+                search_document(Subscription.name, Subscription.description), self.q
+            )
+            if condition is not None:
+                statement = statement.where(condition)
+
+        return statement
+
+
 @router.get("/")
-def list_subscriptions(
+async def list_subscriptions(
     method_id: UUID,
+    user: Annotated[Principal, Depends(get_user_information)],
     pagination: Annotated[PaginationParameter, Depends()],
-    session: Annotated[Session, Depends(get_session)],
+    filters: Annotated[SubscriptionFilterParameter, Depends()],
+    fields: Annotated[FieldsParameter, Depends()],
+    session: Annotated[AsyncSession, Depends(get_async_session)],
+    cache: Annotated[CachedResponse, Depends()],
+    response: Response,
 ) -> list[SubscriptionResponseDto]:
-    subscriptions = (
-        session.query(Subscription)
-        .filter(Subscription.method_id == method_id)
-        .offset(pagination.offset)
-        .limit(pagination.limit)
-        .all()
+    cached = cache.lookup()
+    if cached is not None:
+        return cached
+
+    statement = filters.apply(select_owned_subscriptions(method_id, user))
+    page = pagination.apply(statement, Subscription.id, subscription_sort_columns)
+
+    columns = fields.columns(subscription_fields)
+    if columns is not None:
+        rows = (
+            await session.execute(
+                page.with_only_columns(
+                    *dict.fromkeys([*columns, *pagination.cursor_columns()])
+                )
+            )
+        ).all()
+        if not rows:
+            await verify_method_access(method_id, user, session)
+
+        pagination.write_headers(
+            response, rows, await pagination.count(session, statement)
+        )
+        return cache.store(project_rows(rows, columns))
+
+    subscriptions = (await session.scalars(page)).all()
+    if not subscriptions:
+        # tell an empty page apart from a method the user does not own.
+        await verify_method_access(method_id, user, session)
+
+    pagination.write_headers(
+        response, subscriptions, await pagination.count(session, statement)
     )
 
-    return [
-        SubscriptionResponseDto.from_entity(subscription)
+    return cache.store(
+        [
+            SubscriptionResponseDto.from_entity(subscription)
+            for subscription in subscriptions
+        ]
+    )
+
+
+@router.post("/batch")
+async def create_subscriptions(
+    method_id: UUID,
+    user: Annotated[Principal, Depends(get_user_information)],
+    subscriptions: list[SubscriptionPostDto],
+    session: Annotated[AsyncSession, Depends(get_async_session)],
+) -> list[BatchItemResult[SubscriptionResponseDto]]:
+    check_batch_size(subscriptions)
+    if not subscriptions:
+        await verify_method_access(method_id, user, session)
+        return []
+
+    # ids chosen here give the rows back in the order of the batch.
+    rows = [
+        {"id": uuid4(), **subscription.to_values(method_id)}
         for subscription in subscriptions
     ]
+    returned = {
+        row.id: row
+        for row in await session.execute(
+            insert_owned_subscriptions(method_id, user, rows).returning(
+                *subscription_response_columns
+            )
+        )
+    }
+    if not returned:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    created = [returned[row["id"]] for row in rows]
+
+    delta = SpendingDelta(user.username)
+    for row in created:
+        delta.add(method_id, row._mapping)
+    await apply_spending_delta(session, delta)
+    await reschedule_reminders(session, created)
+    await session.execute(bump_version(user.username))
+    await session.commit()
+
+    return [
+        BatchItemResult(
+            index=index,
+            status=status.HTTP_201_CREATED,
+            item=SubscriptionResponseDto.from_row(row),
+        )
+        for index, row in enumerate(created)
+    ]
+
+
+@router.patch("/batch")
+async def update_subscriptions(
+    method_id: UUID,
+    user: Annotated[Principal, Depends(get_user_information)],
+    subscriptions: list[SubscriptionBatchPatchDto],
+    session: Annotated[AsyncSession, Depends(get_async_session)],
+) -> list[BatchItemResult[SubscriptionResponseDto]]:
+    check_batch_size(subscriptions)
+    criteria = owned_subscription_criteria(method_id, user)
+
+    # one executemany UPDATE per set of patched columns.
+    patches: dict[frozenset[str], list[dict[str, Any]]] = {}
+    for subscription in subscriptions:
+        values = subscription.to_values()
+        if values:
+            patches.setdefault(frozenset(values), []).append(
+                {"b_id": subscription.id}
+                | {f"b_{column}": value for column, value in values.items()}
+            )
+
+    subscription_ids = [subscription.id for subscription in subscriptions]
+
+    # lock the rows whose cost may change, and remember what it was.
+    previous: dict[UUID, Row] = {}
+    if any(columns & COST_COLUMNS for columns in patches):
+        previous = {
+            row.id: row
+            for row in await session.execute(
+                select(Subscription.id, *cost_columns)
+                .where(*criteria, Subscription.id.in_(subscription_ids))
+                .with_for_update()
+            )
+        }
+
+    table = Subscription.__table__
+    for columns, parameters in patches.items():
+        await session.execute(
+            update(table)
+            .where(table.c.id == bindparam("b_id"), *criteria)
+            .values({column: bindparam(f"b_{column}") for column in columns}),
+            parameters,
+        )
+
+    updated = {
+        row.id: row
+        for row in await session.execute(
+            select(*subscription_response_columns).where(
+                *criteria, Subscription.id.in_(subscription_ids)
+            )
+        )
+    }
+
+    delta = SpendingDelta(user.username)
+    for subscription_id, row in previous.items():
+        delta.remove(method_id, row._mapping)
+        delta.add(method_id, updated[subscription_id]._mapping)
+    await apply_spending_delta(session, delta)
+    if any(columns & SCHEDULE_COLUMNS for columns in patches):
+        await reschedule_reminders(session, updated.values())
+    if patches:
+        await session.execute(bump_version(user.username))
+    await session.commit()
+
+    return [
+        BatchItemResult(
+            index=index,
+            status=status.HTTP_200_OK,
+            item=SubscriptionResponseDto.from_row(updated[subscription.id]),
+        )
+        if subscription.id in updated
+        else BatchItemResult(
+            index=index, status=status.HTTP_404_NOT_FOUND, detail="Not Found"
+        )
+        for index, subscription in enumerate(subscriptions)
+    ]
+
+
+@router.post("/batch/delete")
+async def delete_subscriptions(
+    method_id: UUID,
+    user: Annotated[Principal, Depends(get_user_information)],
+    subscription_ids: list[UUID],
+    session: Annotated[AsyncSession, Depends(get_async_session)],
+) -> list[BatchItemResult[UUID]]:
+    check_batch_size(subscription_ids)
+    if not subscription_ids:
+        return []
+
+    deleted_rows = (
+        await session.execute(
+            delete(Subscription)
+            .where(
+                *owned_subscription_criteria(method_id, user),
+                Subscription.id.in_(subscription_ids),
+            )
+            .returning(Subscription.id, *cost_columns)
+            .execution_options(synchronize_session=False)
+        )
+    ).all()
+
+    delta = SpendingDelta(user.username)
+    for row in deleted_rows:
+        delta.remove(method_id, row._mapping)
+    await apply_spending_delta(session, delta)
+    if deleted_rows:
+        await session.execute(bump_version(user.username))
+    await session.commit()
+
+    deleted = {row.id for row in deleted_rows}
+
+    return [
+        BatchItemResult(
+            index=index, status=status.HTTP_204_NO_CONTENT, item=subscription_id
+        )
+        if subscription_id in deleted
+        else BatchItemResult(
+            index=index, status=status.HTTP_404_NOT_FOUND, detail="Not Found"
+        )
+        for index, subscription_id in enumerate(subscription_ids)
+    ]
 
 
 @router.get("/{subscription_id}")
-def get_subscription(
+async def get_subscription(
+    method_id: UUID,
     subscription_id: UUID,
-    session: Annotated[Session, Depends(get_session)],
+    user: Annotated[Principal, Depends(get_user_information)],
+    session: Annotated[AsyncSession, Depends(get_async_session)],
+    cache: Annotated[CachedResponse, Depends()],
 ) -> SubscriptionResponseDto:
-    subscription = (
-        session.query(Subscription).filter(Subscription.id == subscription_id).first()
+    cached = cache.lookup()
+    if cached is not None:
+        return cached
+
+    subscription = await session.scalar(
+        select_owned_subscriptions(method_id, user).where(
+            Subscription.id == subscription_id
+        )
     )
 
     if subscription is None:
         raise HTTPException(status_code=404)
 
-    return SubscriptionResponseDto.from_entity(subscription)
+    return cache.store(SubscriptionResponseDto.from_entity(subscription))
 
 
 @router.post("/", status_code=status.HTTP_201_CREATED)
-def create_subscription(
+async def create_subscription(
     method_id: UUID,
+    user: Annotated[Principal, Depends(get_user_information)],
     subscription: SubscriptionPostDto,
-    session: Annotated[Session, Depends(get_session)],
+    session: Annotated[AsyncSession, Depends(get_async_session)],
 ) -> SubscriptionResponseDto:
-    subscription_entity = subscription.to_entity(method_id=method_id)
-    session.add(subscription_entity)
-    session.commit()
+    created = (
+        await session.execute(
+            insert_owned_subscriptions(
+                method_id, user, [{"id": uuid4(), **subscription.to_values(method_id)}]
+            ).returning(*subscription_response_columns)
+        )
+    ).one_or_none()
+    if created is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+
+    delta = SpendingDelta(user.username)
+    delta.add(method_id, created._mapping)
+    await apply_spending_delta(session, delta)
+    await reschedule_reminders(session, [created])
+    await session.execute(bump_version(user.username))
+    await session.commit()
 
-    return SubscriptionResponseDto.from_entity(subscription_entity)
+    return SubscriptionResponseDto.from_row(created)
 
 
 @router.patch("/{subscription_id}")
-def update_subscription(
+async def update_subscription(
+    method_id: UUID,
     subscription_id: UUID,
+    user: Annotated[Principal, Depends(get_user_information)],
     subscription: SubscriptionPatchDto,
-    session: Annotated[Session, Depends(get_session)],
+    session: Annotated[AsyncSession, Depends(get_async_session)],
 ) -> SubscriptionResponseDto:
-    current_subscription = (
-        session.query(Subscription).filter(Subscription.id == subscription_id).first()
+    criteria = (
+        *owned_subscription_criteria(method_id, user),
+        Subscription.id == subscription_id,
     )
-    if current_subscription is None:
+
+    values = subscription.to_values()
+
+    # lock the row if its cost may change, and remember what it was.
+    previous = None
+    if values.keys() & COST_COLUMNS:
+        previous = (
+            await session.execute(
+                select(*cost_columns).where(*criteria).with_for_update()
+            )
+        ).one_or_none()
+        if previous is None:
+            raise HTTPException(status_code=404)
+
+    if values:
+        statement = (
+            update(Subscription)
+            .where(*criteria)
+            .values(values)
+            .returning(*subscription_response_columns)
+            .execution_options(synchronize_session=False)
+        )
+    else:
+        statement = select(*subscription_response_columns).where(*criteria)
+
+    updated = (await session.execute(statement)).one_or_none()
+    if updated is None:
         raise HTTPException(status_code=404)
 
-    subscription.patch_entity(current_subscription)
-    session.merge(current_subscription)
-    session.commit()
+    if previous is not None:
+        delta = SpendingDelta(user.username)
+        delta.remove(method_id, previous._mapping)
+        delta.add(method_id, updated._mapping)
+        await apply_spending_delta(session, delta)
+    if values.keys() & SCHEDULE_COLUMNS:
+        await reschedule_reminders(session, [updated])
+    if values:
+        await session.execute(bump_version(user.username))
+    await session.commit()
 
-    return SubscriptionResponseDto.from_entity(current_subscription)
+    return SubscriptionResponseDto.from_row(updated)
 
 
 @router.delete("/{subscription_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_subscription(
+async def delete_subscription(
+    method_id: UUID,
     subscription_id: UUID,
-    session: Annotated[Session, Depends(get_session)],
+    user: Annotated[Principal, Depends(get_user_information)],
+    session: Annotated[AsyncSession, Depends(get_async_session)],
 ) -> None:
-    subscription = (
-        session.query(Subscription).filter(Subscription.id == subscription_id).first()
-    )
-    if subscription is None:
+    deleted = (
+        await session.execute(
+            delete(Subscription)
+            .where(
+                *owned_subscription_criteria(method_id, user),
+                Subscription.id == subscription_id,
+            )
+            .returning(*cost_columns)
+            .execution_options(synchronize_session=False)
+        )
+    ).one_or_none()
+    if deleted is None:
         raise HTTPException(status_code=404)
 
-    session.delete(subscription)
-    session.commit()
+    delta = SpendingDelta(user.username)
+    delta.remove(method_id, deleted._mapping)
+    await apply_spending_delta(session, delta)
+    await session.execute(bump_version(user.username))
+    await session.commit()
 
 
 @router.get(
     "/{subscription_id}/next-payment-date",
     description="Get the estimated date of the next payment.",
 )
-def get_estimated_next_paid_date(
+async def get_estimated_next_paid_date(
+    method_id: UUID,
     subscription_id: UUID,
-    session: Annotated[Session, Depends(get_session)],
+    user: Annotated[Principal, Depends(get_user_information)],
+    session: Annotated[AsyncSession, Depends(get_async_session)],
 ) -> SubscriptionNextPaidDate:
-    subscription = (
-        session.query(Subscription).filter(Subscription.id == subscription_id).first()
+    subscription = await session.scalar(
+        select_owned_subscriptions(method_id, user).where(
+            Subscription.id == subscription_id
+        )
     )
     if subscription is None:
         raise HTTPException(status_code=404)
 
     today = datetime.now().date()
-    td = subscription.period_to_timedelta()
-
-    # calculate the next date of payment
-    # FIXME: performance?
-    next_date_of_payment = subscription.purchased_at
-    while next_date_of_payment <= today:
-        next_date_of_payment += td
 
     return SubscriptionNextPaidDate(
         last_purchased_at=subscription.purchased_at,
-        next_date_of_payment=next_date_of_payment,
+        next_date_of_payment=next_occurrence(
+            subscription.purchased_at,
+            subscription.period,
+            subscription.period_unit,
+            after=today,
+        ),
     )
 
 
@@ -240,16 +692,28 @@ def get_estimated_next_paid_date(
     "/{subscription_id}/mark-purchased",
     status_code=status.HTTP_204_NO_CONTENT,
 )
-def mark_subscription_as_purchased(
+async def mark_subscription_as_purchased(
+    method_id: UUID,
     subscription_id: UUID,
-    session: Annotated[Session, Depends(get_session)],
+    user: Annotated[Principal, Depends(get_user_information)],
+    session: Annotated[AsyncSession, Depends(get_async_session)],
 ) -> None:
-    subscription = (
-        session.query(Subscription).filter(Subscription.id == subscription_id).first()
-    )
-    if subscription is None:
+    # the purchase date does not enter the spending summary.
+    marked = (
+        await session.execute(
+            update(Subscription)
+            .where(
+                *owned_subscription_criteria(method_id, user),
+                Subscription.id == subscription_id,
+            )
+            .values(purchased_at=datetime.now().date())
+            .returning(*schedule_columns)
+            .execution_options(synchronize_session=False)
+        )
+    ).one_or_none()
+    if marked is None:
         raise HTTPException(status_code=404)
 
-    subscription.purchased_at = datetime.now().date()
-    session.merge(subscription)
-    session.commit()
+    await reschedule_reminders(session, [marked])
+    await session.execute(bump_version(user.username))
+    await session.commit()
@@ -0,0 +1,36 @@
+from typing import Annotated
+from uuid import UUID
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, status
+from starlette.concurrency import run_in_threadpool
+
+from finance_control_be.auth.principal import Principal
+from finance_control_be.dependencies.user_information import get_user_information
+from finance_control_be.importer import (
+    MethodNotFoundException,
+    SubscriptionImportReport,
+    import_subscriptions_file,
+)
+
+router = APIRouter(
+    prefix="/methods/{method_id}/subscriptions",
+    tags=["subscription"],
+)
+
+
+@router.post(
+    "/import",
+    description="Import subscriptions from a CSV file whose columns are the fields of a new subscription.",
+)
+async def import_subscriptions(
+    method_id: UUID,
+    user: Annotated[Principal, Depends(get_user_information)],
+    file: UploadFile,
+) -> SubscriptionImportReport:
+    # COPY needs the synchronous driver; the importer checks the owner in
+    # the lookup of the method it does anyway.
+    try:
+        return await run_in_threadpool(
+            import_subscriptions_file, method_id, file.file, user.username
+        )
+    except MethodNotFoundException:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
@@ -2,8 +2,8 @@ from typing import Annotated
 from fastapi import APIRouter, Depends
 from pydantic import BaseModel
 
+from finance_control_be.auth.principal import Principal
 from finance_control_be.dependencies.user_information import get_user_information
-from finance_control_be.models.user import User
 
 router = APIRouter(prefix="/users", tags=["user"])
 
@@ -15,8 +15,8 @@ class UserInformationResponseDto(BaseModel):
 
 
 @router.get("/me")
-def user_info(
-    user_information: Annotated[User, Depends(get_user_information)]
+async def user_info(
+    user_information: Annotated[Principal, Depends(get_user_information)]
 ) -> UserInformationResponseDto:
     return UserInformationResponseDto(
         username=user_information.username,
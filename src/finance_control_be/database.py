@@ -1,7 +1,35 @@
+import asyncio
+import itertools
 import os
+from uuid import uuid4
+from typing import Any, AsyncIterator, Awaitable, Callable, TypeVar
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from loguru import logger
+from sqlalchemy import (
+    Engine,
+    Result,
+    Row,
+    Select,
+    create_engine,
+    event,
+    make_url,
+    select,
+)
+from sqlalchemy.exc import DBAPIError, IntegrityError
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+from starlette.concurrency import run_in_threadpool
+
+from finance_control_be.cache import TTLCache
+from finance_control_be.const import READ_YOUR_WRITES_SECONDS
+from finance_control_be.pool import (
+    InstrumentedAsyncQueuePool,
+    InstrumentedNullPool,
+    InstrumentedQueuePool,
+    register_engine,
+)
+
+T = TypeVar("T")
 
 DATABASE_URI = os.environ.get("FC_DATABASE_URI")
 if not DATABASE_URI:
@@ -9,6 +37,334 @@ if not DATABASE_URI:
         "FC_DATABASE_URI environment variable not set. It must be a valid SQLAlchemy connection string."
     )
 
+# FC_DATABASE_ASYNC=0 runs the controllers on the synchronous driver in the
+# thread pool instead, e.g. to compare both paths under load.
+DATABASE_ASYNC = os.environ.get("FC_DATABASE_ASYNC", "1") == "1"
+
+
+def _to_async_uri(uri: str) -> str:
+    url = make_url(uri)
+    if url.drivername in ("postgresql", "postgresql+psycopg2"):
+        url = url.set(drivername="postgresql+asyncpg")
+
+    return url.render_as_string(hide_password=False)
+
+
+ASYNC_DATABASE_URI = os.environ.get("FC_ASYNC_DATABASE_URI") or _to_async_uri(
+    DATABASE_URI
+)
+
+# comma-separated connection strings of read replicas of FC_DATABASE_URI.
+DATABASE_REPLICA_URIS = [
+    uri.strip()
+    for uri in os.environ.get("FC_DATABASE_REPLICA_URIS", "").split(",")
+    if uri.strip()
+]
+
+# the pool of each engine: FC_DATABASE_POOL_SIZE connections kept open, up to
+# FC_DATABASE_MAX_OVERFLOW more under load, and FC_DATABASE_POOL_TIMEOUT
+# seconds to wait for one beyond that. Connections older than
+# FC_DATABASE_POOL_RECYCLE seconds are replaced (-1 keeps them), and
+# FC_DATABASE_POOL_PRE_PING=1 checks each one as it is checked out.
+DATABASE_POOL_SIZE = int(os.environ.get("FC_DATABASE_POOL_SIZE", 5))
+DATABASE_MAX_OVERFLOW = int(os.environ.get("FC_DATABASE_MAX_OVERFLOW", 10))
+DATABASE_POOL_TIMEOUT = float(os.environ.get("FC_DATABASE_POOL_TIMEOUT", 30))
+DATABASE_POOL_RECYCLE = int(os.environ.get("FC_DATABASE_POOL_RECYCLE", 3600))
+DATABASE_POOL_PRE_PING = os.environ.get("FC_DATABASE_POOL_PRE_PING") == "1"
+# FC_DATABASE_PGBOUNCER=1 leaves the pooling to a PgBouncer in transaction
+# pooling mode, in front of FC_DATABASE_URI and the replicas.
+DATABASE_PGBOUNCER = os.environ.get("FC_DATABASE_PGBOUNCER") == "1"
+
+UNIQUE_VIOLATION = "23505"
+
 
-engine = create_engine(DATABASE_URI)
+def _engine_options(asynchronous: bool) -> dict[str, Any]:
+    """The pool arguments of create_engine or create_async_engine."""
+    if DATABASE_PGBOUNCER:
+        options: dict[str, Any] = {"poolclass": InstrumentedNullPool}
+        if asynchronous:
+            # prepared statements do not outlive a transaction behind
+            # PgBouncer: asyncpg must neither cache them nor reuse a name.
+            options["connect_args"] = {
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+                "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+            }
+        return options
+
+    return {
+        "poolclass": (
+            InstrumentedAsyncQueuePool if asynchronous else InstrumentedQueuePool
+        ),
+        "pool_size": DATABASE_POOL_SIZE,
+        "max_overflow": DATABASE_MAX_OVERFLOW,
+        "pool_timeout": DATABASE_POOL_TIMEOUT,
+        "pool_recycle": DATABASE_POOL_RECYCLE,
+        "pool_pre_ping": DATABASE_POOL_PRE_PING,
+    }
+
+
+engine = create_engine(DATABASE_URI, **_engine_options(asynchronous=False))
+register_engine("primary", engine)
 SessionLocal = sessionmaker(bind=engine)
+
+
+class Replica:
+    def __init__(self, engine: Engine, ping: Callable[[], Awaitable[None]]):
+        # the engine sessions bind to, and a connection check that uses the
+        # driver of the controllers.
+        self.engine = engine
+        self.ping = ping
+        self.healthy = True
+
+    def __str__(self) -> str:
+        return self.engine.url.render_as_string(hide_password=True)
+
+
+class ReplicaSet:
+    """The read replicas, handed out round-robin among the healthy ones."""
+
+    def __init__(self, replicas: list[Replica]):
+        self.replicas = replicas
+        self._turn = itertools.count()
+
+    def choose(self) -> Replica | None:
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+
+        return healthy[next(self._turn) % len(healthy)]
+
+    def mark_down(self, replica: Replica, error: BaseException) -> None:
+        if replica.healthy:
+            logger.warning("replica {} is down: {} {}", replica, type(error), error)
+        replica.healthy = False
+
+    async def check(self, timeout: float) -> None:
+        for replica in self.replicas:
+            try:
+                await asyncio.wait_for(replica.ping(), timeout)
+            except Exception as e:
+                self.mark_down(replica, e)
+                continue
+
+            if not replica.healthy:
+                logger.info("replica {} is back up", replica)
+            replica.healthy = True
+
+    async def check_periodically(self, interval: float) -> None:
+        """Check every replica every ``interval`` seconds, until cancelled."""
+        while True:
+            await asyncio.sleep(interval)
+            await self.check(timeout=interval)
+
+
+def _async_ping(async_engine: AsyncEngine) -> Callable[[], Awaitable[None]]:
+    async def ping() -> None:
+        async with async_engine.connect() as connection:
+            await connection.execute(select(1))
+
+    return ping
+
+
+def _threaded_ping(sync_engine: Engine) -> Callable[[], Awaitable[None]]:
+    def connect() -> None:
+        with sync_engine.connect() as connection:
+            connection.execute(select(1))
+
+    async def ping() -> None:
+        await run_in_threadpool(connect)
+
+    return ping
+
+
+def _create_replica(name: str, uri: str) -> Replica:
+    if DATABASE_ASYNC:
+        async_engine = create_async_engine(
+            _to_async_uri(uri), **_engine_options(asynchronous=True)
+        )
+        replica = Replica(async_engine.sync_engine, _async_ping(async_engine))
+    else:
+        sync_engine = create_engine(uri, **_engine_options(asynchronous=False))
+        replica = Replica(sync_engine, _threaded_ping(sync_engine))
+
+    register_engine(name, replica.engine)
+    return replica
+
+
+replica_set = (
+    ReplicaSet(
+        [
+            _create_replica(f"replica_{index}", uri)
+            for index, uri in enumerate(DATABASE_REPLICA_URIS)
+        ]
+    )
+    if DATABASE_REPLICA_URIS
+    else None
+)
+
+# keys of Session.info the request dependencies fill in for routing.
+READ_ONLY = "read_only"
+USERNAME = "username"
+_REPLICA = "replica"
+_WROTE = "wrote"
+
+# users who committed a write within the last READ_YOUR_WRITES_SECONDS, whose
+# reads stay on the primary until the replicas caught up. Like the principal
+# cache, this is per process: the window holds on the worker that took the
+# write.
+recent_writers: TTLCache[str, bool] = TTLCache(
+    max_size=100_000, ttl=READ_YOUR_WRITES_SECONDS
+)
+
+
+class RoutingSession(Session):
+    """A session that reads from a replica when marked ``READ_ONLY``.
+
+    The first statement decides: a plain SELECT of a read-only session
+    whose user did not write recently pins the session to a replica, which
+    is connected to right away so that one found down falls back to the
+    primary. Anything else, and every later write or locking read, goes to
+    the primary."""
+
+    def get_bind(self, mapper=None, clause=None, **kw) -> Any:
+        if replica_set is not None:
+            # anything but a SELECT may write.
+            if not isinstance(clause, Select):
+                self.info[_WROTE] = True
+            elif clause._for_update_arg is None:
+                if _REPLICA not in self.info:
+                    self.info[_REPLICA] = self._connect_replica()
+                replica = self.info[_REPLICA]
+                if replica is not None:
+                    return replica.engine
+            self.info.setdefault(_REPLICA, None)
+
+        return super().get_bind(mapper, clause=clause, **kw)
+
+    def _connect_replica(self) -> Replica | None:
+        if not self.info.get(READ_ONLY):
+            return None
+        username = self.info.get(USERNAME)
+        if username is not None and recent_writers.get(username):
+            return None
+
+        replica = replica_set.choose()
+        if replica is None:
+            return None
+        try:
+            # connects before any statement ran on the replica.
+            self.connection(bind_arguments={"bind": replica.engine})
+        except (DBAPIError, OSError) as e:
+            replica_set.mark_down(replica, e)
+            return None
+
+        return replica
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _remember_writer(session: Session) -> None:
+    username = session.info.get(USERNAME)
+    if session.info.pop(_WROTE, False) and username is not None:
+        recent_writers.set(username, True)
+
+
+@event.listens_for(RoutingSession, "after_rollback")
+def _forget_write(session: Session) -> None:
+    session.info.pop(_WROTE, None)
+
+
+class ThreadedResult:
+    """The subset of ``AsyncResult`` returned by ``ThreadedSession.stream``."""
+
+    def __init__(self, result: Result):
+        self.result = result
+
+    async def partitions(self, size: int | None = None) -> AsyncIterator[list[Row]]:
+        while rows := await run_in_threadpool(self.result.fetchmany, size):
+            yield rows
+
+
+class ThreadedSession:
+    """The subset of ``AsyncSession`` used by the controllers, implemented
+    on top of a synchronous ``Session`` whose calls run in the thread pool."""
+
+    def __init__(self, sync_session: Session):
+        self.sync_session = sync_session
+
+    @property
+    def info(self) -> dict:
+        return self.sync_session.info
+
+    async def __aenter__(self) -> "ThreadedSession":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    def add(self, instance: object) -> None:
+        self.sync_session.add(instance)
+
+    def add_all(self, instances: list[object]) -> None:
+        self.sync_session.add_all(instances)
+
+    async def run_sync(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        return await run_in_threadpool(fn, self.sync_session, *args, **kwargs)
+
+    async def execute(self, *args: Any, **kwargs: Any) -> Any:
+        return await run_in_threadpool(self.sync_session.execute, *args, **kwargs)
+
+    async def scalar(self, *args: Any, **kwargs: Any) -> Any:
+        return await run_in_threadpool(self.sync_session.scalar, *args, **kwargs)
+
+    async def scalars(self, *args: Any, **kwargs: Any) -> Any:
+        return await run_in_threadpool(self.sync_session.scalars, *args, **kwargs)
+
+    async def stream(self, *args: Any, **kwargs: Any) -> "ThreadedResult":
+        return ThreadedResult(await self.execute(*args, **kwargs))
+
+    async def get(self, *args: Any, **kwargs: Any) -> Any:
+        return await run_in_threadpool(self.sync_session.get, *args, **kwargs)
+
+    async def delete(self, instance: object) -> None:
+        await run_in_threadpool(self.sync_session.delete, instance)
+
+    async def flush(self) -> None:
+        await run_in_threadpool(self.sync_session.flush)
+
+    async def commit(self) -> None:
+        await run_in_threadpool(self.sync_session.commit)
+
+    async def rollback(self) -> None:
+        await run_in_threadpool(self.sync_session.rollback)
+
+    async def close(self) -> None:
+        await run_in_threadpool(self.sync_session.close)
+
+
+# the controllers read entities back after committing, which must not
+# trigger a lazy refresh on the event loop.
+if DATABASE_ASYNC:
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URI, **_engine_options(asynchronous=True)
+    )
+    register_engine("primary_async", async_engine.sync_engine)
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine, sync_session_class=RoutingSession, expire_on_commit=False
+    )
+else:
+    _threaded_session_factory = sessionmaker(
+        bind=engine, class_=RoutingSession, expire_on_commit=False
+    )
+
+    def AsyncSessionLocal() -> ThreadedSession:
+        return ThreadedSession(_threaded_session_factory())
+
+
+def is_unique_violation(error: IntegrityError) -> bool:
+    # psycopg2 exposes the SQLSTATE as `pgcode`; asyncpg's exception is
+    # chained as the cause of SQLAlchemy's adapted one.
+    code = getattr(error.orig, "pgcode", None) or getattr(
+        getattr(error.orig, "__cause__", None), "sqlstate", None
+    )
+    return code == UNIQUE_VIOLATION
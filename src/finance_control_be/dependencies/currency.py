@@ -0,0 +1,62 @@
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Annotated
+
+from fastapi import Depends
+from sqlalchemy import (
+    DECIMAL as SqlDecimal,
+    ColumnElement,
+    case,
+    func,
+    literal,
+    null,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from finance_control_be.const import BASE_CURRENCY
+from finance_control_be.dependencies.db_session import get_async_session
+from finance_control_be.exchange_rates import (
+    get_exchange_rates,
+    normalize_currency,
+    normalized_currency,
+)
+from finance_control_be.models.exchange_rate import ExchangeRate
+
+
+@dataclass(frozen=True)
+class ConversionTarget:
+    """The currency a report converts its amounts into."""
+
+    currency: str
+    # None if there is no rate for the currency.
+    rate: Decimal | None
+
+    def converted(
+        self, amount: ColumnElement, currency: ColumnElement
+    ) -> ColumnElement:
+        """An amount in ``currency`` converted with the rate of its currency,
+        joined from ``ExchangeRate`` by the query; null without a rate for
+        either currency, unless it is already in the target currency."""
+        if self.rate is None:
+            conversion = null()
+        else:
+            conversion = amount * ExchangeRate.rate / literal(self.rate, SqlDecimal())
+
+        # no rate needed, e.g. before any rate is loaded.
+        return case(
+            (normalized_currency(currency) == self.currency, amount),
+            else_=conversion,
+        )
+
+    def convert(self, amount: ColumnElement, currency: ColumnElement) -> ColumnElement:
+        """``converted``, rounded to cents."""
+        return func.round(self.converted(amount, currency), 2)
+
+
+async def get_conversion_target(
+    session: Annotated[AsyncSession, Depends(get_async_session)],
+    currency: str = BASE_CURRENCY,
+) -> ConversionTarget:
+    currency = normalize_currency(currency)
+    rates = await get_exchange_rates(session)
+    return ConversionTarget(currency=currency, rate=rates.get(currency))
@@ -1,9 +1,23 @@
-from typing import Generator
+from typing import AsyncGenerator, Generator
+from fastapi import Request
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from finance_control_be.database import SessionLocal
+from finance_control_be.database import READ_ONLY, AsyncSessionLocal, SessionLocal
 
 
 def get_session() -> Generator[Session, None, None]:
     with SessionLocal() as session:
         yield session
+
+
+async def get_async_session(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """The session used by the controllers.
+
+    With FC_DATABASE_ASYNC=0 this is a ``ThreadedSession`` running the
+    synchronous driver in the thread pool behind the same interface. The
+    sessions of GET requests may read from a replica (see
+    ``database.RoutingSession``)."""
+    async with AsyncSessionLocal() as session:
+        session.info[READ_ONLY] = request.method in ("GET", "HEAD")
+        yield session
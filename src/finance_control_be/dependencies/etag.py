@@ -0,0 +1,48 @@
+import hashlib
+from typing import Annotated
+
+from fastapi import Depends, HTTPException, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from finance_control_be.auth.principal import Principal
+from finance_control_be.dependencies.db_session import get_async_session
+from finance_control_be.dependencies.user_information import get_user_information
+from finance_control_be.models.user_version import UserVersion
+
+
+def make_etag(username: str, version: int, request: Request) -> str:
+    # the same version yields a different representation per user and URL.
+    digest = hashlib.sha256(
+        f"{username}\0{request.url.path}\0{request.url.query}".encode()
+    ).hexdigest()[:16]
+    return f'"{version}-{digest}"'
+
+
+def etag_matches(etag: str, if_none_match: str) -> bool:
+    candidates = {candidate.strip() for candidate in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+async def check_etag(
+    request: Request,
+    response: Response,
+    user: Annotated[Principal, Depends(get_user_information)],
+    session: Annotated[AsyncSession, Depends(get_async_session)],
+) -> str:
+    """Answer a conditional GET from the version of the user alone, with
+    304 if it is unchanged; otherwise set and return the ETag of the
+    response."""
+    version = await session.scalar(
+        select(UserVersion.version).where(UserVersion.username == user.username)
+    )
+    etag = make_etag(user.username, version or 0, request)
+
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match is not None and etag_matches(etag, if_none_match):
+        raise HTTPException(
+            status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+        )
+
+    response.headers["ETag"] = etag
+    return etag
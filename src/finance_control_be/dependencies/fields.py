@@ -0,0 +1,41 @@
+from typing import Any, Mapping, Sequence
+
+from fastapi import HTTPException, status
+from pydantic import BaseModel
+from sqlalchemy import Row
+from sqlalchemy.orm import InstrumentedAttribute
+
+
+class FieldsParameter(BaseModel):
+    """Sparse fieldsets.
+
+    ``fields`` is a comma-separated list of the fields to return for each
+    item, all of them if it is left out. Projected lists only select those
+    columns and serialize the rows straight to JSON, without a DTO."""
+
+    fields: str | None = None
+
+    def columns(
+        self, available: Mapping[str, InstrumentedAttribute]
+    ) -> list[InstrumentedAttribute] | None:
+        """The requested columns, or ``None`` for every field."""
+        if self.fields is None:
+            return None
+
+        names = [name.strip() for name in self.fields.split(",") if name.strip()]
+        if not names or any(name not in available for name in names):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid fields, expected some of: {', '.join(available)}",
+            )
+
+        return [available[name] for name in dict.fromkeys(names)]
+
+
+def project_rows(
+    rows: Sequence[Row], columns: Sequence[InstrumentedAttribute]
+) -> list[dict[str, Any]]:
+    """The rows as dicts of the columns, leaving out the cursor columns
+    selected alongside them."""
+    names = [column.key for column in columns]
+    return [{name: getattr(row, name) for name in names} for row in rows]
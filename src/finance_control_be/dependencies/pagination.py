@@ -1,10 +1,173 @@
-from pydantic import BaseModel
+import base64
+import binascii
+import json
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from enum import Enum
+from typing import Any, Mapping, Sequence
+from uuid import UUID
+
+from fastapi import HTTPException, Response, status
+from pydantic import BaseModel, Field, PrivateAttr
+from sqlalchemy import Select, func, literal, select, tuple_
+from sqlalchemy.orm import InstrumentedAttribute
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from finance_control_be.const import MAX_PAGE_SIZE
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+TOTAL_COUNT_HEADER = "X-Total-Count"
+
+
+def invalid_cursor() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+    )
+
+
+def encode_cursor(key: UUID) -> str:
+    return base64.urlsafe_b64encode(key.bytes).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor: str) -> UUID:
+    try:
+        return UUID(bytes=base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError):
+        raise invalid_cursor()
+
+
+def encode_sort_value(value: Any) -> str:
+    match value:
+        case Enum():
+            # SQLAlchemy stores enums by name.
+            return value.name
+        case date():
+            return value.isoformat()
+        case _:
+            return str(value)
+
+
+def decode_sort_value(column: InstrumentedAttribute, value: str) -> Any:
+    python_type = column.type.python_type
+    if issubclass(python_type, Enum):
+        return python_type[value]
+    if issubclass(python_type, date):
+        return date.fromisoformat(value)
+    if issubclass(python_type, Decimal):
+        return Decimal(value)
+    return python_type(value)
+
+
+def encode_sorted_cursor(sort: str, value: Any, key: UUID) -> str:
+    data = json.dumps([sort, encode_sort_value(value), key.hex])
+    return base64.urlsafe_b64encode(data.encode()).rstrip(b"=").decode("ascii")
+
+
+def decode_sorted_cursor(
+    cursor: str, sort: str, column: InstrumentedAttribute
+) -> tuple[Any, UUID]:
+    try:
+        data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_sort, value, key = json.loads(data)
+        if cursor_sort != sort:
+            raise ValueError(cursor_sort)
+
+        return decode_sort_value(column, value), UUID(hex=key)
+    except (binascii.Error, InvalidOperation, KeyError, TypeError, ValueError):
+        raise invalid_cursor()
 
 
 class PaginationParameter(BaseModel):
     """Pagination parameters.
 
-    FIXME: Performance concerns."""
+    Pages hold from 1 to ``MAX_PAGE_SIZE`` items, ordered by the primary
+    key, or by one of the columns a route allows as ``sort`` (prefixed with
+    ``-`` for descending order), then by the primary key. Pass the ``X-Next-Cursor`` header of the previous page
+    as ``cursor`` to seek directly to the next page; the ``offset`` mode is
+    kept for older clients. Set ``with_total`` to get the number of
+    matching rows in the ``X-Total-Count`` header."""
+
+    limit: int = Field(default=10, ge=1, le=MAX_PAGE_SIZE)
+    offset: int = Field(default=0, ge=0)
+    cursor: str | None = None
+    with_total: bool = False
+    sort: str | None = None
+
+    # what apply ordered by, for write_headers.
+    _key: InstrumentedAttribute | None = PrivateAttr(None)
+    _sort_column: InstrumentedAttribute | None = PrivateAttr(None)
+
+    def apply(
+        self,
+        statement: Select,
+        key: InstrumentedAttribute[UUID],
+        sortable: Mapping[str, InstrumentedAttribute] | None = None,
+    ) -> Select:
+        self._key = key
+        if self.sort is None:
+            statement = statement.order_by(key).limit(self.limit)
+            if self.cursor is not None:
+                return statement.where(key > decode_cursor(self.cursor))
+
+            return statement.offset(self.offset)
+
+        descending = self.sort.startswith("-")
+        column = (sortable or {}).get(self.sort.removeprefix("-"))
+        if column is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid sort, expected one of: {', '.join(sortable or {})}",
+            )
+        self._sort_column = column
+
+        if descending:
+            statement = statement.order_by(column.desc(), key.desc())
+        else:
+            statement = statement.order_by(column, key)
+        statement = statement.limit(self.limit)
+
+        if self.cursor is None:
+            return statement.offset(self.offset)
+
+        # a row comparison, which the (…, column, key) indexes can seek to.
+        value, last_key = decode_sorted_cursor(self.cursor, self.sort, column)
+        position = tuple_(column, key)
+        last = tuple_(literal(value, column.type), literal(last_key, key.type))
+        if descending:
+            return statement.where(position < last)
+        return statement.where(position > last)
+
+    def cursor_columns(self) -> list[InstrumentedAttribute]:
+        """The columns ``write_headers`` reads from the items of a page."""
+        columns = [self._key]
+        if self._sort_column is not None:
+            columns.append(self._sort_column)
+        return columns
+
+    async def count(self, session: AsyncSession, statement: Select) -> int | None:
+        if not self.with_total:
+            return None
+
+        return await session.scalar(
+            select(func.count()).select_from(statement.order_by(None).subquery())
+        )
+
+    def write_headers(
+        self, response: Response, items: Sequence[Any], total: int | None = None
+    ) -> None:
+        """Write the headers of a page of ``items``, the entities or rows
+        returned by the statement ``apply`` was given."""
+        # a short page means there is nothing after it.
+        if items and len(items) >= self.limit:
+            last = items[-1]
+            key = getattr(last, self._key.key)
+            if self._sort_column is None:
+                cursor = encode_cursor(key)
+            else:
+                cursor = encode_sorted_cursor(
+                    self.sort, getattr(last, self._sort_column.key), key
+                )
+            response.headers[NEXT_CURSOR_HEADER] = cursor
 
-    limit: int = 10
-    offset: int = 0
+        if total is not None:
+            response.headers[TOTAL_COUNT_HEADER] = str(total)
@@ -0,0 +1,54 @@
+from typing import Annotated, Any
+
+from fastapi import Depends, Request, Response
+from pydantic_core import from_json, to_json
+
+from finance_control_be.auth.principal import Principal
+from finance_control_be.dependencies.etag import check_etag
+from finance_control_be.dependencies.user_information import get_user_information
+from finance_control_be.response_cache import response_cache
+
+
+class CachedResponse:
+    """The cached response of a GET route.
+
+    Entries are keyed by the user, the URL and the version of the user, so
+    the write that bumps the version is what invalidates them. Routes return
+    ``lookup()`` when it finds an entry and ``store(content)`` otherwise;
+    both carry the headers set on the injected response, such as the ETag
+    and the pagination headers."""
+
+    def __init__(
+        self,
+        request: Request,
+        response: Response,
+        user: Annotated[Principal, Depends(get_user_information)],
+        etag: Annotated[str, Depends(check_etag)],
+    ):
+        self.response = response
+        # the ETag only holds a digest of the URL, which two tenants could share.
+        self.key = f"{user.username}\0{etag}\0{request.url.path}\0{request.url.query}"
+
+    def lookup(self) -> Response | None:
+        if response_cache is None:
+            return None
+
+        entry = response_cache.get(self.key)
+        if entry is None:
+            return None
+
+        headers, _, body = entry.partition(b"\n")
+        return Response(
+            content=body, media_type="application/json", headers=from_json(headers)
+        )
+
+    def store(self, content: Any) -> Response:
+        """Serialize the content like the response models would, and cache it."""
+        body = to_json(content)
+        if response_cache is not None:
+            headers = to_json(dict(self.response.headers))
+            response_cache.set(self.key, headers + b"\n" + body)
+
+        return Response(
+            content=body, media_type="application/json", headers=self.response.headers
+        )
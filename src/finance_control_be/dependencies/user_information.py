@@ -1,22 +1,46 @@
 from typing import Annotated
-from sqlalchemy.orm import Session
-from fastapi import Depends, HTTPException
-from finance_control_be.dependencies.db_session import get_session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import Depends, HTTPException, status
+from finance_control_be.database import USERNAME
+from finance_control_be.dependencies.db_session import get_async_session
+from finance_control_be.auth.exceptions import InvalidTokenException
 from finance_control_be.auth.oauth import oauth2_scheme
 from finance_control_be.auth.jwt import AccessTokenManager, create_access_token_manager
+from finance_control_be.auth.principal import Principal, principal_cache
+from finance_control_be.metrics import observe_stage
 from finance_control_be.models.user import User
 
 
-def get_user_information(
-    session: Annotated[Session, Depends(get_session)],
+async def get_user_information(
+    session: Annotated[AsyncSession, Depends(get_async_session)],
     token: Annotated[str, Depends(oauth2_scheme)],
     access_token_manager: Annotated[AccessTokenManager, Depends(create_access_token_manager)],
-) -> User:
-    payload = access_token_manager.retrieve_info_from_token(token)
+) -> Principal:
+    with observe_stage("user_information"):
+        try:
+            payload = access_token_manager.retrieve_info_from_token(token)
+        except InvalidTokenException:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid token",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        username = payload['sub']
+        # keeps the reads of a user who just wrote on the primary.
+        session.info[USERNAME] = username
 
-    # find the user according to the payload
-    user = session.query(User).filter(User.username == payload['sub']).first()
-    if user is None:
-        raise HTTPException(status_code=401)
+        principal = principal_cache.get(username)
+        if principal is None:
+            # find the user according to the payload
+            user = await session.scalar(select(User).where(User.username == username))
+            if user is None:
+                raise HTTPException(status_code=401)
 
-    return user
+            principal = Principal.from_entity(user)
+            principal_cache.set(username, principal)
+
+        if principal.disabled:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Inactive user")
+
+        return principal
@@ -0,0 +1,114 @@
+"""Exchange rates for converting amounts between currencies.
+
+Rates are loaded from a local CSV file with a ``currency`` and a ``rate``
+column, the value of one unit of the currency in any common reference
+unit; currencies in the file are added or replaced, the others are kept:
+
+    python -m finance_control_be.exchange_rates rates.csv
+
+Each process caches the rates for ``FC_EXCHANGE_RATE_REFRESH_INTERVAL``
+seconds, so a load is picked up by running servers within that interval.
+"""
+
+import argparse
+import csv
+from decimal import Decimal, InvalidOperation
+from typing import Iterable
+
+from sqlalchemy import ColumnElement, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from finance_control_be.cache import TTLCache
+from finance_control_be.const import EXCHANGE_RATE_REFRESH_INTERVAL
+from finance_control_be.models.exchange_rate import ExchangeRate
+
+RATES_KEY = "rates"
+
+# the whole table, which holds one row per currency.
+rate_cache: TTLCache[str, dict[str, Decimal]] = TTLCache(
+    max_size=1, ttl=EXCHANGE_RATE_REFRESH_INTERVAL
+)
+
+
+def normalize_currency(currency: str) -> str:
+    return currency.strip().upper()
+
+
+def parse_rates(lines: Iterable[str]) -> dict[str, Decimal]:
+    reader = csv.DictReader(lines)
+    rates = {}
+    for row in reader:
+        try:
+            currency = normalize_currency(row["currency"])
+            rate = Decimal(row["rate"])
+        except (KeyError, AttributeError, InvalidOperation):
+            raise ValueError(
+                f"line {reader.line_num}: expected a currency and a rate"
+            ) from None
+
+        if not currency or not rate.is_finite() or rate <= 0:
+            raise ValueError(f"line {reader.line_num}: invalid currency or rate")
+        rates[currency] = rate
+
+    return rates
+
+
+def load_rates(session: Session, rates: dict[str, Decimal]) -> None:
+    if rates:
+        statement = pg_insert(ExchangeRate).values(
+            [{"currency": currency, "rate": rate} for currency, rate in rates.items()]
+        )
+        session.execute(
+            statement.on_conflict_do_update(
+                index_elements=[ExchangeRate.currency],
+                set_={"rate": statement.excluded.rate, "updated_at": func.now()},
+            )
+        )
+    session.commit()
+    rate_cache.clear()
+
+
+async def get_exchange_rates(session: AsyncSession) -> dict[str, Decimal]:
+    rates = rate_cache.get(RATES_KEY)
+    if rates is None:
+        rates = {
+            row.currency: row.rate
+            for row in await session.execute(
+                select(ExchangeRate.currency, ExchangeRate.rate)
+            )
+        }
+        rate_cache.set(RATES_KEY, rates)
+
+    return rates
+
+
+def normalized_currency(currency: ColumnElement) -> ColumnElement:
+    """``normalize_currency`` in SQL; the currency of subscriptions is free
+    text."""
+    return func.upper(func.trim(currency))
+
+
+def rate_join_criteria(currency: ColumnElement) -> ColumnElement:
+    """Join ``ExchangeRate`` to the rate of the currency column."""
+    return ExchangeRate.currency == normalized_currency(currency)
+
+
+def main() -> None:
+    from finance_control_be.database import SessionLocal
+
+    parser = argparse.ArgumentParser(
+        description="Load exchange rates from a CSV file of currencies and rates."
+    )
+    parser.add_argument("file", type=argparse.FileType("r", encoding="utf-8-sig"))
+    arguments = parser.parse_args()
+
+    rates = parse_rates(arguments.file)
+    with SessionLocal() as session:
+        load_rates(session, rates)
+    print(f"loaded {len(rates)} exchange rates")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""Cash-flow projection of subscription schedules.
+
+Subscriptions sharing a schedule (anchor, period and currency) are summed
+in SQL, so each schedule is projected once however many subscriptions
+follow it. Each schedule is then reduced to a progression within the
+window, and schedules sharing one are merged before it is expanded:
+day and week periods are arithmetic progressions of date ordinals, month
+and year periods step through a table of the months in the window, with
+the day clamped to the length of each month as in ``recurrence``. Amounts
+are accumulated per day of the window and only turned back into dates
+once per day, when bucketing.
+"""
+
+from calendar import monthrange
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+from enum import Enum
+from typing import Iterable
+
+from finance_control_be.models.recurrence import (
+    nth_occurrence,
+    occurrence_index_after,
+    period_in_days,
+    period_in_months,
+)
+from finance_control_be.models.subscription import PeriodUnit
+
+
+class ForecastBucket(Enum):
+    day = "day"
+    month = "month"
+
+
+@dataclass(frozen=True)
+class Schedule:
+    """Subscriptions paying in the same currency on the same dates."""
+
+    anchor: date
+    period: int
+    period_unit: PeriodUnit
+    currency: str
+
+    # the total price of the subscriptions, and how many there are.
+    amount: Decimal
+    count: int
+
+
+@dataclass(frozen=True)
+class ForecastEntry:
+    start: date
+    currency: str
+    amount: Decimal
+    payment_count: int
+
+
+def month_index(day: date) -> int:
+    return day.year * 12 + day.month - 1
+
+
+class MonthTable:
+    """The first ordinal and the length of each month between two dates."""
+
+    def __init__(self, first: date, last: date):
+        self.offset = month_index(first)
+        self.first_ordinals: list[int] = []
+        self.lengths: list[int] = []
+
+        for index in range(self.offset, month_index(last) + 1):
+            year, month = divmod(index, 12)
+            self.first_ordinals.append(date(year, month + 1, 1).toordinal())
+            self.lengths.append(monthrange(year, month + 1)[1])
+
+    def ordinal(self, index: int, day: int) -> int:
+        position = index - self.offset
+        return self.first_ordinals[position] + min(day, self.lengths[position]) - 1
+
+
+# a schedule reduced to the occurrences in the window: either
+# (first ordinal, step in days, None) or (first month index, step in
+# months, day of the month).
+Progression = tuple[int, int, int | None]
+
+
+def progression(schedule: Schedule, after: date) -> Progression:
+    """The occurrences of the schedule strictly after ``after``."""
+    n = occurrence_index_after(
+        schedule.anchor, schedule.period, schedule.period_unit, after
+    )
+
+    days = period_in_days(schedule.period, schedule.period_unit)
+    if days is not None:
+        first = nth_occurrence(
+            schedule.anchor, schedule.period, schedule.period_unit, n
+        )
+        return first.toordinal(), days, None
+
+    step = period_in_months(schedule.period, schedule.period_unit)
+    return month_index(schedule.anchor) + step * n, step, schedule.anchor.day
+
+
+def occurrence_ordinals(
+    progression: Progression, until: date, months: MonthTable
+) -> Iterable[int]:
+    """The ordinals of the occurrences up to ``until`` included, which
+    ``months`` must cover."""
+    first, step, day = progression
+    until_ordinal = until.toordinal()
+    if day is None:
+        return range(first, until_ordinal + 1, step)
+
+    ordinals = (
+        months.ordinal(index, day)
+        for index in range(first, month_index(until) + 1, step)
+    )
+    return [ordinal for ordinal in ordinals if ordinal <= until_ordinal]
+
+
+def project(
+    schedules: Iterable[Schedule], after: date, until: date, bucket: ForecastBucket
+) -> list[ForecastEntry]:
+    """Every payment strictly after ``after`` up to ``until``, summed per
+    bucket and currency, in chronological order."""
+    # schedules with different anchors often pay on the same dates in the
+    # window (e.g. every monthly one bought on the 5th), so each distinct
+    # progression is expanded once, with the sum of their amounts.
+    progressions: defaultdict[tuple[Progression, str], list] = defaultdict(
+        lambda: [Decimal(0), 0]
+    )
+    for schedule in schedules:
+        totals = progressions[(progression(schedule, after), schedule.currency)]
+        totals[0] += schedule.amount
+        totals[1] += schedule.count
+
+    # per currency, the amount and payment count of each day of the window.
+    months = MonthTable(after, until)
+    offset = after.toordinal()
+    length = until.toordinal() - offset + 1
+    daily: dict[str, tuple[list[Decimal], list[int]]] = {}
+    for (occurrences, currency), (amount, count) in progressions.items():
+        amounts, counts = daily.setdefault(
+            currency, ([Decimal(0)] * length, [0] * length)
+        )
+        for ordinal in occurrence_ordinals(occurrences, until, months):
+            amounts[ordinal - offset] += amount
+            counts[ordinal - offset] += count
+
+    buckets: defaultdict[tuple[date, str], list] = defaultdict(lambda: [Decimal(0), 0])
+    for currency, (amounts, counts) in daily.items():
+        for position, count in enumerate(counts):
+            if not count:
+                continue
+
+            start = date.fromordinal(offset + position)
+            if bucket == ForecastBucket.month:
+                start = start.replace(day=1)
+
+            totals = buckets[(start, currency)]
+            totals[0] += amounts[position]
+            totals[1] += count
+
+    return [
+        ForecastEntry(
+            start=start, currency=currency, amount=amount, payment_count=count
+        )
+        for (start, currency), (amount, count) in sorted(buckets.items())
+    ]
@@ -0,0 +1,278 @@
+"""Bulk import of subscriptions from CSV.
+
+The CSV columns are the fields of ``SubscriptionPostDto``; rows are parsed
+and validated one at a time while they are loaded. On PostgreSQL the valid
+rows are streamed with ``COPY`` into a temporary staging table and merged
+into ``subscriptions`` with a single ``INSERT … SELECT``; other backends
+get chunked multi-row INSERTs. The reminders of the imported rows are then
+scheduled a chunk at a time, read back from the staging table or returned by
+the INSERTs, so that no more than a chunk of rows is held in memory. Invalid
+rows, including values too long for their columns, are skipped and reported.
+
+    python -m finance_control_be.importer --method-id <uuid> subscriptions.csv
+"""
+
+import argparse
+import csv
+import io
+import sys
+import time
+from datetime import date, datetime
+from enum import Enum
+from itertools import islice
+from typing import IO, Any, Iterable, Iterator
+from uuid import UUID, uuid4
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import Row, column, insert, select, table, text
+from sqlalchemy.orm import Session
+
+from finance_control_be.controllers.subscription import SubscriptionPostDto
+from finance_control_be.database import SessionLocal
+from finance_control_be.models.method import Method
+from finance_control_be.models.subscription import Subscription
+from finance_control_be.reminders import reschedule_statements, schedule_columns
+from finance_control_be.spending import SpendingDelta
+from finance_control_be.versioning import bump_version
+
+IMPORT_CHUNK_SIZE = 1000
+STAGING_TABLE = "subscriptions_import"
+IMPORT_COLUMNS = (
+    "id",
+    "name",
+    "description",
+    "price",
+    "currency",
+    "period",
+    "period_unit",
+    "purchased_at",
+    "is_active",
+    "method_id",
+)
+
+
+class MethodNotFoundException(ValueError):
+    def __init__(self, method_id: UUID):
+        super().__init__(f"Method {method_id} does not exist")
+
+
+class SubscriptionImportError(BaseModel):
+    line: int
+    errors: list[str]
+
+
+class SubscriptionImportReport(BaseModel):
+    imported: int
+    rejected: int
+    errors: list[SubscriptionImportError]
+
+    seconds: float
+    rows_per_second: float
+
+
+def parse_rows(
+    lines: Iterable[str], method_id: UUID, errors: list[SubscriptionImportError]
+) -> Iterator[dict[str, Any]]:
+    """Yield the values of each valid row, appending invalid ones to ``errors``."""
+    reader = csv.DictReader(lines)
+    for row in reader:
+        # empty cells fall back to the defaults of the DTO.
+        fields = {
+            key: value
+            for key, value in row.items()
+            if key is not None and value not in ("", None)
+        }
+
+        try:
+            subscription = SubscriptionPostDto.model_validate(fields)
+        except ValidationError as e:
+            errors.append(
+                SubscriptionImportError(
+                    line=reader.line_num,
+                    errors=[
+                        f"{'.'.join(map(str, error['loc']))}: {error['msg']}"
+                        for error in e.errors()
+                    ],
+                )
+            )
+            continue
+
+        yield {"id": uuid4(), **subscription.to_values(method_id)}
+
+
+def track_rows(
+    rows: Iterator[dict[str, Any]], method_id: UUID, delta: SpendingDelta
+) -> Iterator[dict[str, Any]]:
+    for row in rows:
+        delta.add(method_id, row)
+        yield row
+
+
+def reschedule_rows(session: Session, rows: Iterable[Row], today: date) -> None:
+    """Set the reminder due dates of rows with their ``schedule_columns``."""
+    for statement in reschedule_statements((row._mapping for row in rows), today):
+        session.execute(statement)
+
+
+def copy_value(value: object) -> object:
+    # SQLAlchemy stores enums by name.
+    if isinstance(value, Enum):
+        return value.name
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return value
+
+
+class CopyStream:
+    """A file-like view of rows rendered as CSV, read by ``COPY … FROM STDIN``."""
+
+    def __init__(self, rows: Iterator[dict[str, Any]]):
+        self.rows = rows
+        self.pending = ""
+        self.count = 0
+
+    def read(self, size: int = -1) -> str:
+        while size < 0 or len(self.pending) < size:
+            chunk = list(islice(self.rows, IMPORT_CHUNK_SIZE))
+            if not chunk:
+                break
+
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows(
+                [copy_value(row[column]) for column in IMPORT_COLUMNS] for row in chunk
+            )
+            self.pending += buffer.getvalue()
+            self.count += len(chunk)
+
+        if size < 0:
+            data, self.pending = self.pending, ""
+        else:
+            data, self.pending = self.pending[:size], self.pending[size:]
+        return data
+
+
+def copy_rows(session: Session, rows: Iterator[dict[str, Any]], today: date) -> int:
+    columns = ", ".join(IMPORT_COLUMNS)
+
+    session.execute(
+        text(
+            f"CREATE TEMPORARY TABLE {STAGING_TABLE} "
+            "(LIKE subscriptions INCLUDING DEFAULTS) ON COMMIT DROP"
+        )
+    )
+
+    stream = CopyStream(rows)
+    dbapi_connection = session.connection().connection.dbapi_connection
+    with dbapi_connection.cursor() as cursor:
+        cursor.copy_expert(
+            f"COPY {STAGING_TABLE} ({columns}) FROM STDIN WITH (FORMAT csv)", stream
+        )
+
+    session.execute(
+        text(
+            f"INSERT INTO subscriptions ({columns}) "
+            f"SELECT {columns} FROM {STAGING_TABLE}"
+        )
+    )
+
+    # read back through a server-side cursor, a chunk at a time.
+    staging = table(
+        STAGING_TABLE, *(column(field.key, field.type) for field in schedule_columns)
+    )
+    scheduled = session.execute(
+        select(staging)
+        .where(staging.c.is_active.is_(True))
+        .execution_options(yield_per=IMPORT_CHUNK_SIZE)
+    )
+    for chunk in scheduled.partitions():
+        reschedule_rows(session, chunk, today)
+
+    return stream.count
+
+
+def insert_rows(session: Session, rows: Iterator[dict[str, Any]], today: date) -> int:
+    count = 0
+    while chunk := list(islice(rows, IMPORT_CHUNK_SIZE)):
+        created = session.execute(
+            insert(Subscription).returning(*schedule_columns), chunk
+        )
+        reschedule_rows(session, created, today)
+        count += len(chunk)
+
+    return count
+
+
+def import_subscriptions(
+    session: Session,
+    method_id: UUID,
+    lines: Iterable[str],
+    owner: str | None = None,
+) -> SubscriptionImportReport:
+    """Import the subscriptions in ``lines`` into the method, then commit.
+
+    With ``owner``, a method that user does not own is reported as not
+    found, like one that does not exist."""
+    started_at = time.perf_counter()
+
+    statement = select(Method.username).where(Method.id == method_id)
+    if owner is not None:
+        statement = statement.where(Method.username == owner)
+    username = session.scalar(statement)
+    if username is None:
+        raise MethodNotFoundException(method_id)
+
+    errors: list[SubscriptionImportError] = []
+    delta = SpendingDelta(username)
+    rows = track_rows(parse_rows(lines, method_id, errors), method_id, delta)
+
+    today = datetime.now().date()
+    if session.get_bind().dialect.name == "postgresql":
+        imported = copy_rows(session, rows, today)
+    else:
+        imported = insert_rows(session, rows, today)
+
+    statement = delta.statement()
+    if statement is not None:
+        session.execute(statement)
+    if imported:
+        session.execute(bump_version(username))
+    session.commit()
+
+    seconds = time.perf_counter() - started_at
+    return SubscriptionImportReport(
+        imported=imported,
+        rejected=len(errors),
+        errors=errors,
+        seconds=seconds,
+        rows_per_second=(imported / seconds) if seconds else 0,
+    )
+
+
+def import_subscriptions_file(
+    method_id: UUID, file: IO[bytes], owner: str | None = None
+) -> SubscriptionImportReport:
+    with SessionLocal() as session:
+        return import_subscriptions(
+            session,
+            method_id,
+            io.TextIOWrapper(file, encoding="utf-8-sig", newline=""),
+            owner,
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Import subscriptions from a CSV file into a method."
+    )
+    parser.add_argument("--method-id", type=UUID, required=True)
+    parser.add_argument("file", type=argparse.FileType("rb"))
+    arguments = parser.parse_args()
+
+    report = import_subscriptions_file(arguments.method_id, arguments.file)
+    print(report.model_dump_json(indent=2))
+    if report.rejected:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,408 @@
+"""Request and database metrics, exported in the Prometheus text format.
+
+With ``FC_METRICS=1`` the app records, per route template, the latency of
+each request along with the number of queries it ran and the time they
+took; the duration of the authentication stages (argon2, JWT decoding,
+``get_user_information``); and logs every query slower than
+``FC_SLOW_QUERY_SECONDS`` with its bound parameters redacted. ``GET
+/metrics`` exports all of it, with the statistics of the caches and the
+connection pools, to scrapers sending ``FC_METRICS_TOKEN`` as a bearer
+token; without a token it is only served with ``FC_DEBUG=1``. Without
+``FC_METRICS``, no middleware or event hook is installed and
+``observe_stage`` returns a shared no-op context manager.
+"""
+
+import secrets
+import threading
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Annotated, Any, ContextManager, Iterable, Sequence
+
+from fastapi import APIRouter, Depends, FastAPI, Header, HTTPException, status
+from fastapi.responses import PlainTextResponse
+from loguru import logger
+from sqlalchemy import Engine, event
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from finance_control_be.const import (
+    DEBUG,
+    METRICS,
+    METRICS_TOKEN,
+    SLOW_QUERY_SECONDS,
+)
+
+# the default buckets of the Prometheus clients, in seconds.
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1, 2.5, 5, 7.5, 10
+)  # fmt: skip
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _format(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+
+        self._values: dict[tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            values = list(self._values.items())
+        for labels, value in values:
+            yield f"{self.name}{_labels(self.labelnames, labels)} {_format(value)}"
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DURATION_BUCKETS,
+    ):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+
+        # per labels: the count of each bucket (not cumulative, the last
+        # one for +Inf), then the sum of the observations.
+        self._values: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+            counts, total = entry
+            counts[index] += 1
+            total[0] += value
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            values = [
+                (labels, list(counts), total[0])
+                for labels, (counts, total) in self._values.items()
+            ]
+
+        names = (*self.labelnames, "le")
+        for labels, counts, total in values:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                le = bound if isinstance(bound, str) else _format(bound)
+                yield f"{self.name}_bucket{_labels(names, (*labels, le))} {cumulative}"
+            suffix = _labels(self.labelnames, labels)
+            yield f"{self.name}_sum{suffix} {_format(total)}"
+            yield f"{self.name}_count{suffix} {cumulative}"
+
+
+request_duration = Histogram(
+    "fc_http_request_duration_seconds",
+    "Time to answer a request, body included.",
+    ("method", "route", "status"),
+)
+request_queries = Histogram(
+    "fc_http_request_queries",
+    "Statements a request ran.",
+    ("method", "route"),
+    buckets=QUERY_COUNT_BUCKETS,
+)
+request_db_duration = Histogram(
+    "fc_http_request_db_seconds",
+    "Time a request spent executing statements.",
+    ("method", "route"),
+)
+query_duration = Histogram(
+    "fc_db_query_duration_seconds", "Time to execute a statement."
+)
+slow_queries = Counter(
+    "fc_db_slow_queries_total", "Statements slower than FC_SLOW_QUERY_SECONDS."
+)
+stage_duration = Histogram(
+    "fc_stage_duration_seconds",
+    "Time spent in a stage of request handling.",
+    ("stage",),
+)
+
+
+@dataclass
+class RequestStatistics:
+    queries: int = 0
+    db_seconds: float = 0
+
+
+# the statistics of the request being handled, shared by the tasks and
+# threads it spawns.
+request_statistics: ContextVar[RequestStatistics | None] = ContextVar(
+    "request_statistics", default=None
+)
+
+
+class _StageTimer:
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self) -> None:
+        self.started_at = time.perf_counter()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        stage_duration.observe(time.perf_counter() - self.started_at, self.stage)
+
+
+_untimed = nullcontext()
+
+
+def observe_stage(stage: str) -> ContextManager[None]:
+    """A context manager recording the time spent in its block as ``stage``."""
+    return _StageTimer(stage) if METRICS else _untimed
+
+
+def redact_parameters(parameters: Any) -> Any:
+    """The shape of the bound parameters, without their values."""
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            # executemany: one set of parameters per row.
+            return f"{len(parameters)} x {redact_parameters(parameters[0])}"
+        return [type(value).__name__ for value in parameters]
+
+    return type(parameters).__name__
+
+
+_QUERY_STARTED_AT = "metrics_query_started_at"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault(_QUERY_STARTED_AT, []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info[_QUERY_STARTED_AT].pop()
+    query_duration.observe(elapsed)
+
+    statistics = request_statistics.get()
+    if statistics is not None:
+        statistics.queries += 1
+        statistics.db_seconds += elapsed
+
+    if elapsed >= SLOW_QUERY_SECONDS:
+        slow_queries.inc()
+        logger.warning(
+            "slow query ({:.3f}s): {} parameters: {}",
+            elapsed,
+            statement,
+            redact_parameters(parameters),
+        )
+
+
+def _handle_error(exception_context) -> None:
+    # the failed statement never reaches after_cursor_execute.
+    connection = exception_context.connection
+    if connection is not None and connection.info.get(_QUERY_STARTED_AT):
+        connection.info[_QUERY_STARTED_AT].pop()
+
+
+class MetricsMiddleware:
+    """Records the latency and the statements of every HTTP request, by the
+    path template of the route that handled it."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self._route_paths: dict[Any, str] | None = None
+
+    def _route_path(self, scope: Scope) -> str:
+        if self._route_paths is None:
+            self._route_paths = {
+                route.endpoint: route.path
+                for route in scope["app"].routes
+                if hasattr(route, "endpoint")
+            }
+        return self._route_paths.get(scope.get("endpoint"), "<unmatched>")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        statistics = RequestStatistics()
+        token = request_statistics.set(statistics)
+        started_at = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started_at
+            request_statistics.reset(token)
+
+            # the router wrote the matched endpoint into the scope.
+            method, route = scope["method"], self._route_path(scope)
+            request_duration.observe(elapsed, method, route, str(status))
+            request_queries.observe(statistics.queries, method, route)
+            request_db_duration.observe(statistics.db_seconds, method, route)
+
+
+def _render_samples(
+    name: str, kind: str, help: str, label: str, samples: dict[str, float]
+) -> Iterable[str]:
+    yield f"# HELP {name} {help}"
+    yield f"# TYPE {name} {kind}"
+    for value_label, value in samples.items():
+        yield f"{name}{_labels((label,), (value_label,))} {_format(value)}"
+
+
+def _render_pools() -> Iterable[str]:
+    from finance_control_be.pool import pool_statistics
+
+    pools = pool_statistics()
+    for field, name, kind, help in (
+        ("size", "fc_db_pool_size", "gauge", "Connections a pool keeps open."),
+        ("checked_out", "fc_db_pool_checked_out", "gauge", "Connections in use."),
+        ("overflow", "fc_db_pool_overflow", "gauge", "Connections beyond the size."),
+        ("checkouts", "fc_db_pool_checkouts_total", "counter", "Checkouts."),
+        (
+            "overflow_events",
+            "fc_db_pool_overflow_events_total",
+            "counter",
+            "Checkouts that opened an overflow connection.",
+        ),
+        ("timeouts", "fc_db_pool_timeouts_total", "counter", "Checkouts timed out."),
+        (
+            "wait_seconds",
+            "fc_db_pool_wait_seconds_total",
+            "counter",
+            "Time checkouts waited for a connection.",
+        ),
+    ):
+        yield from _render_samples(
+            name,
+            kind,
+            help,
+            "pool",
+            {pool: getattr(statistics, field) for pool, statistics in pools.items()},
+        )
+
+
+def _render_caches() -> Iterable[str]:
+    from finance_control_be.auth.jwt import create_access_token_manager
+    from finance_control_be.auth.principal import principal_cache
+    from finance_control_be.exchange_rates import rate_cache
+    from finance_control_be.response_cache import response_cache
+
+    caches = {
+        "principal": principal_cache.statistics(),
+        "token": create_access_token_manager().verified_tokens.statistics(),
+        "exchange_rate": rate_cache.statistics(),
+    }
+    if response_cache is not None:
+        caches["response"] = response_cache.statistics()
+
+    for field, name, kind, help in (
+        ("hits", "fc_cache_hits_total", "counter", "Cache lookups that hit."),
+        ("misses", "fc_cache_misses_total", "counter", "Cache lookups that missed."),
+        ("evictions", "fc_cache_evictions_total", "counter", "Entries evicted."),
+        ("size", "fc_cache_entries", "gauge", "Entries held."),
+    ):
+        yield from _render_samples(
+            name,
+            kind,
+            help,
+            "cache",
+            {cache: getattr(statistics, field) for cache, statistics in caches.items()},
+        )
+
+
+def render_metrics() -> str:
+    lines: list[str] = []
+    for metric in (
+        request_duration,
+        request_queries,
+        request_db_duration,
+        query_duration,
+        slow_queries,
+        stage_duration,
+    ):
+        lines.extend(metric.render())
+    lines.extend(_render_pools())
+    lines.extend(_render_caches())
+
+    return "\n".join(lines) + "\n"
+
+
+def verify_metrics_token(authorization: Annotated[str | None, Header()] = None) -> None:
+    if METRICS_TOKEN is None:
+        # only routed with FC_DEBUG=1.
+        return
+
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not secrets.compare_digest(
+        token.encode(), METRICS_TOKEN.encode()
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+router = APIRouter(tags=["internal"], include_in_schema=False)
+
+
+@router.get(
+    "/metrics",
+    response_class=PlainTextResponse,
+    dependencies=[Depends(verify_metrics_token)],
+)
+def metrics() -> PlainTextResponse:
+    return PlainTextResponse(
+        render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+def instrument(app: FastAPI) -> None:
+    """Install the middleware, the statement hooks and ``/metrics``."""
+    app.add_middleware(MetricsMiddleware)
+    if METRICS_TOKEN is not None or DEBUG:
+        app.include_router(router)
+
+    # every engine, including the sync engines behind the async ones.
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(Engine, "handle_error", _handle_error)
@@ -1,2 +1,6 @@
 from .base import Base as Base
 from .user import User as User
+from .spending import UserSpendingSummary as UserSpendingSummary
+from .exchange_rate import ExchangeRate as ExchangeRate
+from .reminder import OutboxEvent as OutboxEvent, ReminderDueDate as ReminderDueDate
+from .user_version import UserVersion as UserVersion
@@ -0,0 +1,23 @@
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import DateTime, String, func
+from finance_control_be.models.base import Base
+from sqlalchemy import DECIMAL as SqlDecimal
+from sqlalchemy.orm import Mapped, mapped_column
+
+
+class ExchangeRate(Base):
+    """The value of one unit of a currency in a common reference unit.
+
+    Any currency can serve as the reference; an amount in ``a`` converts to
+    ``b`` as ``amount * rate(a) / rate(b)``."""
+
+    __tablename__ = "exchange_rates"
+
+    currency: Mapped[str] = mapped_column(String(8), primary_key=True)
+    rate: Mapped[Decimal] = mapped_column(SqlDecimal(), nullable=False)
+
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
@@ -1,8 +1,9 @@
 from uuid import uuid4
 
 from enum import Enum
-from sqlalchemy import ForeignKey, String, Text
+from sqlalchemy import ForeignKey, Index, String, Text
 from finance_control_be.models.base import Base
+from finance_control_be.models.search import search_index
 from sqlalchemy import Enum as SqlEnum
 from sqlalchemy.orm import mapped_column, Mapped, relationship
 from sqlalchemy.dialects.postgresql import UUID as SqlUUID
@@ -21,9 +22,17 @@ class Kind(Enum):
 
 class Method(Base):
     __tablename__ = "methods"
+    __table_args__ = (
+        # leads with the owner, so it also serves as the index of the foreign
+        # key; list_methods pages by id within it.
+        Index("ix_methods_username_id", "username", "id"),
+        # the sort orders and filters of list_methods, within a user.
+        Index("ix_methods_username_name", "username", "name", "id"),
+        Index("ix_methods_username_kind", "username", "kind", "id"),
+    )
 
     id: Mapped[UUID] = mapped_column(
-        SqlUUID(as_uuid=True), primary_key=True, default=uuid4()
+        SqlUUID(as_uuid=True), primary_key=True, default=uuid4
     )
     name: Mapped[str] = mapped_column(String(256), nullable=False)
     description: Mapped[str | None] = mapped_column(Text(), nullable=True)
@@ -34,3 +43,6 @@ class Method(Base):
     subscriptions: Mapped[list[Subscription]] = relationship()
 
     username: Mapped[str] = mapped_column(ForeignKey("users.username"))
+
+
+search_index("ix_methods_search", Method.__table__)
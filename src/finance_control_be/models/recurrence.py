@@ -0,0 +1,113 @@
+"""Closed-form recurrence arithmetic for subscription periods.
+
+Occurrence ``n`` of a schedule is always computed from the anchor date
+(``purchased_at``) rather than from the previous occurrence, so month-end
+dates are clamped per month without drifting: a subscription bought on
+Jan 31 is due on Feb 28 (or 29), then on Mar 31 again.
+"""
+
+from calendar import monthrange
+from datetime import date, timedelta
+
+from finance_control_be.models.subscription import PeriodUnit
+
+
+def add_months(anchor: date, months: int) -> date:
+    """Add ``months`` to ``anchor``, clamping the day to the end of the month."""
+    years, month_index = divmod(anchor.month - 1 + months, 12)
+    year = anchor.year + years
+    month = month_index + 1
+    day = min(anchor.day, monthrange(year, month)[1])
+
+    return date(year, month, day)
+
+
+def period_in_days(period: int, period_unit: PeriodUnit) -> int | None:
+    """The length of a period in days, or ``None`` if it depends on the calendar."""
+    match period_unit:
+        case PeriodUnit.day:
+            return period
+        case PeriodUnit.week:
+            return period * 7
+        case PeriodUnit.month | PeriodUnit.year:
+            return None
+        case _:
+            raise ValueError(f"Invalid period unit: {period_unit}")
+
+
+def period_in_months(period: int, period_unit: PeriodUnit) -> int | None:
+    """The length of a period in months, or ``None`` if it is measured in days."""
+    match period_unit:
+        case PeriodUnit.month:
+            return period
+        case PeriodUnit.year:
+            return period * 12
+        case PeriodUnit.day | PeriodUnit.week:
+            return None
+        case _:
+            raise ValueError(f"Invalid period unit: {period_unit}")
+
+
+def nth_occurrence(anchor: date, period: int, period_unit: PeriodUnit, n: int) -> date:
+    """The ``n``-th occurrence of the schedule; the anchor itself is ``n == 0``."""
+    if period <= 0:
+        raise ValueError(f"Invalid period: {period}")
+
+    days = period_in_days(period, period_unit)
+    if days is not None:
+        return anchor + timedelta(days=days * n)
+
+    return add_months(anchor, period_in_months(period, period_unit) * n)
+
+
+def occurrence_index_after(
+    anchor: date, period: int, period_unit: PeriodUnit, after: date
+) -> int:
+    """The smallest ``n`` whose occurrence falls strictly after ``after``."""
+    if period <= 0:
+        raise ValueError(f"Invalid period: {period}")
+
+    if anchor > after:
+        return 0
+
+    days = period_in_days(period, period_unit)
+    if days is not None:
+        return (after - anchor).days // days + 1
+
+    months = period_in_months(period, period_unit)
+    elapsed_months = (after.year - anchor.year) * 12 + after.month - anchor.month
+    n = elapsed_months // months
+    if add_months(anchor, months * n) <= after:
+        n += 1
+
+    return n
+
+
+def next_occurrence(
+    anchor: date, period: int, period_unit: PeriodUnit, after: date
+) -> date:
+    """The first occurrence of the schedule strictly after ``after``.
+
+    If the anchor itself is later than ``after``, the anchor is returned."""
+    n = occurrence_index_after(anchor, period, period_unit, after)
+    return nth_occurrence(anchor, period, period_unit, n)
+
+
+def rollover_anchor(
+    anchor: date, period: int, period_unit: PeriodUnit, today: date
+) -> date:
+    """The latest occurrence on or before ``today`` that can replace the
+    anchor without changing any later occurrence.
+
+    A month-end anchor only rolls over to occurrences on the same day of
+    the month, since a clamped one (Feb 28 for Jan 31) would clamp every
+    later occurrence as well."""
+    n = occurrence_index_after(anchor, period, period_unit, today) - 1
+    clamps = period_in_days(period, period_unit) is None
+    while n > 0:
+        occurrence = nth_occurrence(anchor, period, period_unit, n)
+        if not clamps or occurrence.day == anchor.day:
+            return occurrence
+        n -= 1
+
+    return anchor
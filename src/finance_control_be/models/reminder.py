@@ -0,0 +1,72 @@
+from datetime import date, datetime
+from typing import Any
+from uuid import UUID, uuid4
+
+from sqlalchemy import (
+    JSON,
+    DateTime,
+    ForeignKey,
+    Index,
+    String,
+    UniqueConstraint,
+    func,
+    text,
+)
+from finance_control_be.models.base import Base
+from sqlalchemy import Date as SqlDate
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.dialects.postgresql import UUID as SqlUUID
+
+
+class ReminderDueDate(Base):
+    """The next payment date of an active subscription, which the reminder
+    scheduler finds by range over the index instead of scanning the
+    subscriptions."""
+
+    __tablename__ = "reminder_due_dates"
+
+    subscription_id: Mapped[UUID] = mapped_column(
+        SqlUUID(as_uuid=True),
+        ForeignKey("subscriptions.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    due_on: Mapped[date] = mapped_column(SqlDate(), nullable=False, index=True)
+
+
+class OutboxEvent(Base):
+    """An event waiting to be delivered by a dispatcher, which leases it
+    while delivering."""
+
+    __tablename__ = "outbox"
+    __table_args__ = (
+        # an event per occurrence, however often it is scheduled.
+        UniqueConstraint("kind", "subscription_id", "occurrence"),
+        # the undelivered events, oldest first, for dispatchers.
+        Index(
+            "ix_outbox_pending",
+            "created_at",
+            postgresql_where=text("sent_at IS NULL"),
+        ),
+    )
+
+    id: Mapped[UUID] = mapped_column(
+        SqlUUID(as_uuid=True), primary_key=True, default=uuid4
+    )
+    kind: Mapped[str] = mapped_column(String(64), nullable=False)
+
+    # not foreign keys, so that events outlive what they are about.
+    username: Mapped[str] = mapped_column(String(64), nullable=False)
+    subscription_id: Mapped[UUID] = mapped_column(SqlUUID(as_uuid=True))
+    occurrence: Mapped[date] = mapped_column(SqlDate(), nullable=False)
+    payload: Mapped[dict[str, Any]] = mapped_column(JSON(), nullable=False)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+    leased_by: Mapped[str | None] = mapped_column(String(128), nullable=True)
+    leased_until: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    sent_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
@@ -0,0 +1,70 @@
+"""Full-text search over names and descriptions.
+
+Searches use GIN indexes on an expression, which PostgreSQL only considers
+for queries repeating that exact expression; both the indexes and the
+queries build it with ``search_document``, which therefore only uses SQL
+literals, never bound parameters.
+
+PostgreSQL cannot tell how many rows a prefix query matches from the
+default statistics of these indexes. It then assumed rare words to match a
+large share of the rows and scanned a whole method in key order. The
+indexes therefore collect ``SEARCH_STATISTICS_TARGET`` times more.
+"""
+
+import re
+
+from sqlalchemy import (
+    DDL,
+    ColumnElement,
+    Index,
+    String,
+    Table,
+    event,
+    func,
+    literal_column,
+    text,
+)
+
+# text rather than a literal column: an Index takes its table from the first
+# column of its expression, and a literal column has none.
+SEARCH_CONFIGURATION = text("'simple'::regconfig")
+SEARCH_STATISTICS_TARGET = 1000
+
+
+def search_document(name: ColumnElement, description: ColumnElement) -> ColumnElement:
+    return func.to_tsvector(
+        SEARCH_CONFIGURATION,
+        name
+        + literal_column("' '", String())
+        + func.coalesce(description, literal_column("''", String())),
+    )
+
+
+def search_index(name: str, table: Table) -> Index:
+    """The GIN index of the table's name and description."""
+    index = Index(
+        name,
+        search_document(table.c.name, table.c.description),
+        postgresql_using="gin",
+    )
+    # create_all creates the indexes of a table before its after_create.
+    event.listen(
+        table,
+        "after_create",
+        DDL(
+            f"ALTER INDEX {name} ALTER COLUMN 1"
+            f" SET STATISTICS {SEARCH_STATISTICS_TARGET}"
+        ).execute_if(dialect="postgresql"),
+    )
+    return index
+
+
+def search_condition(document: ColumnElement, text: str) -> ColumnElement | None:
+    """Match documents containing every word of ``text`` as a prefix, or
+    ``None`` if it has no words."""
+    words = re.findall(r"\w+", text.lower())
+    if not words:
+        return None
+
+    query = " & ".join(f"{word}:*" for word in words)
+    return document.op("@@")(func.to_tsquery(SEARCH_CONFIGURATION, query))
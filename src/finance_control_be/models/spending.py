@@ -0,0 +1,30 @@
+from decimal import Decimal
+from uuid import UUID
+
+from sqlalchemy import ForeignKey, String
+from finance_control_be.models.base import Base
+from sqlalchemy import DECIMAL as SqlDecimal
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.dialects.postgresql import UUID as SqlUUID
+
+
+class UserSpendingSummary(Base):
+    """The spending of a user per method and currency, kept up to date by
+    every transaction that writes subscriptions."""
+
+    __tablename__ = "user_spending_summary"
+
+    username: Mapped[str] = mapped_column(
+        ForeignKey("users.username", ondelete="CASCADE"), primary_key=True
+    )
+    method_id: Mapped[UUID] = mapped_column(
+        SqlUUID(as_uuid=True),
+        ForeignKey("methods.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    currency: Mapped[str] = mapped_column(String(8), primary_key=True)
+
+    subscription_count: Mapped[int] = mapped_column(default=0)
+    active_count: Mapped[int] = mapped_column(default=0)
+    # the yearly cost of the active subscriptions only.
+    yearly_cost: Mapped[Decimal] = mapped_column(SqlDecimal(), default=0)
@@ -4,9 +4,11 @@ from enum import Enum
 from uuid import UUID, uuid4
 
 from dateutil.relativedelta import relativedelta
-from sqlalchemy import ForeignKey, String, Date as SqlDate
+from sqlalchemy import ForeignKey, Index, String, Date as SqlDate, case, literal
 from finance_control_be.models.base import Base
+from finance_control_be.models.search import search_index
 from sqlalchemy import DECIMAL as SqlDecimal, Enum as SqlEnum
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy.dialects.postgresql import UUID as SqlUUID
 
@@ -18,11 +20,40 @@ class PeriodUnit(Enum):
     year = "year"
 
 
+# how many periods of each unit fit in an average (Gregorian) year.
+PERIODS_PER_YEAR = {
+    PeriodUnit.day: Decimal("365.2425"),
+    PeriodUnit.week: Decimal("52.1775"),
+    PeriodUnit.month: Decimal(12),
+    PeriodUnit.year: Decimal(1),
+}
+
+
+def yearly_price(price: Decimal, period: int, period_unit: PeriodUnit) -> Decimal:
+    """The price of a subscription normalized to one year."""
+    return price * PERIODS_PER_YEAR[period_unit] / period
+
+
 class Subscription(Base):
     __tablename__ = "subscriptions"
+    __table_args__ = (
+        # leads with the method, so it also serves as the index of the
+        # foreign key (ownership joins, per-method reports);
+        # list_subscriptions pages by id within it.
+        Index("ix_subscriptions_method_id_id", "method_id", "id"),
+        # the sort orders of list_subscriptions, within a method.
+        Index("ix_subscriptions_method_id_name", "method_id", "name", "id"),
+        Index("ix_subscriptions_method_id_price", "method_id", "price", "id"),
+        Index(
+            "ix_subscriptions_method_id_purchased_at",
+            "method_id",
+            "purchased_at",
+            "id",
+        ),
+    )
 
     id: Mapped[UUID] = mapped_column(
-        SqlUUID(as_uuid=True), primary_key=True, default=uuid4()
+        SqlUUID(as_uuid=True), primary_key=True, default=uuid4
     )
 
     name: Mapped[str] = mapped_column(String(256), nullable=False)
@@ -40,6 +71,26 @@ class Subscription(Base):
     method_id: Mapped[UUID] = mapped_column(ForeignKey("methods.id"))
 
 
+    @hybrid_property
+    def yearly_price(self) -> Decimal:
+        return yearly_price(self.price, self.period, self.period_unit)
+
+    @yearly_price.inplace.expression
+    @classmethod
+    def _yearly_price_expression(cls):
+        return (
+            cls.price
+            * case(
+                *(
+                    # bound with the column's type, which stores the name.
+                    (literal(unit, cls.period_unit.type), literal(factor, SqlDecimal()))
+                    for unit, factor in PERIODS_PER_YEAR.items()
+                ),
+                value=cls.period_unit,
+            )
+            / cls.period
+        )
+
     def period_to_timedelta(self) -> relativedelta:
         match self.period_unit:
             case PeriodUnit.day:
@@ -52,3 +103,6 @@ class Subscription(Base):
                 return relativedelta(years=self.period)
             case _:
                 raise ValueError(f"Invalid period unit: {self.period_unit}")
+
+
+search_index("ix_subscriptions_search", Subscription.__table__)
@@ -28,5 +28,15 @@ class User(Base):
     def verify_password(self, password: str, password_manager: PasswordManager) -> bool:
         return password_manager.verify_password(input_password=password, hash=self.password)
 
+    @classmethod
+    async def new_hashed_async(cls, password: str, password_manager: PasswordManager) -> Self:
+        user = cls()
+        user.password = await password_manager.hash_password_async(password=password)
+
+        return user
+
+    async def verify_password_async(self, password: str, password_manager: PasswordManager) -> bool:
+        return await password_manager.verify_password_async(input_password=password, hash=self.password)
+
     def get_full_name(self) -> str:
         return self.full_name or self.username
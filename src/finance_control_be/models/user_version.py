@@ -0,0 +1,15 @@
+from sqlalchemy import BigInteger, ForeignKey
+from finance_control_be.models.base import Base
+from sqlalchemy.orm import Mapped, mapped_column
+
+
+class UserVersion(Base):
+    """A counter incremented by every write to the methods or subscriptions
+    of a user; users who never wrote have no row, i.e. version 0."""
+
+    __tablename__ = "user_versions"
+
+    username: Mapped[str] = mapped_column(
+        ForeignKey("users.username", ondelete="CASCADE"), primary_key=True
+    )
+    version: Mapped[int] = mapped_column(BigInteger(), default=0)
@@ -0,0 +1,140 @@
+"""Connection pools that record their checkouts.
+
+Every engine of the app uses one of the pools below and is registered by
+name in ``engines``, so that the wait for a connection, the overflow
+connections and the checkouts that timed out can be told apart under load.
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any
+
+from loguru import logger
+from sqlalchemy import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, Pool, QueuePool
+
+
+@dataclass(frozen=True)
+class PoolStatistics:
+    size: int
+    checked_out: int
+    # connections open beyond ``size``, up to the pool's max_overflow.
+    overflow: int
+    checkouts: int
+    overflow_events: int
+    timeouts: int
+    wait_seconds: float
+    max_wait_seconds: float
+
+
+class PoolMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkins = 0
+        self.overflow_events = 0
+        self.timeouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def record(
+        self, waited: float, overflowed: bool = False, timed_out: bool = False
+    ) -> None:
+        with self._lock:
+            self.checkouts += not timed_out
+            self.overflow_events += overflowed
+            self.timeouts += timed_out
+            self.wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+    def record_checkin(self) -> None:
+        with self._lock:
+            self.checkins += 1
+
+
+class InstrumentedPool(Pool):
+    """Times ``_do_get``, where a checkout waits for a free connection or
+    opens a new one."""
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def recreate(self) -> "InstrumentedPool":
+        # the metrics outlive Engine.dispose().
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+    def _do_get(self) -> Any:
+        overflow = self._current_overflow()
+        started_at = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.record(time.perf_counter() - started_at, timed_out=True)
+            logger.warning("connection pool exhausted: {}", self.statistics())
+            raise
+
+        self.metrics.record(
+            time.perf_counter() - started_at,
+            overflowed=self._current_overflow() > max(overflow, 0),
+        )
+        return connection
+
+    def _do_return_conn(self, record: Any) -> None:
+        self.metrics.record_checkin()
+        super()._do_return_conn(record)
+
+    def _current_overflow(self) -> int:
+        return self.overflow() if isinstance(self, QueuePool) else 0
+
+    def statistics(self) -> PoolStatistics:
+        is_queue = isinstance(self, QueuePool)
+        return PoolStatistics(
+            size=self.size() if is_queue else 0,
+            checked_out=(
+                self.checkedout()
+                if is_queue
+                else self.metrics.checkouts - self.metrics.checkins
+            ),
+            overflow=max(self.overflow(), 0) if is_queue else 0,
+            checkouts=self.metrics.checkouts,
+            overflow_events=self.metrics.overflow_events,
+            timeouts=self.metrics.timeouts,
+            wait_seconds=self.metrics.wait_seconds,
+            max_wait_seconds=self.metrics.max_wait_seconds,
+        )
+
+
+class InstrumentedQueuePool(InstrumentedPool, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(InstrumentedPool, AsyncAdaptedQueuePool):
+    pass
+
+
+class InstrumentedNullPool(InstrumentedPool, NullPool):
+    """Opens a connection per checkout, e.g. behind PgBouncer, which does
+    the pooling; its wait is the time to connect."""
+
+
+# keyed by the name given to register_engine.
+engines: dict[str, Engine] = {}
+
+
+def register_engine(name: str, engine: Engine) -> None:
+    """Report the pool of the (sync) engine in ``pool_statistics``."""
+    engines[name] = engine
+
+
+def pool_statistics() -> dict[str, PoolStatistics]:
+    # the engine's pool is replaced when it is disposed.
+    return {
+        name: engine.pool.statistics()
+        for name, engine in engines.items()
+        if isinstance(engine.pool, InstrumentedPool)
+    }
@@ -0,0 +1,157 @@
+"""Statement counting, to catch N+1 queries.
+
+With ``FC_DEBUG=1`` every request counts the statements it runs by shape,
+the SQL with its placeholders folded, and one shape that runs
+``FC_N_PLUS_ONE_THRESHOLD`` times or more within a request is reported as
+a likely N+1 query: logged, or raised as ``RepeatedQueryError`` with
+``FC_N_PLUS_ONE=raise``.
+
+Tests can hold routes to a query budget, counting the statements run in
+the context of the block: its own, and those of the requests and threads
+that inherit its context, which starlette's ``TestClient`` and
+``run_in_threadpool`` carry over. Background tasks and threads started
+elsewhere, such as the lifespan jobs, are not counted:
+
+    with assert_max_queries(3):
+        client.get("/methods/", headers=headers)
+"""
+
+import re
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+from fastapi import FastAPI
+from loguru import logger
+from sqlalchemy import Engine, event
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from finance_control_be.const import N_PLUS_ONE, N_PLUS_ONE_THRESHOLD
+
+_WHITESPACE = re.compile(r"\s+")
+_PLACEHOLDER = re.compile(r"\$\d+|%\(\w+\)s|%s|\?")
+# an expanded IN list, whose length depends on the values.
+_PLACEHOLDER_LIST = re.compile(r"\(\?(?:, \?)*\)")
+
+
+def statement_shape(statement: str) -> str:
+    """The statement with its placeholders folded, so that the same query
+    run with other values has the same shape."""
+    shape = _PLACEHOLDER.sub("?", _WHITESPACE.sub(" ", statement.strip()))
+    return _PLACEHOLDER_LIST.sub("(?, ...)", shape)
+
+
+class RepeatedQueryError(RuntimeError):
+    def __init__(self, shape: str, count: int):
+        super().__init__(f"statement run {count} times in one request: {shape}")
+        self.shape = shape
+        self.count = count
+
+
+class QueryCounter:
+    def __init__(self, raise_at: int | None = None):
+        self.statements: list[str] = []
+        self.shapes: Counter[str] = Counter()
+        self.raise_at = raise_at
+
+        # the threads of a request share its counter.
+        self._lock = threading.Lock()
+
+    def record(self, statement: str) -> None:
+        shape = statement_shape(statement)
+        with self._lock:
+            self.statements.append(statement)
+            self.shapes[shape] += 1
+            count = self.shapes[shape]
+        if self.raise_at is not None and count >= self.raise_at:
+            raise RepeatedQueryError(shape, count)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def repeated(self, threshold: int) -> dict[str, int]:
+        """The shapes run ``threshold`` times or more."""
+        return {
+            shape: count for shape, count in self.shapes.items() if count >= threshold
+        }
+
+
+# the counter of the request being handled.
+_request_counter: ContextVar[QueryCounter | None] = ContextVar(
+    "request_query_counter", default=None
+)
+# the counters of the assert_max_queries blocks the context is in.
+_budget_counters: ContextVar[tuple[QueryCounter, ...]] = ContextVar(
+    "budget_query_counters", default=()
+)
+
+
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    counter = _request_counter.get()
+    if counter is not None:
+        counter.record(statement)
+
+    for counter in _budget_counters.get():
+        counter.record(statement)
+
+
+def count_statements() -> None:
+    """Hook the counters on every engine, once."""
+    if not event.contains(Engine, "before_cursor_execute", _count_statement):
+        event.listen(Engine, "before_cursor_execute", _count_statement)
+
+
+@contextmanager
+def assert_max_queries(limit: int) -> Iterator[QueryCounter]:
+    """Fail with an ``AssertionError`` listing the statements if the block
+    runs more than ``limit`` of them, in its context."""
+    count_statements()
+    counter = QueryCounter()
+    token = _budget_counters.set((*_budget_counters.get(), counter))
+    try:
+        yield counter
+    finally:
+        _budget_counters.reset(token)
+
+    if counter.count > limit:
+        statements = "\n".join(f"  {statement}" for statement in counter.statements)
+        raise AssertionError(
+            f"expected at most {limit} statements, ran {counter.count}:\n{statements}"
+        )
+
+
+class RepeatedQueryMiddleware:
+    """Counts the statements of every request and reports repeated shapes."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        counter = QueryCounter(
+            raise_at=N_PLUS_ONE_THRESHOLD if N_PLUS_ONE == "raise" else None
+        )
+        token = _request_counter.set(counter)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_counter.reset(token)
+
+        request = f"{scope['method']} {scope['path']}"
+        logger.debug("{} ran {} statements", request, counter.count)
+        for shape, count in counter.repeated(N_PLUS_ONE_THRESHOLD).items():
+            logger.warning("{} ran {} times, likely N+1: {}", request, count, shape)
+
+
+def detect_repeated_queries(app: FastAPI) -> None:
+    if N_PLUS_ONE == "off":
+        return
+
+    count_statements()
+    app.add_middleware(RepeatedQueryMiddleware)
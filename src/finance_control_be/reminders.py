@@ -0,0 +1,325 @@
+"""Payment reminders, written to the ``outbox`` ahead of each payment.
+
+Every active subscription has a row in ``reminder_due_dates`` holding its
+next payment date, which the transactions writing subscriptions keep up to
+date. A scheduler pass claims the due dates within the lead window in
+batches with ``FOR UPDATE SKIP LOCKED``, so that any number of worker
+processes can run it side by side, writes a reminder for each to the outbox
+and advances the due dates past the occurrence; the outbox holds one
+reminder per occurrence, however often it is scheduled. Dispatchers lease
+outbox events before delivering them, and an event whose lease expired
+without being marked as sent is claimed again.
+
+    python -m finance_control_be.reminders schedule [--today YYYY-MM-DD]
+    python -m finance_control_be.reminders backfill
+
+With ``FC_REMINDER_INTERVAL`` set, the server also runs a pass every that
+many seconds.
+"""
+
+import argparse
+import asyncio
+from datetime import date, datetime, timedelta
+from typing import Any, Iterable, Mapping
+from uuid import UUID
+
+from loguru import logger
+from sqlalchemy import (
+    Date,
+    Executable,
+    Row,
+    column,
+    delete,
+    func,
+    or_,
+    select,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import UUID as SqlUUID, insert as pg_insert
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from finance_control_be.const import REMINDER_BATCH_SIZE, REMINDER_LEAD_DAYS
+from finance_control_be.database import SessionLocal
+from finance_control_be.models.method import Method
+from finance_control_be.models.recurrence import next_occurrence
+from finance_control_be.models.reminder import OutboxEvent, ReminderDueDate
+from finance_control_be.models.subscription import Subscription
+
+REMINDER_KIND = "payment_reminder"
+BACKFILL_CHUNK_SIZE = 1000
+
+# the columns of a subscription that its due date depends on.
+SCHEDULE_COLUMNS = frozenset({"purchased_at", "period", "period_unit", "is_active"})
+schedule_columns = (
+    Subscription.id,
+    Subscription.purchased_at,
+    Subscription.period,
+    Subscription.period_unit,
+    Subscription.is_active,
+)
+
+
+def reschedule_statements(
+    subscriptions: Iterable[Mapping[str, Any]], today: date
+) -> list[Executable]:
+    """The statements updating the due dates of the subscriptions, given
+    the values of their ``schedule_columns``."""
+    due_dates = []
+    inactive = []
+    for subscription in subscriptions:
+        if not subscription["is_active"]:
+            inactive.append(subscription["id"])
+            continue
+
+        due_dates.append(
+            {
+                "subscription_id": subscription["id"],
+                "due_on": next_occurrence(
+                    subscription["purchased_at"],
+                    subscription["period"],
+                    subscription["period_unit"],
+                    after=today,
+                ),
+            }
+        )
+
+    statements: list[Executable] = []
+    if due_dates:
+        statement = pg_insert(ReminderDueDate).values(due_dates)
+        statements.append(
+            statement.on_conflict_do_update(
+                index_elements=[ReminderDueDate.subscription_id],
+                set_={"due_on": statement.excluded.due_on},
+            )
+        )
+    if inactive:
+        statements.append(
+            delete(ReminderDueDate).where(ReminderDueDate.subscription_id.in_(inactive))
+        )
+
+    return statements
+
+
+def schedule_batch(
+    session: Session, today: date, lead_days: int, batch_size: int
+) -> int:
+    """Write the reminders of one batch of due dates; return its size."""
+    due = session.execute(
+        select(
+            ReminderDueDate.subscription_id,
+            ReminderDueDate.due_on,
+            Subscription.name,
+            Subscription.price,
+            Subscription.currency,
+            Subscription.purchased_at,
+            Subscription.period,
+            Subscription.period_unit,
+            Subscription.method_id,
+            Method.username,
+        )
+        .join(Subscription, ReminderDueDate.subscription_id == Subscription.id)
+        .join(Method, Subscription.method_id == Method.id)
+        .where(ReminderDueDate.due_on <= today + timedelta(days=lead_days))
+        .order_by(ReminderDueDate.due_on)
+        .limit(batch_size)
+        .with_for_update(of=ReminderDueDate, skip_locked=True)
+    ).all()
+    if not due:
+        return 0
+
+    # due dates that passed while nothing ran are skipped without reminder.
+    reminders = [
+        {
+            "kind": REMINDER_KIND,
+            "username": row.username,
+            "subscription_id": row.subscription_id,
+            "occurrence": row.due_on,
+            "payload": {
+                "method_id": str(row.method_id),
+                "name": row.name,
+                "price": str(row.price),
+                "currency": row.currency,
+            },
+        }
+        for row in due
+        if row.due_on >= today
+    ]
+    if reminders:
+        session.execute(
+            pg_insert(OutboxEvent)
+            .values(reminders)
+            .on_conflict_do_nothing(
+                index_elements=["kind", "subscription_id", "occurrence"]
+            )
+        )
+
+    advanced = values(
+        column("subscription_id", SqlUUID(as_uuid=True)),
+        column("due_on", Date()),
+        name="advanced",
+    ).data(
+        [
+            (
+                row.subscription_id,
+                next_occurrence(
+                    row.purchased_at,
+                    row.period,
+                    row.period_unit,
+                    after=max(row.due_on, today - timedelta(days=1)),
+                ),
+            )
+            for row in due
+        ]
+    )
+    session.execute(
+        update(ReminderDueDate)
+        .where(ReminderDueDate.subscription_id == advanced.c.subscription_id)
+        .values(due_on=advanced.c.due_on)
+        .execution_options(synchronize_session=False)
+    )
+    session.commit()
+
+    return len(due)
+
+
+def schedule_reminders(
+    session: Session,
+    today: date,
+    lead_days: int = REMINDER_LEAD_DAYS,
+    batch_size: int = REMINDER_BATCH_SIZE,
+) -> int:
+    """Write the reminders of every due date within the lead window."""
+    scheduled = 0
+    while count := schedule_batch(session, today, lead_days, batch_size):
+        scheduled += count
+        if count < batch_size:
+            break
+
+    return scheduled
+
+
+def backfill_due_dates(
+    session: Session, today: date, chunk_size: int = BACKFILL_CHUNK_SIZE
+) -> int:
+    """Compute the due date of every active subscription, in keyset chunks."""
+    backfilled = 0
+    after: UUID | None = None
+    while True:
+        statement = (
+            select(*schedule_columns)
+            .where(Subscription.is_active.is_(True))
+            .order_by(Subscription.id)
+            .limit(chunk_size)
+            # keeps concurrent writes from rescheduling the chunk meanwhile.
+            .with_for_update()
+        )
+        if after is not None:
+            statement = statement.where(Subscription.id > after)
+        rows = session.execute(statement).all()
+        if not rows:
+            return backfilled
+
+        for statement in reschedule_statements((row._mapping for row in rows), today):
+            session.execute(statement)
+        session.commit()
+
+        backfilled += len(rows)
+        after = rows[-1].id
+
+
+def claim_outbox_events(
+    session: Session, worker: str, batch_size: int, lease: timedelta
+) -> list[Row]:
+    """Lease a batch of undelivered events to the worker."""
+    claimable = (
+        select(OutboxEvent.id)
+        .where(
+            OutboxEvent.sent_at.is_(None),
+            or_(
+                OutboxEvent.leased_until.is_(None),
+                OutboxEvent.leased_until < func.now(),
+            ),
+        )
+        .order_by(OutboxEvent.created_at)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    events = session.execute(
+        update(OutboxEvent)
+        .where(OutboxEvent.id.in_(claimable.scalar_subquery()))
+        .values(leased_by=worker, leased_until=func.now() + lease)
+        .returning(
+            OutboxEvent.id,
+            OutboxEvent.kind,
+            OutboxEvent.username,
+            OutboxEvent.subscription_id,
+            OutboxEvent.occurrence,
+            OutboxEvent.payload,
+        )
+        .execution_options(synchronize_session=False)
+    ).all()
+    session.commit()
+
+    return events
+
+
+def mark_outbox_events_sent(
+    session: Session, worker: str, event_ids: list[UUID]
+) -> int:
+    """Mark events delivered, as long as the worker still holds their lease."""
+    marked = session.execute(
+        update(OutboxEvent)
+        .where(
+            OutboxEvent.id.in_(event_ids),
+            OutboxEvent.leased_by == worker,
+            OutboxEvent.sent_at.is_(None),
+        )
+        .values(sent_at=func.now(), leased_until=None)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    session.commit()
+
+    return marked
+
+
+async def schedule_reminders_periodically(interval: float) -> None:
+    """Run a scheduler pass every ``interval`` seconds, until cancelled."""
+
+    def run() -> int:
+        with SessionLocal() as session:
+            return schedule_reminders(session, datetime.now().date())
+
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            scheduled = await run_in_threadpool(run)
+        except Exception as e:
+            logger.error("reminder scheduling failed: {} {}", type(e), e)
+            continue
+
+        if scheduled:
+            logger.info("scheduled reminders for {} due dates", scheduled)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Write payment reminders to the outbox."
+    )
+    parser.add_argument("command", choices=["schedule", "backfill"])
+    parser.add_argument("--today", type=date.fromisoformat, default=None)
+    arguments = parser.parse_args()
+    today = arguments.today or datetime.now().date()
+
+    with SessionLocal() as session:
+        if arguments.command == "backfill":
+            count = backfill_due_dates(session, today)
+            print(f"computed the due dates of {count} subscriptions")
+        else:
+            count = schedule_reminders(session, today)
+            print(f"scheduled reminders for {count} due dates")
+
+
+if __name__ == "__main__":
+    main()
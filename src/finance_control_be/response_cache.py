@@ -0,0 +1,282 @@
+"""Storage for cached GET responses.
+
+Responses are keyed by their ETag, which covers the user, the URL and the
+version of the user (see ``dependencies.etag``): a write moves the user to
+new keys, whichever process or job made it, and the entries of the old
+version are never read again and age out. Backends are bounded by the
+total size of the entries and evict the least recently used ones first.
+
+``FC_RESPONSE_CACHE`` selects the backend:
+
+- ``memory`` (default): per process;
+- ``sqlite:<path>``: a SQLite file shared by the worker processes of a host;
+- ``off``: no caching.
+"""
+
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Protocol
+
+from finance_control_be.cache import CacheStatistics
+from finance_control_be.const import RESPONSE_CACHE, RESPONSE_CACHE_SIZE
+
+
+class ResponseCacheBackend(Protocol):
+    def get(self, key: str) -> bytes | None:
+        ...
+
+    def set(self, key: str, value: bytes) -> None:
+        ...
+
+    def statistics(self) -> CacheStatistics:
+        ...
+
+
+class MemoryResponseCacheBackend:
+    """A thread-safe LRU cache holding at most ``max_bytes`` of values."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self._misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def set(self, key: str, value: bytes) -> None:
+        if len(value) > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._entries[key] = value
+            self._size += len(value)
+
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+                self._evictions += 1
+
+    def statistics(self) -> CacheStatistics:
+        with self._lock:
+            return CacheStatistics(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                size=len(self._entries),
+                max_size=self.max_bytes,
+            )
+
+
+class SqliteResponseCacheBackend:
+    """An LRU cache in a SQLite file, holding at most ``max_bytes`` of values
+    across all the processes using the file. Hits and misses are counted
+    per process.
+
+    Lookups only read, so that they never wait on the write lock of the
+    file: each process collects the keys it hit and records their use in
+    one write transaction every ``TOUCH_BATCH`` hits, or with its next
+    ``set``. The eviction order is thus only approximately LRU."""
+
+    # entries evicted at a time once the file is over its size.
+    EVICTION_BATCH = 16
+    # hits whose use is recorded at a time.
+    TOUCH_BATCH = 64
+    # seconds to wait for another process holding the file.
+    BUSY_TIMEOUT = 0.1
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        # the keys hit since their use was last recorded, oldest first, and
+        # the number of hits.
+        self._touched: dict[str, None] = {}
+        self._touches = 0
+
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                used_at INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS ix_entries_used_at ON entries (used_at);
+
+            -- the total size of the values, kept by triggers.
+            CREATE TABLE IF NOT EXISTS size (total INTEGER NOT NULL);
+            INSERT INTO size SELECT 0 WHERE NOT EXISTS (SELECT * FROM size);
+            CREATE TRIGGER IF NOT EXISTS entries_insert
+            AFTER INSERT ON entries BEGIN
+                UPDATE size SET total = total + length(NEW.value);
+            END;
+            CREATE TRIGGER IF NOT EXISTS entries_update
+            AFTER UPDATE OF value ON entries BEGIN
+                UPDATE size SET total = total + length(NEW.value) - length(OLD.value);
+            END;
+            CREATE TRIGGER IF NOT EXISTS entries_delete
+            AFTER DELETE ON entries BEGIN
+                UPDATE size SET total = total - length(OLD.value);
+            END;
+            """
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        # SQLite connections must stay on the thread that opened them.
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(
+                self.path, timeout=self.BUSY_TIMEOUT, isolation_level=None
+            )
+            self._local.connection = connection
+        return connection
+
+    def _count(self, hit: bool = False, miss: bool = False, evicted: int = 0) -> None:
+        with self._lock:
+            self._hits += hit
+            self._misses += miss
+            self._evictions += evicted
+
+    def _take_touched(self, after_hits: int = 0) -> list[str]:
+        with self._lock:
+            if self._touches < after_hits:
+                return []
+            touched, self._touched, self._touches = list(self._touched), {}, 0
+            return touched
+
+    @staticmethod
+    def _record_use(connection: sqlite3.Connection, keys: list[str]) -> None:
+        """Mark the keys as the most recently used, in order."""
+        if not keys:
+            return
+
+        (last,) = connection.execute(
+            "SELECT coalesce(max(used_at), 0) FROM entries"
+        ).fetchone()
+        connection.executemany(
+            "UPDATE entries SET used_at = ? WHERE key = ?",
+            [(last + i, key) for i, key in enumerate(keys, 1)],
+        )
+
+    def get(self, key: str) -> bytes | None:
+        connection = self._connection()
+        try:
+            row = connection.execute(
+                "SELECT value FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.OperationalError:
+            # a busy file is a miss rather than a stalled request.
+            row = None
+        if row is None:
+            self._count(miss=True)
+            return None
+
+        self._count(hit=True)
+        with self._lock:
+            self._touched.pop(key, None)
+            self._touched[key] = None
+            self._touches += 1
+
+        touched = self._take_touched(self.TOUCH_BATCH)
+        if touched:
+            try:
+                connection.execute("BEGIN IMMEDIATE")
+            except sqlite3.OperationalError:
+                # recency is a hint: drop it rather than wait.
+                return row[0]
+            try:
+                self._record_use(connection, touched)
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+
+        return row[0]
+
+    def set(self, key: str, value: bytes) -> None:
+        if len(value) > self.max_bytes:
+            return
+
+        connection = self._connection()
+        evicted = 0
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+        except sqlite3.OperationalError:
+            return
+        try:
+            # before evicting, so that the entries hit lately are kept.
+            self._record_use(connection, self._take_touched())
+            connection.execute(
+                "INSERT INTO entries (key, value, used_at) VALUES "
+                "(?, ?, (SELECT coalesce(max(used_at), 0) + 1 FROM entries)) "
+                "ON CONFLICT (key) DO UPDATE SET "
+                "value = excluded.value, used_at = excluded.used_at",
+                (key, value),
+            )
+            while self._total(connection) > self.max_bytes:
+                evicted += connection.execute(
+                    "DELETE FROM entries WHERE key IN "
+                    "(SELECT key FROM entries ORDER BY used_at LIMIT ?)",
+                    (self.EVICTION_BATCH,),
+                ).rowcount
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+        self._count(evicted=evicted)
+
+    @staticmethod
+    def _total(connection: sqlite3.Connection) -> int:
+        return connection.execute("SELECT total FROM size").fetchone()[0]
+
+    def statistics(self) -> CacheStatistics:
+        connection = self._connection()
+        (size,) = connection.execute("SELECT count(*) FROM entries").fetchone()
+        with self._lock:
+            return CacheStatistics(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                size=size,
+                max_size=self.max_bytes,
+            )
+
+
+def create_response_cache_backend(
+    spec: str = RESPONSE_CACHE, max_bytes: int = RESPONSE_CACHE_SIZE
+) -> ResponseCacheBackend | None:
+    if spec == "off":
+        return None
+    if spec == "memory":
+        return MemoryResponseCacheBackend(max_bytes)
+    if spec.startswith("sqlite:"):
+        return SqliteResponseCacheBackend(spec.removeprefix("sqlite:"), max_bytes)
+
+    raise ValueError(f"Invalid FC_RESPONSE_CACHE: {spec}")
+
+
+response_cache = create_response_cache_backend()
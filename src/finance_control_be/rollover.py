@@ -0,0 +1,214 @@
+"""Rollover of subscription purchase dates.
+
+Every occurrence of a subscription is computed from ``purchased_at``, which
+only moves when the user marks it as purchased; this job advances it to the
+latest occurrence up to today for every active subscription. It walks the
+subscriptions in keyset chunks, each advanced by one ``UPDATE … FROM
+(VALUES …)`` in its own transaction, so it only ever locks one chunk of
+rows and never the table:
+
+    python -m finance_control_be.rollover [--chunk-size N] [--today YYYY-MM-DD]
+
+With ``FC_ROLLOVER_INTERVAL`` set, the server also runs it every that many
+seconds; an advisory lock keeps concurrent runs, from several worker
+processes or the CLI, from overlapping. Subscriptions whose schedule is
+invalid, such as a legacy period of 0, are skipped and counted.
+"""
+
+import argparse
+import asyncio
+import time
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Callable
+from uuid import UUID
+
+from loguru import logger
+from sqlalchemy import Date, column, func, select, update, values
+from sqlalchemy.dialects.postgresql import UUID as SqlUUID
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from finance_control_be.const import ROLLOVER_CHUNK_SIZE
+from finance_control_be.database import SessionLocal, engine
+from finance_control_be.models.recurrence import rollover_anchor
+from finance_control_be.models.subscription import Subscription
+from finance_control_be.versioning import bump_versions_of_methods
+
+# the key of the advisory lock held while a rollover runs.
+ROLLOVER_LOCK_ID = 0x66635F726F6C6C
+
+
+@dataclass
+class RolloverProgress:
+    scanned: int = 0
+    rolled: int = 0
+    skipped: int = 0
+    seconds: float = 0
+
+
+def rollover_chunk(
+    session: Session, today: date, after: UUID | None, chunk_size: int
+) -> tuple[int, int, int, UUID | None]:
+    """Advance one chunk of subscriptions; return how many were scanned,
+    advanced and skipped, and the id to continue after (``None`` once done)."""
+    statement = (
+        select(
+            Subscription.id,
+            Subscription.purchased_at,
+            Subscription.period,
+            Subscription.period_unit,
+            Subscription.method_id,
+        )
+        .where(Subscription.is_active.is_(True), Subscription.purchased_at < today)
+        .order_by(Subscription.id)
+        .limit(chunk_size)
+    )
+    if after is not None:
+        statement = statement.where(Subscription.id > after)
+    rows = session.execute(statement).all()
+    if not rows:
+        return 0, 0, 0, None
+
+    rolled = []
+    skipped = 0
+    method_ids = set()
+    for row in rows:
+        try:
+            anchor = rollover_anchor(
+                row.purchased_at, row.period, row.period_unit, today
+            )
+        except ValueError as e:
+            logger.warning("rollover skipped subscription {}: {}", row.id, e)
+            skipped += 1
+            continue
+
+        if anchor != row.purchased_at:
+            rolled.append((row.id, row.purchased_at, anchor))
+            method_ids.add(row.method_id)
+
+    if rolled:
+        advanced = values(
+            column("id", SqlUUID(as_uuid=True)),
+            column("previous", Date()),
+            column("purchased_at", Date()),
+            name="advanced",
+        ).data(rolled)
+        # a subscription changed since it was read is left for the next run.
+        session.execute(
+            update(Subscription)
+            .where(
+                Subscription.id == advanced.c.id,
+                Subscription.purchased_at == advanced.c.previous,
+            )
+            .values(purchased_at=advanced.c.purchased_at)
+            .execution_options(synchronize_session=False)
+        )
+        # the purchase dates are part of what the owners list.
+        session.execute(bump_versions_of_methods(method_ids))
+    session.commit()
+
+    return len(rows), len(rolled), skipped, rows[-1].id
+
+
+def rollover(
+    session: Session,
+    today: date,
+    chunk_size: int = ROLLOVER_CHUNK_SIZE,
+    on_progress: Callable[[RolloverProgress], None] | None = None,
+) -> RolloverProgress:
+    started_at = time.perf_counter()
+    progress = RolloverProgress()
+
+    after = None
+    while True:
+        scanned, rolled, skipped, after = rollover_chunk(
+            session, today, after, chunk_size
+        )
+        progress.scanned += scanned
+        progress.rolled += rolled
+        progress.skipped += skipped
+        progress.seconds = time.perf_counter() - started_at
+        if after is None:
+            return progress
+
+        if on_progress is not None:
+            on_progress(progress)
+
+
+def run_rollover(
+    today: date | None = None,
+    chunk_size: int = ROLLOVER_CHUNK_SIZE,
+    on_progress: Callable[[RolloverProgress], None] | None = None,
+) -> RolloverProgress | None:
+    """Run a rollover, unless one is already running (then return ``None``)."""
+    # a session-level advisory lock lives on its connection, which is kept
+    # out of the chunk transactions and out of any transaction at all.
+    with engine.connect().execution_options(
+        isolation_level="AUTOCOMMIT"
+    ) as lock_connection:
+        locked = lock_connection.scalar(
+            select(func.pg_try_advisory_lock(ROLLOVER_LOCK_ID))
+        )
+        if not locked:
+            return None
+
+        try:
+            with SessionLocal() as session:
+                return rollover(
+                    session,
+                    today or datetime.now().date(),
+                    chunk_size,
+                    on_progress,
+                )
+        finally:
+            lock_connection.scalar(select(func.pg_advisory_unlock(ROLLOVER_LOCK_ID)))
+
+
+async def schedule_rollover(interval: float) -> None:
+    """Run a rollover every ``interval`` seconds, until cancelled."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            progress = await run_in_threadpool(run_rollover)
+        except Exception as e:
+            logger.error("rollover failed: {} {}", type(e), e)
+            continue
+
+        if progress is not None:
+            logger.info(
+                "rollover advanced {} of {} subscriptions in {:.1f}s, skipped {}",
+                progress.rolled,
+                progress.scanned,
+                progress.seconds,
+                progress.skipped,
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Advance the purchase date of every active subscription."
+    )
+    parser.add_argument("--chunk-size", type=int, default=ROLLOVER_CHUNK_SIZE)
+    parser.add_argument("--today", type=date.fromisoformat, default=None)
+    arguments = parser.parse_args()
+
+    def report(progress: RolloverProgress) -> None:
+        print(
+            f"scanned {progress.scanned}, advanced {progress.rolled} "
+            f"({progress.scanned / (progress.seconds or 1):.0f} rows/s)",
+            flush=True,
+        )
+
+    progress = run_rollover(arguments.today, arguments.chunk_size, report)
+    if progress is None:
+        raise SystemExit("another rollover is running")
+
+    print(
+        f"done: scanned {progress.scanned}, advanced {progress.rolled}, "
+        f"skipped {progress.skipped} in {progress.seconds:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""Incremental maintenance of ``user_spending_summary``.
+
+Every transaction that creates, changes or deletes subscriptions records the
+rows it touched in a ``SpendingDelta`` and executes its upsert before
+committing, so the summary changes atomically with the subscriptions. The
+table can be checked against, or rebuilt from, a full recomputation:
+
+    python -m finance_control_be.spending check [--username <username>]
+    python -m finance_control_be.spending rebuild [--username <username>]
+"""
+
+import argparse
+import sys
+from decimal import Decimal
+from typing import Any, Mapping
+from uuid import UUID
+
+from sqlalchemy import Row, Select, and_, delete, func, or_, select, text
+from sqlalchemy.dialects.postgresql import Insert, insert as pg_insert
+from sqlalchemy.orm import Session
+
+from finance_control_be.models.method import Method
+from finance_control_be.models.spending import UserSpendingSummary
+from finance_control_be.models.subscription import Subscription, yearly_price
+
+# the largest difference in yearly cost the check tolerates, as the
+# incremental and the full computation round differently.
+COST_TOLERANCE = Decimal("0.000001")
+
+# the columns of a subscription that the summary depends on.
+COST_COLUMNS = frozenset({"price", "currency", "period", "period_unit", "is_active"})
+cost_columns = tuple(getattr(Subscription, column) for column in sorted(COST_COLUMNS))
+
+
+class SpendingDelta:
+    """The changes a transaction makes to the spending summary of a user."""
+
+    def __init__(self, username: str):
+        self.username = username
+        self.changes: dict[tuple[UUID, str], tuple[int, int, Decimal]] = {}
+
+    def add(
+        self, method_id: UUID, subscription: Mapping[str, Any], sign: int = 1
+    ) -> None:
+        """Count a subscription, given the values of its ``COST_COLUMNS``."""
+        key = (method_id, subscription["currency"])
+        count, active_count, yearly_cost = self.changes.get(key, (0, 0, Decimal(0)))
+
+        count += sign
+        if subscription["is_active"]:
+            active_count += sign
+            yearly_cost += sign * yearly_price(
+                subscription["price"],
+                subscription["period"],
+                subscription["period_unit"],
+            )
+
+        self.changes[key] = (count, active_count, yearly_cost)
+
+    def remove(self, method_id: UUID, subscription: Mapping[str, Any]) -> None:
+        self.add(method_id, subscription, sign=-1)
+
+    def statement(self) -> Insert | None:
+        """The upsert applying the changes, or ``None`` if there are none."""
+        # sorted, so that concurrent transactions lock rows in the same order.
+        values = [
+            {
+                "username": self.username,
+                "method_id": method_id,
+                "currency": currency,
+                "subscription_count": count,
+                "active_count": active_count,
+                "yearly_cost": yearly_cost,
+            }
+            for (method_id, currency), (count, active_count, yearly_cost) in sorted(
+                self.changes.items()
+            )
+            if count or active_count or yearly_cost
+        ]
+        if not values:
+            return None
+
+        statement = pg_insert(UserSpendingSummary).values(values)
+        return statement.on_conflict_do_update(
+            index_elements=[
+                UserSpendingSummary.username,
+                UserSpendingSummary.method_id,
+                UserSpendingSummary.currency,
+            ],
+            set_={
+                column: getattr(UserSpendingSummary, column)
+                + statement.excluded[column]
+                for column in ("subscription_count", "active_count", "yearly_cost")
+            },
+        )
+
+
+def select_recomputed_summary(username: str | None = None) -> Select:
+    """The spending summary computed from scratch from the subscriptions."""
+    statement = (
+        select(
+            Method.username,
+            Subscription.method_id,
+            Subscription.currency,
+            func.count().label("subscription_count"),
+            func.count().filter(Subscription.is_active).label("active_count"),
+            func.coalesce(
+                func.sum(Subscription.yearly_price).filter(Subscription.is_active), 0
+            ).label("yearly_cost"),
+        )
+        .join(Method, Subscription.method_id == Method.id)
+        .group_by(Method.username, Subscription.method_id, Subscription.currency)
+    )
+    if username is not None:
+        statement = statement.where(Method.username == username)
+
+    return statement
+
+
+def rebuild_summary(session: Session, username: str | None = None) -> None:
+    """Replace the summary of the user, or of everyone, with a recomputation."""
+    # writers upsert the summary in the same transaction as their
+    # subscription changes, so holding this lock means every committed
+    # change is visible to the recomputation and no new one can slip in.
+    session.execute(
+        text("LOCK TABLE user_spending_summary IN SHARE ROW EXCLUSIVE MODE")
+    )
+
+    statement = delete(UserSpendingSummary)
+    if username is not None:
+        statement = statement.where(UserSpendingSummary.username == username)
+    session.execute(statement)
+
+    recomputed = select_recomputed_summary(username)
+    session.execute(
+        pg_insert(UserSpendingSummary).from_select(
+            [column.key for column in recomputed.selected_columns], recomputed
+        )
+    )
+    session.commit()
+
+
+def check_summary(session: Session, username: str | None = None) -> list[Row]:
+    """The keys whose stored summary differs from a full recomputation."""
+    recomputed = select_recomputed_summary(username).subquery("recomputed")
+
+    stored_statement = select(UserSpendingSummary).where(
+        # rows whose subscriptions are all gone are left at zero.
+        or_(
+            UserSpendingSummary.subscription_count != 0,
+            UserSpendingSummary.active_count != 0,
+            UserSpendingSummary.yearly_cost != 0,
+        )
+    )
+    if username is not None:
+        stored_statement = stored_statement.where(
+            UserSpendingSummary.username == username
+        )
+    stored = stored_statement.subquery("stored")
+
+    return session.execute(
+        select(
+            func.coalesce(recomputed.c.username, stored.c.username).label("username"),
+            func.coalesce(recomputed.c.method_id, stored.c.method_id).label(
+                "method_id"
+            ),
+            func.coalesce(recomputed.c.currency, stored.c.currency).label("currency"),
+            recomputed.c.subscription_count.label("expected_subscription_count"),
+            stored.c.subscription_count,
+            recomputed.c.active_count.label("expected_active_count"),
+            stored.c.active_count,
+            recomputed.c.yearly_cost.label("expected_yearly_cost"),
+            stored.c.yearly_cost,
+        )
+        .select_from(
+            recomputed.join(
+                stored,
+                and_(
+                    recomputed.c.username == stored.c.username,
+                    recomputed.c.method_id == stored.c.method_id,
+                    recomputed.c.currency == stored.c.currency,
+                ),
+                full=True,
+            )
+        )
+        .where(
+            or_(
+                recomputed.c.username.is_(None),
+                stored.c.username.is_(None),
+                recomputed.c.subscription_count != stored.c.subscription_count,
+                recomputed.c.active_count != stored.c.active_count,
+                func.abs(recomputed.c.yearly_cost - stored.c.yearly_cost)
+                > COST_TOLERANCE,
+            )
+        )
+    ).all()
+
+
+def main() -> None:
+    from finance_control_be.database import SessionLocal
+
+    parser = argparse.ArgumentParser(
+        description="Check or rebuild the spending summary table."
+    )
+    parser.add_argument("command", choices=["check", "rebuild"])
+    parser.add_argument("--username", help="only this user (default: everyone)")
+    arguments = parser.parse_args()
+
+    with SessionLocal() as session:
+        if arguments.command == "rebuild":
+            rebuild_summary(session, arguments.username)
+            print("rebuilt the spending summary")
+            return
+
+        mismatches = check_summary(session, arguments.username)
+
+    for mismatch in mismatches:
+        print(dict(mismatch._mapping))
+    print(f"{len(mismatches)} mismatching rows")
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""Per-user version counters.
+
+The ``user_versions`` row of a user is incremented in the transaction of
+every write to their methods or subscriptions, so reading that row alone
+tells whether anything the user can list has changed.
+"""
+
+from typing import Iterable
+from uuid import UUID
+
+from sqlalchemy import Select, literal, select
+from sqlalchemy.dialects.postgresql import Insert, insert as pg_insert
+
+from finance_control_be.models.method import Method
+from finance_control_be.models.user_version import UserVersion
+
+
+def _increment(statement: Insert) -> Insert:
+    return statement.on_conflict_do_update(
+        index_elements=[UserVersion.username],
+        set_={"version": UserVersion.version + 1},
+    )
+
+
+def bump_version(username: str) -> Insert:
+    """The statement incrementing the version of the user."""
+    return _increment(pg_insert(UserVersion).values(username=username, version=1))
+
+
+def bump_versions_of_methods(method_ids: Iterable[UUID] | Select) -> Insert:
+    """The statement incrementing the versions of the owners of the methods."""
+    owners = (
+        select(Method.username, literal(1))
+        .where(Method.id.in_(method_ids))
+        .distinct()
+        # the same lock order in every transaction.
+        .order_by(Method.username)
+    )
+    return _increment(
+        pg_insert(UserVersion).from_select(["username", "version"], owners)
+    )
@@ -0,0 +1,75 @@
+"""Tests run the app against the PostgreSQL database in FC_DATABASE_URI,
+whose tables they empty before every test; point it to a disposable one:
+
+    FC_DATABASE_URI=postgresql://…/finance_control_test pytest
+"""
+
+import os
+
+import pytest
+
+# the response cache would answer across tests, whose versions restart at 0.
+os.environ.setdefault("FC_RESPONSE_CACHE", "off")
+
+if not os.environ.get("FC_DATABASE_URI"):
+    collect_ignore_glob = ["test_*.py"]
+
+    def pytest_report_header() -> str:
+        return "FC_DATABASE_URI is not set: skipping the database tests"
+
+else:
+    from fastapi.testclient import TestClient
+    from sqlalchemy import text
+    from sqlalchemy.orm import Session
+
+    from finance_control_be.app import app
+    from finance_control_be.auth.jwt import create_access_token_manager
+    from finance_control_be.auth.password import PasswordManager
+    from finance_control_be.auth.principal import principal_cache
+    from finance_control_be.database import SessionLocal, recent_writers
+    from finance_control_be.exchange_rates import rate_cache
+    from finance_control_be.models import Base
+    from finance_control_be.models.user import User
+
+    @pytest.fixture(autouse=True)
+    def empty_tables() -> None:
+        tables = ", ".join(table.name for table in Base.metadata.sorted_tables)
+        with SessionLocal() as session:
+            session.execute(text(f"TRUNCATE {tables} CASCADE"))
+            session.commit()
+        principal_cache.clear()
+        rate_cache.clear()
+        recent_writers.clear()
+
+    @pytest.fixture
+    def session() -> Session:
+        with SessionLocal() as session:
+            yield session
+
+    @pytest.fixture(scope="session")
+    def client() -> TestClient:
+        # one client for the whole run, so that the async engine's pooled
+        # connections stay on the same event loop.
+        with TestClient(app) as client:
+            yield client
+
+    @pytest.fixture
+    def username(session: Session) -> str:
+        user = User.new_hashed(password="password", password_manager=PasswordManager())
+        user.username = "tester"
+        session.add(user)
+        session.commit()
+        return user.username
+
+    @pytest.fixture
+    def headers(username: str) -> dict[str, str]:
+        token = create_access_token_manager()._create_access_token({"sub": username})
+        return {"Authorization": f"Bearer {token}"}
+
+    @pytest.fixture
+    def method_id(client: TestClient, headers: dict[str, str]) -> str:
+        response = client.post(
+            "/methods/", json={"name": "card", "kind": "credit_card"}, headers=headers
+        )
+        assert response.status_code == 201, response.text
+        return response.json()["id"]
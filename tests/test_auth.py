@@ -0,0 +1,178 @@
+import asyncio
+import threading
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from typing import Iterator
+
+import pytest
+
+from finance_control_be.auth.exceptions import (
+    InvalidTokenException,
+    PasswordHasherBusyException,
+)
+from finance_control_be.auth.jwt import AccessTokenManager, create_access_token_manager
+from finance_control_be.auth.password import HashingExecutor
+from finance_control_be.auth.principal import principal_cache
+from finance_control_be.models.user import User
+from finance_control_be.query_budget import assert_max_queries
+
+
+@contextmanager
+def occupied(executor: HashingExecutor, calls: int) -> Iterator[None]:
+    """Keep ``calls`` calls of the executor in flight until the block exits."""
+    release = threading.Event()
+    threads = [
+        threading.Thread(target=asyncio.run, args=(executor.run(release.wait),))
+        for _ in range(calls)
+    ]
+    for thread in threads:
+        thread.start()
+    try:
+        deadline = time.monotonic() + 5
+        while executor.in_flight < calls:
+            assert time.monotonic() < deadline, "the calls were not admitted"
+            time.sleep(0.01)
+        yield
+    finally:
+        release.set()
+        for thread in threads:
+            thread.join()
+
+
+@pytest.fixture
+def busy_executor(monkeypatch) -> Iterator[HashingExecutor]:
+    """A full executor in place of the one logins and registrations use."""
+    executor = HashingExecutor(max_workers=1, max_queued=0)
+    password_manager = create_access_token_manager().get_password_manager()
+    monkeypatch.setattr(password_manager, "executor", executor)
+    with occupied(executor, 1):
+        yield executor
+
+
+def test_the_executor_rejects_calls_over_its_capacity():
+    executor = HashingExecutor(max_workers=1, max_queued=1)
+
+    with occupied(executor, 2):
+        with pytest.raises(PasswordHasherBusyException):
+            asyncio.run(executor.run(lambda: None))
+
+    # the calls that finished free their slots.
+    assert asyncio.run(executor.run(lambda: 42)) == 42
+    assert executor.in_flight == 0
+
+
+def test_logins_are_rejected_while_the_hashers_are_busy(
+    client, username, busy_executor
+):
+    response = client.post(
+        "/token", data={"username": username, "password": "password"}
+    )
+
+    assert response.status_code == 503, response.text
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_registrations_are_rejected_while_the_hashers_are_busy(client, busy_executor):
+    response = client.post(
+        "/register", json={"username": "newcomer", "password": "password"}
+    )
+
+    assert response.status_code == 503, response.text
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_logins_go_through_once_the_hashers_are_free(client, username):
+    response = client.post(
+        "/token", data={"username": username, "password": "password"}
+    )
+
+    assert response.status_code == 200, response.text
+    assert response.json()["token_type"] == "bearer"
+
+
+def test_the_principal_is_cached_between_requests(client, headers):
+    assert client.get("/users/me", headers=headers).status_code == 200
+
+    with assert_max_queries(1) as counter:
+        response = client.get("/users/me", headers=headers)
+
+    assert response.status_code == 200, response.text
+    assert not any("FROM users" in statement for statement in counter.statements)
+
+
+def test_disabling_a_user_invalidates_the_principal(client, headers, session):
+    assert client.get("/users/me", headers=headers).status_code == 200
+
+    session.get(User, "tester").disabled = True
+    session.commit()
+
+    response = client.get("/users/me", headers=headers)
+    assert response.status_code == 400, response.text
+    assert response.json()["detail"] == "Inactive user"
+
+
+def test_changing_a_user_invalidates_the_principal(client, headers, session):
+    assert client.get("/users/me", headers=headers).json()["full_name"] is None
+
+    user = session.get(User, "tester")
+    user.full_name = "Test User"
+    user.email = "tester@example.com"
+    session.commit()
+
+    response = client.get("/users/me", headers=headers)
+    assert response.status_code == 200, response.text
+    assert response.json() == {
+        "username": "tester",
+        "full_name": "Test User",
+        "email": "tester@example.com",
+    }
+
+
+def test_a_rolled_back_change_keeps_the_principal(client, headers, session):
+    client.get("/users/me", headers=headers)
+
+    session.get(User, "tester").disabled = True
+    session.flush()
+    session.rollback()
+
+    assert client.get("/users/me", headers=headers).status_code == 200
+    assert principal_cache.get("tester") is not None
+
+
+def test_verified_tokens_are_reused():
+    manager = AccessTokenManager()
+    token = manager._create_access_token({"sub": "tester"})
+
+    assert manager.retrieve_info_from_token(token)["sub"] == "tester"
+    assert manager.retrieve_info_from_token(token)["sub"] == "tester"
+
+    statistics = manager.verified_tokens.statistics()
+    assert (statistics.hits, statistics.size) == (1, 1)
+
+
+def test_verified_tokens_expire_with_the_token():
+    manager = AccessTokenManager()
+    token = manager._create_access_token(
+        {"sub": "tester"}, expires_delta=timedelta(seconds=1)
+    )
+    expires_at = manager.retrieve_info_from_token(token)["exp"]
+
+    # the token is valid up to the second of its exp.
+    time.sleep(max(expires_at + 1 - time.time(), 0) + 0.1)
+
+    with pytest.raises(InvalidTokenException):
+        manager.retrieve_info_from_token(token)
+    assert manager.verified_tokens.statistics().size == 0
+
+
+def test_invalid_tokens_are_not_cached():
+    manager = AccessTokenManager()
+    token = AccessTokenManager(secret_key="other")._create_access_token(
+        {"sub": "tester"}
+    )
+
+    for _ in range(2):
+        with pytest.raises(InvalidTokenException):
+            manager.retrieve_info_from_token(token)
+    assert manager.verified_tokens.statistics().size == 0
@@ -0,0 +1,100 @@
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import func, select
+
+from finance_control_be import batch
+from finance_control_be.models.method import Method
+from finance_control_be.models.subscription import Subscription
+
+SUBSCRIPTION = {
+    "name": "streaming",
+    "price": "9.99",
+    "currency": "USD",
+    "period": 1,
+    "period_unit": "month",
+}
+
+
+@pytest.fixture
+def subscription_ids(client, headers, method_id) -> list[str]:
+    response = client.post(
+        f"/methods/{method_id}/subscriptions/batch",
+        json=[{**SUBSCRIPTION, "name": f"streaming {i}"} for i in range(3)],
+        headers=headers,
+    )
+    assert response.status_code == 200, response.text
+    assert [item["status"] for item in response.json()] == [201] * 3
+    return [item["item"]["id"] for item in response.json()]
+
+
+def test_a_batch_update_reports_every_item(
+    client, headers, method_id, subscription_ids
+):
+    first, second, _ = subscription_ids
+    unknown = str(uuid4())
+
+    response = client.patch(
+        f"/methods/{method_id}/subscriptions/batch",
+        json=[
+            {"id": second, "price": "1.50"},
+            {"id": unknown, "price": "2"},
+            {"id": first, "name": "renamed"},
+        ],
+        headers=headers,
+    )
+
+    assert response.status_code == 200, response.text
+    items = response.json()
+    assert [(item["index"], item["status"]) for item in items] == [
+        (0, 200),
+        (1, 404),
+        (2, 200),
+    ]
+    assert items[0]["item"]["price"] == "1.50"
+    assert items[1] == {"index": 1, "status": 404, "item": None, "detail": "Not Found"}
+    assert items[2]["item"]["name"] == "renamed"
+
+
+def test_a_batch_delete_reports_every_item(
+    client, headers, method_id, subscription_ids, session
+):
+    first, second, _ = subscription_ids
+
+    response = client.post(
+        f"/methods/{method_id}/subscriptions/batch/delete",
+        json=[first, str(uuid4()), second, first],
+        headers=headers,
+    )
+
+    assert response.status_code == 200, response.text
+    assert [(item["status"], item["item"]) for item in response.json()] == [
+        (204, first),
+        (404, None),
+        (204, second),
+        (204, first),
+    ]
+    assert session.scalar(select(func.count()).select_from(Subscription)) == 1
+
+
+def test_batches_over_the_size_limit_are_rejected(
+    client, headers, method_id, subscription_ids, session, monkeypatch
+):
+    monkeypatch.setattr(batch, "MAX_BATCH_SIZE", 2)
+    url = f"/methods/{method_id}/subscriptions/batch"
+
+    for method, path, items in [
+        ("POST", "/methods/batch", [{"name": "card", "kind": "cash"}] * 3),
+        ("POST", url, [SUBSCRIPTION] * 3),
+        ("PATCH", url, [{"id": id, "price": "1"} for id in subscription_ids]),
+        ("POST", f"{url}/delete", subscription_ids),
+    ]:
+        response = client.request(method, path, json=items, headers=headers)
+        assert response.status_code == 413, (method, path, response.text)
+
+    assert session.scalar(select(func.count()).select_from(Method)) == 1
+    assert session.scalar(select(func.count()).select_from(Subscription)) == 3
+    response = client.post(
+        "/methods/batch", json=[{"name": "card", "kind": "cash"}] * 2, headers=headers
+    )
+    assert response.status_code == 200, response.text
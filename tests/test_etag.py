@@ -0,0 +1,88 @@
+import pytest
+
+from finance_control_be.auth.jwt import create_access_token_manager
+from finance_control_be.auth.password import PasswordManager
+from finance_control_be.models.user import User
+
+SUBSCRIPTION = {
+    "name": "streaming",
+    "price": "9.99",
+    "currency": "USD",
+    "period": 1,
+    "period_unit": "month",
+}
+
+
+@pytest.fixture
+def subscription_id(client, headers, method_id) -> str:
+    response = client.post(
+        f"/methods/{method_id}/subscriptions/", json=SUBSCRIPTION, headers=headers
+    )
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+
+def get(client, url: str, headers, etag: str | None = None):
+    if etag is not None:
+        headers = {**headers, "If-None-Match": etag}
+    return client.get(url, headers=headers)
+
+
+def test_an_unchanged_list_is_not_modified(client, headers, method_id):
+    for url in ("/methods/", f"/methods/{method_id}", f"/methods/{method_id}/"):
+        etag = get(client, url, headers).headers["ETag"]
+
+        for if_none_match in (etag, f'"0-other", {etag}', "*"):
+            response = get(client, url, headers, if_none_match)
+            assert response.status_code == 304, (url, response.text)
+            assert response.headers["ETag"] == etag
+            assert response.content == b""
+
+        response = get(client, url, headers, '"0-other"')
+        assert response.status_code == 200, (url, response.text)
+
+
+def test_writes_change_the_etag(client, headers, method_id, subscription_id):
+    list_url = f"/methods/{method_id}/subscriptions/"
+    item_url = f"{list_url}{subscription_id}"
+    etags = {get(client, list_url, headers).headers["ETag"]}
+
+    for method, url, kwargs in [
+        ("POST", list_url, {"json": {**SUBSCRIPTION, "name": "music"}}),
+        ("PATCH", item_url, {"json": {"price": "4.99"}}),
+        ("POST", f"{item_url}/mark-purchased", {}),
+        ("PATCH", f"/methods/{method_id}", {"json": {"name": "renamed"}}),
+        ("DELETE", item_url, {}),
+    ]:
+        etag = get(client, list_url, headers).headers["ETag"]
+        response = client.request(method, url, headers=headers, **kwargs)
+        assert response.status_code < 300, (method, url, response.text)
+
+        # the old ETag no longer matches, and the list is sent again.
+        response = get(client, list_url, headers, etag)
+        assert response.status_code == 200, (method, url, response.text)
+        assert response.headers["ETag"] not in etags
+        etags.add(response.headers["ETag"])
+
+
+def test_a_patch_changing_nothing_keeps_the_etag(client, headers, method_id):
+    etag = get(client, "/methods/", headers).headers["ETag"]
+
+    response = client.patch(f"/methods/{method_id}", json={}, headers=headers)
+    assert response.status_code == 200, response.text
+
+    assert get(client, "/methods/", headers, etag).status_code == 304
+
+
+def test_etags_differ_per_user_and_url(client, headers, method_id, session):
+    other = User.new_hashed(password="password", password_manager=PasswordManager())
+    other.username = "other"
+    session.add(other)
+    session.commit()
+    token = create_access_token_manager()._create_access_token({"sub": "other"})
+    other_headers = {"Authorization": f"Bearer {token}"}
+
+    etag = get(client, "/methods/", headers).headers["ETag"]
+
+    assert get(client, "/methods/", other_headers, etag).status_code == 200
+    assert get(client, "/methods/?limit=1", headers, etag).status_code == 200
@@ -0,0 +1,76 @@
+from uuid import uuid4
+
+import pytest
+
+from finance_control_be.dependencies.pagination import NEXT_CURSOR_HEADER
+
+
+@pytest.fixture
+def subscriptions(client, headers, method_id) -> list[dict]:
+    response = client.post(
+        f"/methods/{method_id}/subscriptions/batch",
+        json=[
+            {
+                "name": f"streaming {i}",
+                "price": f"{i}.99",
+                "currency": "USD",
+                "period": 1,
+                "period_unit": "month",
+            }
+            for i in range(5)
+        ],
+        headers=headers,
+    )
+    assert response.status_code == 200, response.text
+    return [item["item"] for item in response.json()]
+
+
+def test_projected_lists_only_return_the_fields(
+    client, headers, method_id, subscriptions
+):
+    url = f"/methods/{method_id}/subscriptions/"
+    full = client.get(url, params={"sort": "-price"}, headers=headers).json()
+
+    response = client.get(
+        url, params={"sort": "-price", "fields": " price, name,price "}, headers=headers
+    )
+
+    assert response.status_code == 200, response.text
+    assert response.json() == [
+        {"price": item["price"], "name": item["name"]} for item in full
+    ]
+
+
+def test_projected_pages_follow_their_cursors(client, headers, method_id):
+    for i in range(5):
+        client.post(
+            "/methods/", json={"name": f"card {i}", "kind": "cash"}, headers=headers
+        )
+
+    names = []
+    params = {"limit": 2, "sort": "name", "fields": "name"}
+    while True:
+        response = client.get("/methods/", params=params, headers=headers)
+        assert response.status_code == 200, response.text
+        assert all(item.keys() == {"name"} for item in response.json())
+        names += [item["name"] for item in response.json()]
+        if NEXT_CURSOR_HEADER not in response.headers:
+            break
+        params["cursor"] = response.headers[NEXT_CURSOR_HEADER]
+
+    assert names == sorted(["card", *(f"card {i}" for i in range(5))])
+
+
+@pytest.mark.parametrize("fields", ["password", "name,username", "", " , "])
+def test_unknown_fields_are_rejected(client, headers, method_id, fields):
+    for url in ("/methods/", f"/methods/{method_id}/subscriptions/"):
+        response = client.get(url, params={"fields": fields}, headers=headers)
+        assert response.status_code == 400, (url, response.text)
+
+
+def test_a_projected_list_of_an_unknown_method_is_not_found(client, headers):
+    response = client.get(
+        f"/methods/{uuid4()}/subscriptions/", params={"fields": "id"}, headers=headers
+    )
+
+    assert response.status_code == 404, response.text
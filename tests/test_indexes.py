@@ -0,0 +1,136 @@
+from datetime import date
+from decimal import Decimal
+from typing import Any, Iterator
+from uuid import UUID, uuid4
+
+import pytest
+from sqlalchemy import Executable, select, text
+from sqlalchemy.orm import Session
+
+from finance_control_be.auth.principal import Principal
+from finance_control_be.controllers.method import MethodFilterParameter
+from finance_control_be.controllers.subscription import (
+    SubscriptionFilterParameter,
+    owned_subscription_criteria,
+    select_owned_subscriptions,
+)
+from finance_control_be.models.method import Kind, Method
+from finance_control_be.models.subscription import PeriodUnit, Subscription
+from finance_control_be.models.user import User
+
+
+def explain(session: Session, statement: Executable) -> dict[str, Any]:
+    compiled = statement.compile(
+        dialect=session.get_bind().dialect, compile_kwargs={"literal_binds": True}
+    )
+    # the tables are tiny: make the planner show what it would do at scale.
+    session.execute(text("SET LOCAL enable_seqscan = off"))
+    (plan,) = session.execute(text(f"EXPLAIN (FORMAT JSON) {compiled}")).scalar()
+    return plan["Plan"]
+
+
+def index_scans(
+    plan: dict[str, Any], table: str | None = None
+) -> Iterator[tuple[str, dict[str, Any]]]:
+    # a bitmap index scan names its table on the bitmap heap scan above it.
+    table = plan.get("Relation Name", table)
+    if "Index Name" in plan:
+        yield table, plan
+    for child in plan.get("Plans", ()):
+        yield from index_scans(child, table)
+
+
+def index_scan_of(plan: dict[str, Any], table: str) -> dict[str, Any]:
+    (scan,) = (scan for name, scan in index_scans(plan) if name == table)
+    return scan
+
+
+@pytest.fixture
+def owner(session: Session, username: str) -> tuple[Principal, UUID]:
+    methods = [
+        Method(
+            id=uuid4(),
+            name=f"method {i}" if i else "travel card",
+            kind=Kind.cash,
+            username=username,
+        )
+        for i in range(20)
+    ]
+    session.add_all(methods)
+    session.flush()
+    session.add_all(
+        Subscription(
+            name=f"subscription {i}" if i else "streaming",
+            price=Decimal(i),
+            currency="USD",
+            period=1,
+            period_unit=PeriodUnit.month,
+            purchased_at=date(2024, 1, 1),
+            method_id=method.id,
+        )
+        for method in methods
+        for i in range(50)
+    )
+    session.commit()
+    session.execute(text("ANALYZE"))
+
+    user = session.get(User, username)
+    return Principal.from_entity(user), methods[0].id
+
+
+def test_owned_subscription_criteria_use_the_owner_indexes(session, owner):
+    user, method_id = owner
+    criteria = owned_subscription_criteria(method_id, user)
+    plan = explain(session, select(Subscription.id).where(*criteria))
+
+    methods = index_scan_of(plan, "methods")
+    assert methods["Index Name"] == "ix_methods_username_id"
+    assert "username" in methods["Index Cond"]
+    # any of the (method_id, ...) composites serves the lookup.
+    subscriptions = index_scan_of(plan, "subscriptions")
+    assert subscriptions["Index Name"].startswith("ix_subscriptions_method_id_")
+    assert "method_id" in subscriptions["Index Cond"]
+
+
+def test_owned_subscription_page_uses_the_keyset_index(session, owner):
+    user, method_id = owner
+    plan = explain(
+        session,
+        select_owned_subscriptions(method_id, user).order_by(Subscription.id).limit(10),
+    )
+
+    assert index_scan_of(plan, "subscriptions")["Index Name"] == (
+        "ix_subscriptions_method_id_id"
+    )
+    assert index_scan_of(plan, "methods")["Index Name"] == "ix_methods_username_id"
+
+
+def test_method_page_uses_the_keyset_index(session, owner):
+    user, _ = owner
+    plan = explain(
+        session,
+        select(Method)
+        .where(Method.username == user.username)
+        .order_by(Method.id)
+        .limit(10),
+    )
+
+    assert index_scan_of(plan, "methods")["Index Name"] == "ix_methods_username_id"
+
+
+def test_searches_use_the_search_indexes(session, owner):
+    # the index expression must match the one the filters build exactly.
+    for table, index, statement in (
+        (
+            "subscriptions",
+            "ix_subscriptions_search",
+            SubscriptionFilterParameter(q="stream").apply(select(Subscription.id)),
+        ),
+        (
+            "methods",
+            "ix_methods_search",
+            MethodFilterParameter(q="travel").apply(select(Method.id)),
+        ),
+    ):
+        plan = explain(session, statement)
+        assert index_scan_of(plan, table)["Index Name"] == index
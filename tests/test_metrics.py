@@ -0,0 +1,136 @@
+import math
+import re
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import Engine, event
+
+from finance_control_be import metrics
+from finance_control_be.app import app
+from finance_control_be.const import METRICS
+
+NAME = r"[a-zA-Z_:][a-zA-Z0-9_:]*"
+LABEL = r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\\n]|\\[\\"n])*)"'
+SAMPLE = re.compile(rf"({NAME})(?:\{{({LABEL}(?:,{LABEL})*)\}})? (\S+)")
+KINDS = {"counter", "gauge", "histogram", "summary", "untyped"}
+
+
+def parse_exposition(text: str) -> dict[str, tuple[str, list]]:
+    """Parse the Prometheus text format strictly enough to catch malformed
+    output: the families with their type and (name, labels, value) samples."""
+    assert text.endswith("\n")
+    families: dict[str, tuple[str, list]] = {}
+    family = None
+    for line in text[:-1].split("\n"):
+        if line.startswith("# HELP "):
+            family = line.split(" ", 3)[2]
+            assert re.fullmatch(NAME, family), line
+            assert family not in families, f"{family} exported twice"
+        elif line.startswith("# TYPE "):
+            _, _, name, kind = line.split(" ")
+            assert name == family and kind in KINDS, line
+            families[name] = (kind, [])
+        else:
+            match = SAMPLE.fullmatch(line)
+            assert match is not None, line
+            name, labels, value = match.group(1), match.group(2), match.group(7)
+            kind, samples = families[family]
+            suffixes = ("_bucket", "_sum", "_count") if kind == "histogram" else ()
+            assert name in (family, *(family + suffix for suffix in suffixes)), line
+            samples.append((name, dict(re.findall(LABEL, labels or "")), float(value)))
+
+    return families
+
+
+def check_histogram(name: str, samples: list) -> None:
+    series: dict[tuple, list[tuple[float, float]]] = {}
+    counts = {}
+    for sample, labels, value in samples:
+        key = tuple(sorted((k, v) for k, v in labels.items() if k != "le"))
+        if sample == f"{name}_bucket":
+            series.setdefault(key, []).append((float(labels["le"]), value))
+        elif sample == f"{name}_count":
+            counts[key] = value
+
+    for key, buckets in series.items():
+        bounds = [bound for bound, _ in buckets]
+        assert bounds == sorted(bounds) and math.isinf(bounds[-1]), key
+        cumulative = [value for _, value in buckets]
+        assert cumulative == sorted(cumulative), key
+        assert counts[key] == cumulative[-1], key
+
+
+@pytest.fixture
+def metrics_client(monkeypatch) -> TestClient:
+    """An app serving /metrics behind a token, and a route it measures."""
+    monkeypatch.setattr(metrics, "METRICS_TOKEN", "scraper-token")
+    measured = FastAPI()
+    measured.add_middleware(metrics.MetricsMiddleware)
+    measured.include_router(metrics.router)
+
+    @measured.get("/items/{item_id}")
+    def get_item(item_id: int) -> dict:
+        with metrics.observe_stage("lookup"):
+            return {"id": item_id}
+
+    return TestClient(measured)
+
+
+def test_metrics_need_the_token(metrics_client):
+    for headers in ({}, {"Authorization": "Bearer wrong"}, {"Authorization": "x"}):
+        response = metrics_client.get("/metrics", headers=headers)
+        assert response.status_code == 401, headers
+
+    response = metrics_client.get(
+        "/metrics", headers={"Authorization": "Bearer scraper-token"}
+    )
+    assert response.status_code == 200, response.text
+    assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+
+
+def test_the_export_is_valid_prometheus_text(metrics_client, monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS", True)
+    for item_id in (1, 2, 3):
+        metrics_client.get(f"/items/{item_id}")
+    metrics_client.get("/missing")
+    metrics.query_duration.observe(0.02)
+    labelled = metrics.Counter("fc_test_total", "Escaping.", ("value",))
+    labelled.inc('quote " backslash \\ newline \n')
+
+    response = metrics_client.get(
+        "/metrics", headers={"Authorization": "Bearer scraper-token"}
+    )
+    families = parse_exposition(response.text + "\n".join(labelled.render()) + "\n")
+
+    for name, (kind, samples) in families.items():
+        if kind == "histogram":
+            check_histogram(name, samples)
+    kind, samples = families["fc_http_request_duration_seconds"]
+    routes = {labels["route"] for _, labels, _ in samples}
+    # by route template, not by path.
+    assert {"/items/{item_id}", "<unmatched>"} <= routes
+    assert any(
+        labels == {"stage": "lookup", "le": "+Inf"} and value >= 3
+        for _, labels, value in families["fc_stage_duration_seconds"][1]
+    )
+    assert families["fc_cache_hits_total"][0] == "counter"
+    assert families["fc_test_total"][1] == [
+        ("fc_test_total", {"value": 'quote \\" backslash \\\\ newline \\n'}, 1.0)
+    ]
+
+
+@pytest.mark.skipif(METRICS, reason="FC_METRICS is set")
+def test_metrics_off_installs_nothing(client, headers):
+    for identifier, hook in (
+        ("before_cursor_execute", metrics._before_cursor_execute),
+        ("after_cursor_execute", metrics._after_cursor_execute),
+        ("handle_error", metrics._handle_error),
+    ):
+        assert not event.contains(Engine, identifier, hook)
+    assert not any(
+        middleware.cls is metrics.MetricsMiddleware
+        for middleware in app.user_middleware
+    )
+    assert metrics.observe_stage("lookup") is metrics.observe_stage("other")
+    assert client.get("/metrics", headers=headers).status_code == 404
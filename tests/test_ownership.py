@@ -0,0 +1,109 @@
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import func, select
+
+from finance_control_be.auth.jwt import create_access_token_manager
+from finance_control_be.auth.password import PasswordManager
+from finance_control_be.models.subscription import Subscription
+from finance_control_be.models.user import User
+from finance_control_be.query_budget import assert_max_queries
+
+SUBSCRIPTION = {
+    "name": "streaming",
+    "price": "9.99",
+    "currency": "USD",
+    "period": 1,
+    "period_unit": "month",
+}
+
+
+@pytest.fixture
+def other_headers(session) -> dict[str, str]:
+    user = User.new_hashed(password="password", password_manager=PasswordManager())
+    user.username = "other"
+    session.add(user)
+    session.commit()
+    token = create_access_token_manager()._create_access_token({"sub": "other"})
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def subscription_id(client, headers, method_id) -> str:
+    response = client.post(
+        f"/methods/{method_id}/subscriptions/", json=SUBSCRIPTION, headers=headers
+    )
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+
+def test_a_foreign_method_is_not_found_on_every_route(
+    client, method_id, subscription_id, other_headers, session
+):
+    url = f"/methods/{method_id}/subscriptions"
+    item = f"{url}/{subscription_id}"
+    for method, path, kwargs in [
+        ("GET", f"{url}/", {}),
+        ("POST", f"{url}/", {"json": SUBSCRIPTION}),
+        ("POST", f"{url}/batch", {"json": [SUBSCRIPTION, SUBSCRIPTION]}),
+        ("POST", f"{url}/batch", {"json": []}),
+        ("POST", f"{url}/import", {"files": {"file": ("s.csv", b"name\n")}}),
+        ("GET", item, {}),
+        ("GET", f"{item}/next-payment-date", {}),
+        ("PATCH", item, {"json": {"price": "1"}}),
+        ("POST", f"{item}/mark-purchased", {}),
+        ("DELETE", item, {}),
+        ("GET", f"/methods/{method_id}", {}),
+        ("PATCH", f"/methods/{method_id}", {"json": {"name": "mine"}}),
+        ("DELETE", f"/methods/{method_id}", {}),
+    ]:
+        response = client.request(method, path, headers=other_headers, **kwargs)
+        assert response.status_code == 404, (method, path, response.text)
+
+    # the batch routes answer per item.
+    response = client.patch(
+        f"{url}/batch",
+        json=[{"id": subscription_id, "price": "1"}],
+        headers=other_headers,
+    )
+    assert [item["status"] for item in response.json()] == [404]
+    response = client.post(
+        f"{url}/batch/delete", json=[subscription_id], headers=other_headers
+    )
+    assert [item["status"] for item in response.json()] == [404]
+
+    assert session.scalar(select(func.count()).select_from(Subscription)) == 1
+
+
+def test_an_unknown_method_is_not_found(client, headers):
+    response = client.post(
+        f"/methods/{uuid4()}/subscriptions/", json=SUBSCRIPTION, headers=headers
+    )
+
+    assert response.status_code == 404, response.text
+
+
+def test_a_create_checks_the_method_in_its_insert(client, headers, method_id):
+    # the insert checking the method, the spending summary, the reminders
+    # and the version.
+    with assert_max_queries(4):
+        response = client.post(
+            f"/methods/{method_id}/subscriptions/", json=SUBSCRIPTION, headers=headers
+        )
+
+    assert response.status_code == 201, response.text
+    assert response.json()["name"] == SUBSCRIPTION["name"]
+
+
+def test_a_batch_create_returns_its_items_in_order(client, headers, method_id):
+    names = [f"streaming {i}" for i in range(20)]
+    response = client.post(
+        f"/methods/{method_id}/subscriptions/batch",
+        json=[{**SUBSCRIPTION, "name": name} for name in names],
+        headers=headers,
+    )
+
+    assert response.status_code == 200, response.text
+    items = response.json()
+    assert [item["index"] for item in items] == list(range(len(names)))
+    assert [item["item"]["name"] for item in items] == names
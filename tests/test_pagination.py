@@ -0,0 +1,184 @@
+from decimal import Decimal
+
+import pytest
+
+from finance_control_be.const import MAX_PAGE_SIZE
+from finance_control_be.dependencies.pagination import (
+    NEXT_CURSOR_HEADER,
+    TOTAL_COUNT_HEADER,
+)
+
+# prices repeat, so that sorted pages also order ties by id.
+PRICES = ["5", "1", "3", "1", "5", "2", "1", "4", "3", "5", "2"]
+
+
+@pytest.fixture
+def subscriptions(client, headers, method_id) -> list[dict]:
+    response = client.post(
+        f"/methods/{method_id}/subscriptions/batch",
+        json=[
+            {
+                "name": f"subscription {i:02}",
+                "price": price,
+                "currency": "USD",
+                "period": 1,
+                "period_unit": "month",
+            }
+            for i, price in enumerate(PRICES)
+        ],
+        headers=headers,
+    )
+    assert response.status_code == 200, response.text
+    return [item["item"] for item in response.json()]
+
+
+def walk(client, url: str, headers, **params) -> list[dict]:
+    """Follow the cursors from the first page to the last."""
+    items = []
+    cursor = None
+    while True:
+        response = client.get(
+            url,
+            params={**params, **({"cursor": cursor} if cursor else {})},
+            headers=headers,
+        )
+        assert response.status_code == 200, response.text
+        page = response.json()
+        assert len(page) <= params["limit"]
+        items += page
+
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            return items
+
+
+@pytest.mark.parametrize(
+    "sort, key",
+    [
+        (None, lambda item: item["id"]),
+        ("price", lambda item: (Decimal(item["price"]), item["id"])),
+        ("name", lambda item: (item["name"], item["id"])),
+    ],
+)
+def test_cursors_walk_every_item_once_in_order(
+    client, headers, method_id, subscriptions, sort, key
+):
+    params = {"limit": 3} | ({"sort": sort} if sort else {})
+    items = walk(client, f"/methods/{method_id}/subscriptions/", headers, **params)
+
+    assert items == sorted(subscriptions, key=key)
+
+
+def test_descending_cursors_order_ties_by_descending_id(
+    client, headers, method_id, subscriptions
+):
+    items = walk(
+        client,
+        f"/methods/{method_id}/subscriptions/",
+        headers,
+        limit=4,
+        sort="-price",
+    )
+
+    assert items == sorted(
+        subscriptions,
+        key=lambda item: (Decimal(item["price"]), item["id"]),
+        reverse=True,
+    )
+
+
+def test_a_cursor_is_not_shifted_by_earlier_inserts(
+    client, headers, method_id, subscriptions
+):
+    url = f"/methods/{method_id}/subscriptions/"
+    first = client.get(url, params={"limit": 5, "sort": "price"}, headers=headers)
+    cursor = first.headers[NEXT_CURSOR_HEADER]
+    response = client.post(
+        url,
+        json={
+            "name": "cheapest",
+            "price": "0.5",
+            "currency": "USD",
+            "period": 1,
+            "period_unit": "month",
+        },
+        headers=headers,
+    )
+    assert response.status_code == 201, response.text
+
+    second = client.get(
+        url, params={"limit": 5, "sort": "price", "cursor": cursor}, headers=headers
+    )
+
+    ordered = sorted(
+        subscriptions, key=lambda item: (Decimal(item["price"]), item["id"])
+    )
+    assert first.json() + second.json() == ordered[:10]
+
+
+def test_methods_walk_by_name(client, headers):
+    for i in range(7):
+        response = client.post(
+            "/methods/", json={"name": f"card {i}", "kind": "cash"}, headers=headers
+        )
+        assert response.status_code == 201, response.text
+
+    items = walk(client, "/methods/", headers, limit=2, sort="-name")
+
+    assert [item["name"] for item in items] == [f"card {i}" for i in range(6, -1, -1)]
+
+
+def test_with_total_counts_every_matching_item(
+    client, headers, method_id, subscriptions
+):
+    response = client.get(
+        f"/methods/{method_id}/subscriptions/",
+        params={"limit": 2, "with_total": "true", "max_price": "2"},
+        headers=headers,
+    )
+
+    assert response.status_code == 200, response.text
+    assert len(response.json()) == 2
+    assert response.headers[TOTAL_COUNT_HEADER] == str(
+        sum(Decimal(price) <= 2 for price in PRICES)
+    )
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        {"cursor": "not a cursor"},
+        {"cursor": "AAAA"},
+        {"cursor": "bm90IGpzb24", "sort": "price"},
+    ],
+)
+def test_invalid_cursors_are_rejected(client, headers, method_id, params):
+    response = client.get(
+        f"/methods/{method_id}/subscriptions/", params=params, headers=headers
+    )
+
+    assert response.status_code == 400, response.text
+
+
+def test_a_cursor_only_continues_its_own_sort(
+    client, headers, method_id, subscriptions
+):
+    url = f"/methods/{method_id}/subscriptions/"
+    response = client.get(url, params={"limit": 2, "sort": "price"}, headers=headers)
+    cursor = response.headers[NEXT_CURSOR_HEADER]
+
+    for sort in ("name", "-price"):
+        response = client.get(
+            url, params={"limit": 2, "sort": sort, "cursor": cursor}, headers=headers
+        )
+        assert response.status_code == 400, response.text
+
+
+@pytest.mark.parametrize(
+    "params",
+    [{"limit": -1}, {"limit": 0}, {"limit": MAX_PAGE_SIZE + 1}, {"offset": -1}],
+)
+def test_pages_are_bounded(client, headers, method_id, params):
+    for url in ("/methods/", f"/methods/{method_id}/subscriptions/"):
+        response = client.get(url, params=params, headers=headers)
+        assert response.status_code == 422, response.text
@@ -0,0 +1,163 @@
+"""Statement budgets of the list and batch routes, with a cold principal
+cache, so that each includes the lookup of the user; batches of
+``BATCH_SIZE`` items must take as many statements as a single one."""
+
+import threading
+
+import pytest
+from sqlalchemy import text
+
+from finance_control_be.auth.principal import principal_cache
+from finance_control_be.database import engine
+from finance_control_be.query_budget import assert_max_queries
+
+BATCH_SIZE = 50
+SUBSCRIPTION = {
+    "name": "streaming",
+    "price": "9.99",
+    "currency": "USD",
+    "period": 1,
+    "period_unit": "month",
+}
+
+
+@pytest.fixture
+def subscription_ids(client, headers, method_id) -> list[str]:
+    response = client.post(
+        f"/methods/{method_id}/subscriptions/batch",
+        json=[{**SUBSCRIPTION, "name": f"streaming {i}"} for i in range(BATCH_SIZE)],
+        headers=headers,
+    )
+    assert response.status_code == 200, response.text
+    principal_cache.clear()
+    return [item["item"]["id"] for item in response.json()]
+
+
+@pytest.mark.parametrize(
+    "params, budget",
+    [
+        # the user, the version for the ETag and the page.
+        ({}, 3),
+        ({"fields": "id,name"}, 3),
+        ({"kind": "credit_card", "sort": "name"}, 3),
+        ({"with_total": "true"}, 4),
+    ],
+)
+def test_method_list(client, headers, subscription_ids, params, budget):
+    with assert_max_queries(budget):
+        response = client.get("/methods/", params=params, headers=headers)
+
+    assert response.status_code == 200, response.text
+
+
+@pytest.mark.parametrize(
+    "params, budget",
+    [
+        ({}, 3),
+        ({"fields": "id,name"}, 3),
+        ({"is_active": "true", "sort": "-price", "q": "stream"}, 3),
+        ({"with_total": "true"}, 4),
+    ],
+)
+def test_subscription_list(
+    client, headers, method_id, subscription_ids, params, budget
+):
+    with assert_max_queries(budget):
+        response = client.get(
+            f"/methods/{method_id}/subscriptions/", params=params, headers=headers
+        )
+
+    assert response.status_code == 200, response.text
+    assert len(response.json()) == 10
+
+
+def test_method_batch_create(client, headers):
+    # the user, the insert and the version.
+    with assert_max_queries(3):
+        response = client.post(
+            "/methods/batch",
+            json=[
+                {"name": f"card {i}", "kind": "credit_card"} for i in range(BATCH_SIZE)
+            ],
+            headers=headers,
+        )
+
+    assert response.status_code == 200, response.text
+
+
+def test_subscription_batch_create(client, headers, method_id):
+    principal_cache.clear()
+    # the user, the insert checking the method, the spending summary, the
+    # reminders and the version.
+    with assert_max_queries(5):
+        response = client.post(
+            f"/methods/{method_id}/subscriptions/batch",
+            json=[
+                {**SUBSCRIPTION, "name": f"streaming {i}"} for i in range(BATCH_SIZE)
+            ],
+            headers=headers,
+        )
+
+    assert response.status_code == 200, response.text
+
+
+def test_subscription_batch_update(client, headers, method_id, subscription_ids):
+    # the user, the current values, the update, the updated rows, the
+    # spending summary and the version.
+    with assert_max_queries(6):
+        response = client.patch(
+            f"/methods/{method_id}/subscriptions/batch",
+            json=[
+                {"id": subscription_id, "price": "12"}
+                for subscription_id in subscription_ids
+            ],
+            headers=headers,
+        )
+
+    assert response.status_code == 200, response.text
+
+
+def test_subscription_batch_delete(client, headers, method_id, subscription_ids):
+    # the user, the delete, the spending summary and the version.
+    with assert_max_queries(4):
+        response = client.post(
+            f"/methods/{method_id}/subscriptions/batch/delete",
+            json=subscription_ids,
+            headers=headers,
+        )
+
+    assert response.status_code == 200, response.text
+
+
+def test_statements_of_background_threads_are_not_counted(client, headers):
+    started = threading.Event()
+    stop = threading.Event()
+
+    def background_job() -> None:
+        # like the lifespan jobs, outside the context of the budget.
+        with engine.connect() as connection:
+            while True:
+                connection.execute(text("SELECT 1"))
+                started.set()
+                if stop.wait(0.001):
+                    return
+
+    job = threading.Thread(target=background_job)
+    job.start()
+    try:
+        started.wait()
+        with assert_max_queries(3) as counter:
+            response = client.get("/methods/", headers=headers)
+    finally:
+        stop.set()
+        job.join()
+
+    assert response.status_code == 200, response.text
+    assert "SELECT 1" not in counter.statements
+
+
+def test_a_budget_counts_its_own_statements(session):
+    with pytest.raises(AssertionError, match="expected at most 1 statements, ran 2"):
+        with assert_max_queries(1):
+            session.execute(text("SELECT 1"))
+            session.execute(text("SELECT 2"))
@@ -0,0 +1,183 @@
+from datetime import date, timedelta
+
+import pytest
+from dateutil.relativedelta import relativedelta
+
+from finance_control_be.models.recurrence import (
+    add_months,
+    next_occurrence,
+    nth_occurrence,
+)
+from finance_control_be.models.subscription import PeriodUnit
+
+STEPS = {
+    PeriodUnit.day: lambda period: relativedelta(days=period),
+    PeriodUnit.week: lambda period: relativedelta(weeks=period),
+    PeriodUnit.month: lambda period: relativedelta(months=period),
+    PeriodUnit.year: lambda period: relativedelta(years=period),
+}
+
+
+def next_by_stepping(
+    anchor: date, period: int, period_unit: PeriodUnit, after: date
+) -> date:
+    """The loop the closed form replaced, stepping from the anchor; unlike
+    stepping from the previous occurrence, it does not drift on month ends."""
+    n = 0
+    while (occurrence := anchor + STEPS[period_unit](period) * n) <= after:
+        n += 1
+    return occurrence
+
+
+def next_by_previous(
+    anchor: date, period: int, period_unit: PeriodUnit, after: date
+) -> date:
+    """The original loop, stepping from the previous occurrence."""
+    occurrence = anchor
+    while occurrence <= after:
+        occurrence += STEPS[period_unit](period)
+    return occurrence
+
+
+@pytest.mark.parametrize(
+    "anchor, months, expected",
+    [
+        (date(2023, 1, 31), 1, date(2023, 2, 28)),
+        (date(2024, 1, 31), 1, date(2024, 2, 29)),
+        (date(2024, 1, 31), 2, date(2024, 3, 31)),
+        (date(2024, 1, 31), 3, date(2024, 4, 30)),
+        (date(2024, 2, 29), 12, date(2025, 2, 28)),
+        (date(2024, 2, 29), 48, date(2028, 2, 29)),
+        (date(2024, 11, 30), 3, date(2025, 2, 28)),
+        (date(2024, 12, 15), 1, date(2025, 1, 15)),
+        (date(2024, 3, 31), -1, date(2024, 2, 29)),
+        (date(2024, 1, 15), -13, date(2022, 12, 15)),
+    ],
+)
+def test_add_months_clamps_to_the_end_of_the_month(anchor, months, expected):
+    assert add_months(anchor, months) == expected
+
+
+@pytest.mark.parametrize(
+    "anchor, period, period_unit, expected",
+    [
+        # clamped per month, without drifting to the 28th or 29th.
+        (
+            date(2024, 1, 31),
+            1,
+            PeriodUnit.month,
+            [date(2024, 2, 29), date(2024, 3, 31), date(2024, 4, 30)],
+        ),
+        (
+            date(2023, 1, 31),
+            1,
+            PeriodUnit.month,
+            [date(2023, 2, 28), date(2023, 3, 31), date(2023, 4, 30)],
+        ),
+        # a leap day falls on Feb 28 until the next leap year.
+        (
+            date(2024, 2, 29),
+            1,
+            PeriodUnit.year,
+            [date(2025, 2, 28), date(2026, 2, 28), date(2027, 2, 28)],
+        ),
+        (
+            date(2024, 2, 29),
+            4,
+            PeriodUnit.year,
+            [date(2028, 2, 29), date(2032, 2, 29), date(2036, 2, 29)],
+        ),
+        (
+            date(2024, 1, 1),
+            2,
+            PeriodUnit.week,
+            [date(2024, 1, 15), date(2024, 1, 29), date(2024, 2, 12)],
+        ),
+    ],
+)
+def test_nth_occurrence(anchor, period, period_unit, expected):
+    assert [
+        nth_occurrence(anchor, period, period_unit, n) for n in range(1, 4)
+    ] == expected
+
+
+@pytest.mark.parametrize("period_unit", list(PeriodUnit))
+@pytest.mark.parametrize(
+    "anchor",
+    [date(2024, 1, 31), date(2024, 2, 29), date(2023, 8, 30), date(2024, 6, 15)],
+)
+def test_next_occurrence_matches_stepping(anchor, period_unit):
+    for period in (1, 2, 3, 7):
+        for days in range(-40, 3 * 366, 11):
+            after = anchor + timedelta(days=days)
+            expected = next_by_stepping(anchor, period, period_unit, after)
+            assert next_occurrence(anchor, period, period_unit, after) == expected
+            # the original loop only drifted on days some months lack.
+            if anchor.day <= 28:
+                assert next_by_previous(anchor, period, period_unit, after) == (
+                    expected
+                )
+
+
+@pytest.mark.parametrize(
+    "anchor, after, expected",
+    [
+        # the anchor itself, while it is still ahead.
+        (date(2024, 5, 10), date(2024, 5, 1), date(2024, 5, 10)),
+        # strictly after: an occurrence on the day itself is not next.
+        (date(2024, 5, 10), date(2024, 5, 10), date(2024, 6, 10)),
+        (date(2024, 1, 31), date(2024, 2, 29), date(2024, 3, 31)),
+        (date(2024, 1, 31), date(2024, 2, 28), date(2024, 2, 29)),
+    ],
+)
+def test_next_occurrence_is_strictly_after(anchor, after, expected):
+    assert next_occurrence(anchor, 1, PeriodUnit.month, after) == expected
+
+
+def test_next_payment_dates_are_listed_soonest_first(client, headers, method_id):
+    today = date.today()
+    schedules = [
+        ("month end", date(2024, 1, 31), 1, "month"),
+        ("leap day", date(2024, 2, 29), 1, "year"),
+        ("weekly", today - timedelta(days=3), 1, "week"),
+        ("ahead", today + timedelta(days=40), 1, "month"),
+    ]
+    response = client.post(
+        f"/methods/{method_id}/subscriptions/batch",
+        json=[
+            {
+                "name": name,
+                "price": "9.99",
+                "currency": "USD",
+                "period": period,
+                "period_unit": period_unit,
+                "purchased_at": anchor.isoformat(),
+            }
+            for name, anchor, period, period_unit in schedules
+        ]
+        + [
+            {
+                "name": "inactive",
+                "price": "1",
+                "currency": "USD",
+                "period": 1,
+                "period_unit": "day",
+                "is_active": False,
+            }
+        ],
+        headers=headers,
+    )
+    assert response.status_code == 200, response.text
+
+    response = client.get("/reports/next-payment-dates", headers=headers)
+
+    assert response.status_code == 200, response.text
+    payments = [
+        (payment["name"], date.fromisoformat(payment["next_date_of_payment"]))
+        for payment in response.json()
+    ]
+    assert dict(payments) == {
+        name: next_occurrence(anchor, period, PeriodUnit(period_unit), after=today)
+        for name, anchor, period, period_unit in schedules
+    }
+    assert [day for _, day in payments] == sorted(day for _, day in payments)
@@ -0,0 +1,164 @@
+from datetime import date, timedelta
+from uuid import UUID
+
+import pytest
+from sqlalchemy import func, select, update
+
+from finance_control_be.database import SessionLocal
+from finance_control_be.models.recurrence import next_occurrence
+from finance_control_be.models.reminder import OutboxEvent, ReminderDueDate
+from finance_control_be.models.subscription import PeriodUnit
+from finance_control_be.reminders import (
+    claim_outbox_events,
+    mark_outbox_events_sent,
+    schedule_reminders,
+)
+
+LEASE = timedelta(minutes=5)
+
+
+def due_dates(session) -> dict[UUID, date]:
+    session.expire_all()
+    return dict(
+        session.execute(select(ReminderDueDate.subscription_id, ReminderDueDate.due_on))
+        .tuples()
+        .all()
+    )
+
+
+def occurrences(session) -> list[tuple[UUID, date]]:
+    session.expire_all()
+    return (
+        session.execute(
+            select(OutboxEvent.subscription_id, OutboxEvent.occurrence).order_by(
+                OutboxEvent.subscription_id, OutboxEvent.occurrence
+            )
+        )
+        .tuples()
+        .all()
+    )
+
+
+@pytest.fixture
+def due_tomorrow(client, headers, method_id) -> list[str]:
+    """Weekly subscriptions whose next payment is tomorrow."""
+    tomorrow = date.today() + timedelta(days=1)
+    response = client.post(
+        f"/methods/{method_id}/subscriptions/batch",
+        json=[
+            {
+                "name": f"weekly {i}",
+                "price": "9.99",
+                "currency": "USD",
+                "period": 1,
+                "period_unit": "week",
+                "purchased_at": (tomorrow - timedelta(weeks=1)).isoformat(),
+            }
+            for i in range(5)
+        ],
+        headers=headers,
+    )
+    assert response.status_code == 200, response.text
+    return [item["item"]["id"] for item in response.json()]
+
+
+def test_passes_over_the_same_window_write_one_event_per_occurrence(
+    session, due_tomorrow
+):
+    today = date.today()
+    scheduled = due_dates(session)
+    assert set(scheduled.values()) == {today + timedelta(days=1)}
+
+    assert schedule_reminders(session, today, batch_size=2) == len(due_tomorrow)
+    assert schedule_reminders(session, today, batch_size=2) == 0
+    # a write setting the due dates back, as a crash between the outbox and
+    # the due dates would, schedules the occurrences again.
+    session.execute(update(ReminderDueDate).values(due_on=today + timedelta(days=1)))
+    session.commit()
+    assert schedule_reminders(session, today, batch_size=2) == len(due_tomorrow)
+
+    assert occurrences(session) == sorted(scheduled.items())
+    assert set(due_dates(session).values()) == {today + timedelta(days=1, weeks=1)}
+
+
+def test_workers_skip_the_due_dates_another_one_holds(session, due_tomorrow):
+    today = date.today()
+
+    with SessionLocal() as other_worker:
+        # the other worker is in the middle of a batch of two.
+        held = other_worker.scalars(
+            select(ReminderDueDate.subscription_id)
+            .order_by(ReminderDueDate.subscription_id)
+            .limit(2)
+            .with_for_update()
+        ).all()
+
+        assert schedule_reminders(session, today) == len(due_tomorrow) - 2
+        assert {subscription_id for subscription_id, _ in occurrences(session)} == (
+            set(due_dates(session)) - set(held)
+        )
+
+    assert schedule_reminders(session, today) == 2
+    assert len(occurrences(session)) == len(due_tomorrow)
+
+
+def test_an_expired_lease_is_claimed_again(session, due_tomorrow):
+    schedule_reminders(session, date.today())
+
+    claimed = claim_outbox_events(session, "worker-a", 10, LEASE)
+    assert len(claimed) == len(due_tomorrow)
+    assert claim_outbox_events(session, "worker-b", 10, LEASE) == []
+
+    # worker-a stalls past its lease.
+    session.execute(
+        update(OutboxEvent).values(leased_until=func.now() - timedelta(seconds=1))
+    )
+    session.commit()
+    reclaimed = claim_outbox_events(session, "worker-b", 10, LEASE)
+    assert {event.id for event in reclaimed} == {event.id for event in claimed}
+
+    event_ids = [event.id for event in claimed]
+    assert mark_outbox_events_sent(session, "worker-a", event_ids) == 0
+    assert mark_outbox_events_sent(session, "worker-b", event_ids) == len(event_ids)
+    assert claim_outbox_events(session, "worker-a", 10, LEASE) == []
+
+
+def test_writes_keep_the_due_date_in_sync(client, headers, method_id, session):
+    today = date.today()
+    purchased_at = date(2024, 1, 31)
+    url = f"/methods/{method_id}/subscriptions"
+    response = client.post(
+        f"{url}/",
+        json={
+            "name": "streaming",
+            "price": "9.99",
+            "currency": "USD",
+            "period": 1,
+            "period_unit": "month",
+            "purchased_at": purchased_at.isoformat(),
+        },
+        headers=headers,
+    )
+    assert response.status_code == 201, response.text
+    subscription_id = response.json()["id"]
+
+    def due_on() -> date | None:
+        return due_dates(session).get(UUID(subscription_id))
+
+    assert due_on() == next_occurrence(purchased_at, 1, PeriodUnit.month, after=today)
+
+    response = client.patch(
+        f"{url}/{subscription_id}", json={"period_unit": "year"}, headers=headers
+    )
+    assert response.status_code == 200, response.text
+    assert due_on() == next_occurrence(purchased_at, 1, PeriodUnit.year, after=today)
+
+    response = client.post(f"{url}/{subscription_id}/mark-purchased", headers=headers)
+    assert response.status_code == 204, response.text
+    assert due_on() == next_occurrence(today, 1, PeriodUnit.year, after=today)
+
+    response = client.patch(
+        f"{url}/{subscription_id}", json={"is_active": False}, headers=headers
+    )
+    assert response.status_code == 200, response.text
+    assert due_on() is None
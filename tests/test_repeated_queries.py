@@ -0,0 +1,81 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from loguru import logger
+from sqlalchemy import text
+
+from finance_control_be import query_budget
+from finance_control_be.database import engine
+from finance_control_be.query_budget import (
+    RepeatedQueryError,
+    RepeatedQueryMiddleware,
+    count_statements,
+    statement_shape,
+)
+
+
+@pytest.mark.parametrize(
+    "statement, shape",
+    [
+        ("SELECT *\n  FROM t\n WHERE a = $1", "SELECT * FROM t WHERE a = ?"),
+        (
+            "SELECT * FROM t WHERE a = %(a_1)s AND b = %s",
+            "SELECT * FROM t WHERE a = ? AND b = ?",
+        ),
+        (
+            "SELECT * FROM t WHERE id IN ($1, $2, $3)",
+            "SELECT * FROM t WHERE id IN (?, ...)",
+        ),
+        ("SELECT * FROM t WHERE id IN (?)", "SELECT * FROM t WHERE id IN (?, ...)"),
+    ],
+)
+def test_statement_shape_folds_the_values(statement, shape):
+    assert statement_shape(statement) == shape
+
+
+@pytest.fixture
+def repeating_client(monkeypatch) -> TestClient:
+    """An app counting its statements, with a route running ``count`` times
+    the same one."""
+    monkeypatch.setattr(query_budget, "N_PLUS_ONE_THRESHOLD", 3)
+    count_statements()
+    repeating = FastAPI()
+    repeating.add_middleware(RepeatedQueryMiddleware)
+
+    @repeating.get("/repeat/{count}")
+    def repeat(count: int) -> None:
+        with engine.connect() as connection:
+            for i in range(count):
+                connection.execute(text("SELECT :i"), {"i": i})
+
+    return TestClient(repeating)
+
+
+@pytest.fixture
+def warnings() -> list[str]:
+    messages = []
+    sink = logger.add(lambda message: messages.append(str(message)), level="WARNING")
+    yield messages
+    logger.remove(sink)
+
+
+def test_repeated_statements_are_logged(repeating_client, monkeypatch, warnings):
+    monkeypatch.setattr(query_budget, "N_PLUS_ONE", "log")
+
+    assert repeating_client.get("/repeat/2").status_code == 200
+    assert warnings == []
+
+    assert repeating_client.get("/repeat/3").status_code == 200
+    (warning,) = warnings
+    assert "GET /repeat/3 ran 3 times, likely N+1: SELECT ?" in warning
+
+
+def test_repeated_statements_raise(repeating_client, monkeypatch):
+    monkeypatch.setattr(query_budget, "N_PLUS_ONE", "raise")
+
+    assert repeating_client.get("/repeat/2").status_code == 200
+    with pytest.raises(RepeatedQueryError) as raised:
+        repeating_client.get("/repeat/5")
+
+    assert raised.value.count == 3
+    assert raised.value.shape == "SELECT ?"
@@ -0,0 +1,82 @@
+from decimal import Decimal
+
+import pytest
+
+from finance_control_be.exchange_rates import load_rates
+
+# a subscription of every period unit, with their yearly prices.
+SUBSCRIPTIONS = [
+    ({"price": "10", "period": 1, "period_unit": "month"}, Decimal("120")),
+    ({"price": "120", "period": 1, "period_unit": "year"}, Decimal("120")),
+    ({"price": "1", "period": 1, "period_unit": "week"}, Decimal("52.1775")),
+    ({"price": "2", "period": 2, "period_unit": "day"}, Decimal("365.2425")),
+]
+MONTHLY = {"period": 1, "period_unit": "month"}
+YEARLY_COST = sum(yearly_price for _, yearly_price in SUBSCRIPTIONS)
+
+
+@pytest.fixture
+def subscriptions(client, headers, method_id, session) -> None:
+    load_rates(session, {"USD": Decimal(1), "EUR": Decimal(2)})
+    session.commit()
+
+    response = client.post(
+        f"/methods/{method_id}/subscriptions/batch",
+        json=[
+            {"name": unit["period_unit"], "currency": "USD", **unit}
+            for unit, _ in SUBSCRIPTIONS
+        ],
+        headers=headers,
+    )
+    assert response.status_code == 200, response.text
+
+
+def test_spending_prices_every_period_unit(client, headers, subscriptions):
+    response = client.get(
+        "/reports/spending", params={"currency": "EUR"}, headers=headers
+    )
+
+    assert response.status_code == 200, response.text
+    (row,) = response.json()
+    assert row["subscription_count"] == len(SUBSCRIPTIONS)
+    assert Decimal(row["yearly_cost"]) == round(YEARLY_COST, 2)
+    assert Decimal(row["converted_yearly_cost"]) == round(YEARLY_COST / 2, 2)
+
+
+def test_spending_summary_matches_the_spending(client, headers, subscriptions):
+    response = client.get("/reports/spending/summary", headers=headers)
+
+    assert response.status_code == 200, response.text
+    (row,) = response.json()
+    assert row["active_count"] == len(SUBSCRIPTIONS)
+    assert Decimal(row["yearly_cost"]) == round(YEARLY_COST, 2)
+
+
+def test_amounts_in_the_target_currency_need_no_rate(client, headers, method_id):
+    response = client.post(
+        f"/methods/{method_id}/subscriptions/batch",
+        json=[
+            {"name": "usd", "price": "10", "currency": "USD", **MONTHLY},
+            {"name": "eur", "price": "10", "currency": "EUR", **MONTHLY},
+        ],
+        headers=headers,
+    )
+    assert response.status_code == 200, response.text
+
+    response = client.get("/reports/spending/total", headers=headers)
+
+    assert response.status_code == 200, response.text
+    assert response.json() == {
+        "currency": "USD",
+        "monthly_cost": "10.00",
+        "yearly_cost": "120.00",
+        "unconverted_currencies": ["EUR"],
+    }
+
+    response = client.get("/reports/spending/summary", headers=headers)
+
+    assert response.status_code == 200, response.text
+    converted = {
+        row["currency"]: row["converted_yearly_cost"] for row in response.json()
+    }
+    assert converted == {"EUR": None, "USD": "120.00"}
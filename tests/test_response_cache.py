@@ -0,0 +1,143 @@
+import sqlite3
+
+import pytest
+
+from finance_control_be.auth.jwt import create_access_token_manager
+from finance_control_be.auth.password import PasswordManager
+from finance_control_be.dependencies import response_cache as cached_response
+from finance_control_be.models.user import User
+from finance_control_be.response_cache import (
+    MemoryResponseCacheBackend,
+    SqliteResponseCacheBackend,
+)
+
+
+@pytest.fixture
+def sqlite_backend(tmp_path) -> SqliteResponseCacheBackend:
+    return SqliteResponseCacheBackend(str(tmp_path / "responses.db"), 1024)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path, monkeypatch):
+    """Turn the response cache on for the test."""
+    if request.param == "memory":
+        backend = MemoryResponseCacheBackend(1024 * 1024)
+    else:
+        backend = SqliteResponseCacheBackend(
+            str(tmp_path / "responses.db"), 1024 * 1024
+        )
+    monkeypatch.setattr(cached_response, "response_cache", backend)
+    return backend
+
+
+def test_sqlite_hits_do_not_write(sqlite_backend):
+    sqlite_backend.set("key", b"value")
+    connection = sqlite_backend._connection()
+    changes = connection.total_changes
+
+    for _ in range(sqlite_backend.TOUCH_BATCH - 1):
+        assert sqlite_backend.get("key") == b"value"
+
+    assert connection.total_changes == changes
+
+
+def test_sqlite_hits_do_not_wait_for_a_writer(sqlite_backend):
+    sqlite_backend.set("key", b"value")
+
+    writer = sqlite3.connect(sqlite_backend.path, isolation_level=None)
+    writer.execute("BEGIN IMMEDIATE")
+    try:
+        # including the hit that records the uses of the batch.
+        for _ in range(sqlite_backend.TOUCH_BATCH + 1):
+            assert sqlite_backend.get("key") == b"value"
+    finally:
+        writer.execute("ROLLBACK")
+        writer.close()
+
+
+def test_sqlite_evicts_the_entries_not_hit_lately(sqlite_backend):
+    sqlite_backend.EVICTION_BATCH = 1
+    value = b"x" * 300
+    for key in ("a", "b", "c"):
+        sqlite_backend.set(key, value)
+    assert sqlite_backend.get("a") == value
+
+    sqlite_backend.set("d", value)
+
+    assert sqlite_backend.get("b") is None
+    assert [sqlite_backend.get(key) for key in ("a", "c", "d")] == [value] * 3
+    statistics = sqlite_backend.statistics()
+    assert (statistics.hits, statistics.misses) == (4, 1)
+    assert statistics.evictions >= 1
+
+
+def test_sqlite_records_the_uses_of_a_full_batch(sqlite_backend):
+    for key in ("a", "b"):
+        sqlite_backend.set(key, b"value")
+
+    for _ in range(sqlite_backend.TOUCH_BATCH):
+        sqlite_backend.get("a")
+
+    used_at = dict(
+        sqlite_backend._connection().execute("SELECT key, used_at FROM entries")
+    )
+    assert used_at["a"] > used_at["b"]
+
+
+def test_reads_are_cached_until_a_write(client, headers, method_id, backend):
+    url = f"/methods/{method_id}/subscriptions/"
+    subscription = {
+        "name": "streaming",
+        "price": "9.99",
+        "currency": "USD",
+        "period": 1,
+        "period_unit": "month",
+    }
+    client.post(url, json=subscription, headers=headers)
+
+    first = client.get(url, headers=headers)
+    second = client.get(url, headers=headers)
+
+    assert second.status_code == 200, second.text
+    assert second.json() == first.json()
+    assert second.headers["ETag"] == first.headers["ETag"]
+    statistics = backend.statistics()
+    assert (statistics.hits, statistics.misses) == (1, 1)
+
+    response = client.post(url, json={**subscription, "name": "music"}, headers=headers)
+    assert response.status_code == 201, response.text
+    third = client.get(url, headers=headers)
+
+    assert sorted(item["name"] for item in third.json()) == ["music", "streaming"]
+    assert third.headers["ETag"] != first.headers["ETag"]
+    statistics = backend.statistics()
+    assert (statistics.hits, statistics.misses) == (1, 2)
+
+
+def test_cached_responses_are_per_user(client, headers, method_id, session, backend):
+    other = User.new_hashed(password="password", password_manager=PasswordManager())
+    other.username = "other"
+    session.add(other)
+    session.commit()
+    token = create_access_token_manager()._create_access_token({"sub": "other"})
+    other_headers = {"Authorization": f"Bearer {token}"}
+
+    assert len(client.get("/methods/", headers=headers).json()) == 1
+    # same URL and version, but not the same user.
+    assert client.get("/methods/", headers=other_headers).json() == []
+    assert backend.statistics().hits == 0
+
+
+def test_cached_pages_keep_their_headers(client, headers, method_id, backend):
+    for i in range(3):
+        client.post(
+            "/methods/", json={"name": f"card {i}", "kind": "cash"}, headers=headers
+        )
+
+    params = {"limit": 2, "with_total": "true"}
+    first = client.get("/methods/", params=params, headers=headers)
+    second = client.get("/methods/", params=params, headers=headers)
+
+    assert backend.statistics().hits == 1
+    for header in ("X-Next-Cursor", "X-Total-Count", "ETag"):
+        assert second.headers[header] == first.headers[header]
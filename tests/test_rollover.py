@@ -0,0 +1,107 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import func, select
+
+from finance_control_be.database import engine
+from finance_control_be.models.recurrence import next_occurrence
+from finance_control_be.models.subscription import PeriodUnit, Subscription
+from finance_control_be.rollover import ROLLOVER_LOCK_ID, run_rollover
+
+TODAY = date(2027, 3, 10)
+
+# anchor, period, period unit, and the purchase date it rolls over to.
+SCHEDULES = [
+    # month ends only roll over to the same day of a month.
+    (date(2024, 1, 31), 1, PeriodUnit.month, date(2027, 1, 31)),
+    (date(2024, 3, 31), 1, PeriodUnit.month, date(2027, 1, 31)),
+    (date(2024, 2, 29), 1, PeriodUnit.month, date(2027, 1, 29)),
+    # a leap day stays on the leap day of a leap year.
+    (date(2024, 2, 29), 1, PeriodUnit.year, date(2024, 2, 29)),
+    (date(2023, 2, 28), 1, PeriodUnit.year, date(2027, 2, 28)),
+    (date(2024, 1, 15), 2, PeriodUnit.month, date(2027, 1, 15)),
+    (date(2024, 1, 1), 3, PeriodUnit.week, date(2027, 3, 1)),
+    (date(2024, 1, 1), 10, PeriodUnit.day, date(2027, 3, 6)),
+]
+
+
+def subscription(
+    method_id: str, anchor: date, period: int, period_unit: PeriodUnit
+) -> Subscription:
+    return Subscription(
+        name=f"{period} {period_unit.value} from {anchor}",
+        price=Decimal("9.99"),
+        currency="USD",
+        period=period,
+        period_unit=period_unit,
+        purchased_at=anchor,
+        method_id=method_id,
+    )
+
+
+def next_occurrences(subscription: Subscription) -> list[date]:
+    return [
+        next_occurrence(
+            subscription.purchased_at,
+            subscription.period,
+            subscription.period_unit,
+            after=TODAY + timedelta(days=days),
+        )
+        for days in range(0, 3 * 366, 5)
+    ]
+
+
+@pytest.fixture
+def subscriptions(session, method_id) -> list[Subscription]:
+    subscriptions = [
+        subscription(method_id, anchor, period, period_unit)
+        for anchor, period, period_unit, _ in SCHEDULES
+    ]
+    session.add_all(subscriptions)
+    session.commit()
+    return subscriptions
+
+
+def test_rollover_keeps_every_later_occurrence(session, subscriptions):
+    before = [next_occurrences(subscription) for subscription in subscriptions]
+
+    progress = run_rollover(TODAY, chunk_size=3)
+
+    assert progress.scanned == len(SCHEDULES)
+    session.expire_all()
+    assert [subscription.purchased_at for subscription in subscriptions] == [
+        rolled for *_, rolled in SCHEDULES
+    ]
+    assert progress.rolled == sum(anchor != rolled for anchor, *_, rolled in SCHEDULES)
+    assert [next_occurrences(subscription) for subscription in subscriptions] == (
+        before
+    )
+
+    again = run_rollover(TODAY, chunk_size=3)
+    assert again.rolled == 0
+
+
+def test_rollover_skips_invalid_periods(session, method_id, subscriptions):
+    legacy = subscription(method_id, date(2024, 1, 1), 0, PeriodUnit.month)
+    session.add(legacy)
+    session.commit()
+
+    progress = run_rollover(TODAY, chunk_size=3)
+
+    assert progress.scanned == len(SCHEDULES) + 1
+    assert progress.skipped == 1
+    assert progress.rolled > 0
+    session.refresh(legacy)
+    assert legacy.purchased_at == date(2024, 1, 1)
+
+
+def test_rollover_does_not_overlap_a_running_one(subscriptions):
+    with engine.connect() as connection:
+        connection.scalar(select(func.pg_advisory_lock(ROLLOVER_LOCK_ID)))
+        try:
+            assert run_rollover(TODAY) is None
+        finally:
+            connection.scalar(select(func.pg_advisory_unlock(ROLLOVER_LOCK_ID)))
+
+    assert run_rollover(TODAY) is not None
@@ -0,0 +1,78 @@
+from finance_control_be.models.spending import UserSpendingSummary
+from finance_control_be.spending import check_summary, rebuild_summary
+
+
+def subscription(name: str, **values) -> dict:
+    return {
+        "name": name,
+        "price": "9.99",
+        "currency": "USD",
+        "period": 1,
+        "period_unit": "month",
+        **values,
+    }
+
+
+def assert_succeeded(response) -> list[dict]:
+    assert response.status_code == 200, response.text
+    items = response.json()
+    assert all(item["status"] < 300 for item in items), items
+    return items
+
+
+def test_every_write_keeps_the_summary_in_sync(client, headers, method_id, session):
+    url = f"/methods/{method_id}/subscriptions"
+
+    created = client.post(f"{url}/", json=subscription("single"), headers=headers)
+    assert created.status_code == 201, created.text
+    single = created.json()["id"]
+    response = client.post(
+        f"{url}/batch",
+        json=[
+            subscription("daily", period=3, period_unit="day"),
+            subscription("weekly", price="2.50", currency="EUR", period_unit="week"),
+            subscription("yearly", price="99", period_unit="year"),
+            subscription("inactive", is_active=False),
+        ],
+        headers=headers,
+    )
+    daily, weekly, yearly, inactive = (
+        item["item"]["id"] for item in assert_succeeded(response)
+    )
+
+    response = client.patch(
+        f"{url}/{single}", json={"price": "12", "period": 2}, headers=headers
+    )
+    assert response.status_code == 200, response.text
+    response = client.patch(
+        f"{url}/batch",
+        json=[
+            {"id": daily, "period_unit": "week"},
+            {"id": weekly, "currency": "USD", "is_active": False},
+            {"id": inactive, "is_active": True},
+        ],
+        headers=headers,
+    )
+    assert_succeeded(response)
+    response = client.post(f"{url}/batch/delete", json=[yearly], headers=headers)
+    assert_succeeded(response)
+    response = client.delete(f"{url}/{daily}", headers=headers)
+    assert response.status_code == 204, response.text
+
+    assert check_summary(session) == []
+
+
+def test_rebuild_repairs_the_summary(client, headers, method_id, session):
+    response = client.post(
+        f"/methods/{method_id}/subscriptions/batch",
+        json=[subscription("monthly"), subscription("daily", period_unit="day")],
+        headers=headers,
+    )
+    assert_succeeded(response)
+    session.query(UserSpendingSummary).update({"yearly_cost": 0})
+    session.commit()
+    assert len(check_summary(session)) == 1
+
+    rebuild_summary(session)
+
+    assert check_summary(session) == []
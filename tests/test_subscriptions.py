@@ -0,0 +1,95 @@
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import select
+
+from finance_control_be.importer import SubscriptionImportError, parse_rows
+from finance_control_be.models.reminder import ReminderDueDate
+from finance_control_be.models.subscription import Subscription
+
+SUBSCRIPTION = {
+    "name": "streaming",
+    "price": "9.99",
+    "currency": "USD",
+    "period": 1,
+    "period_unit": "month",
+}
+
+
+@pytest.mark.parametrize("period", [0, -1])
+def test_a_period_must_be_positive(client, headers, method_id, period):
+    url = f"/methods/{method_id}/subscriptions"
+    created = client.post(f"{url}/", json=SUBSCRIPTION, headers=headers)
+    assert created.status_code == 201, created.text
+    subscription_id = created.json()["id"]
+
+    for response in (
+        client.post(
+            f"{url}/", json={**SUBSCRIPTION, "period": period}, headers=headers
+        ),
+        client.post(
+            f"{url}/batch", json=[{**SUBSCRIPTION, "period": period}], headers=headers
+        ),
+        client.patch(
+            f"{url}/{subscription_id}", json={"period": period}, headers=headers
+        ),
+        client.patch(
+            f"{url}/batch",
+            json=[{"id": subscription_id, "period": period}],
+            headers=headers,
+        ),
+    ):
+        assert response.status_code == 422, response.text
+
+    response = client.get(f"{url}/{subscription_id}/next-payment-date", headers=headers)
+    assert response.status_code == 200, response.text
+
+
+def test_the_import_rejects_rows_without_a_positive_period():
+    lines = [
+        "name,price,currency,period,period_unit",
+        "monthly,9.99,USD,1,month",
+        "never,9.99,USD,0,month",
+    ]
+    errors: list[SubscriptionImportError] = []
+
+    rows = list(parse_rows(lines, uuid4(), errors))
+
+    assert [row["name"] for row in rows] == ["monthly"]
+    assert [error.line for error in errors] == [3]
+    assert errors[0].errors[0].startswith("period:")
+
+
+def test_the_import_reports_invalid_and_overlong_rows(
+    client, headers, method_id, session
+):
+    lines = [
+        "name,price,currency,period,period_unit,is_active",
+        "monthly,9.99,USD,1,month,true",
+        "no price,,USD,1,month,true",
+        f"long currency,9.99,{'X' * 9},1,month,true",
+        f"{'n' * 257},9.99,USD,1,month,true",
+        "yearly,99,EUR,1,year,true",
+        "inactive,5,USD,1,week,false",
+    ]
+
+    response = client.post(
+        f"/methods/{method_id}/subscriptions/import",
+        files={"file": ("subscriptions.csv", "\n".join(lines).encode())},
+        headers=headers,
+    )
+
+    assert response.status_code == 200, response.text
+    report = response.json()
+    assert report["imported"] == 3
+    assert [error["line"] for error in report["errors"]] == [3, 4, 5]
+    assert report["errors"][1]["errors"][0].startswith("currency:")
+    assert report["errors"][2]["errors"][0].startswith("name:")
+
+    # the active rows got their reminder due dates.
+    scheduled = session.scalars(
+        select(Subscription.name)
+        .join(ReminderDueDate, ReminderDueDate.subscription_id == Subscription.id)
+        .order_by(Subscription.name)
+    ).all()
+    assert scheduled == ["monthly", "yearly"]